@@ -2,7 +2,7 @@
 
 import React, { useState, useEffect, useRef } from "react";
 import { Volume2, MicOff, Loader2, ArrowLeft, ChevronLeft, ChevronRight } from "lucide-react";
-import { summarizeText } from "@/services/lecture_api";
+import { summarizeText, registerDocument, summarizeWindow } from "@/services/lecture_api";
 import Link from "next/link";
 import ChatPanel from "@/components/Chatpanel"; // ← Split file
 
@@ -177,6 +177,15 @@ const Lecture: React.FC = () => {
   const [wordIndex, setWordIndex] = useState<number>(-1);
   const utteranceRef = useRef<SpeechSynthesisUtterance | null>(null);
   const videoRef = useRef<HTMLVideoElement>(null);
+  const documentIdRef = useRef<Promise<string | null> | null>(null);
+
+  // ── Register the document so upcoming chunks are prefetched ──────────────
+  useEffect(() => {
+    if (allPages.length === 0) return;
+    documentIdRef.current = registerDocument(allPages, PAGES_PER_CHUNK)
+      .then((doc) => doc.document_id)
+      .catch(() => null);
+  }, [allPages]);
 
   // ── Current page metadata ─────────────────────────────────────────────────
   const currentPages = allPages.slice(
@@ -224,7 +233,12 @@ const Lecture: React.FC = () => {
       setError(null);
 
       try {
-        const result = await summarizeText(combinedText);
+        // Prefetched windows come back from the service's cache; fall back
+        // to sending the text if the document is not registered there
+        const documentId = documentIdRef.current ? await documentIdRef.current : null;
+        const result = documentId
+          ? await summarizeWindow(documentId, chunkIndex).catch(() => summarizeText(combinedText))
+          : await summarizeText(combinedText);
         const newCache = { ...cache, [chunkIndex]: result };
         setCache(newCache);
         saveCacheToStorage(newCache);
@@ -21,3 +21,44 @@ export async function summarizeText(text: string): Promise<SummaryResponse> {
 
   return res.json();
 }
+
+export interface DocumentPage {
+  page: number;
+  text: string;
+}
+
+export interface RegisteredDocument {
+  document_id: string;
+  windows: number;
+}
+
+// Register the whole document once; the service then prefetches the
+// windows after the one being read.
+export async function registerDocument(
+  pages: DocumentPage[],
+  pagesPerWindow: number
+): Promise<RegisteredDocument> {
+  const res = await fetch(`${BASE_URL}/documents`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({ pages, pages_per_window: pagesPerWindow }),
+  });
+
+  if (!res.ok) {
+    throw new Error(`API error: ${res.status}`);
+  }
+
+  return res.json();
+}
+
+export async function summarizeWindow(documentId: string, index: number): Promise<SummaryResponse> {
+  const res = await fetch(`${BASE_URL}/documents/${documentId}/windows/${index}`);
+
+  if (!res.ok) {
+    throw new Error(`API error: ${res.status}`);
+  }
+
+  return res.json();
+}
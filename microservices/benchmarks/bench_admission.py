@@ -0,0 +1,150 @@
+"""
+Admission control under overload: priorities, deadlines and shedding.
+
+Serves two fake endpoints from one process behind ``AdmissionMiddleware``:
+an interactive "doubt" endpoint (short, tight deadline) and a batch
+"render" endpoint (long). A flood of batch requests arrives first, then
+interactive ones; the run is repeated with admission turned off for
+comparison. Reports interactive latency, how many requests were shed with
+429/503 and the admission counters.
+
+First it checks that a client-supplied ``X-Deadline-Ms`` cannot keep a
+request queued past its endpoint's deadline (nan, inf, huge, negative or
+malformed values), and exits non-zero if one does.
+
+    python -m benchmarks.bench_admission --batch 60 --interactive 40
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+
+from benchmarks.fakes import use_service
+
+use_service("video_lecture_agent")
+
+from common import admission  # noqa: E402
+from common.admission import BATCH, INTERACTIVE, AdmissionController, AdmissionMiddleware, Policy  # noqa: E402
+
+POLICIES = {
+    "POST /doubt": Policy(INTERACTIVE, limit=8, deadline=5, expected=0.5),
+    # Batch may take most of the workers, never all of them
+    "POST /render": Policy(BATCH, limit=6, deadline=120, expected=3),
+}
+
+
+def _backend(capacity: int, service_times: dict[str, float]):
+    """Stand-in for the services: a fixed number of workers, each busy for the route's time."""
+    workers = asyncio.Semaphore(capacity)
+
+    async def app(scope, receive, send):
+        async with workers:
+            await asyncio.sleep(service_times[scope["path"]])
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    return app
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+# X-Deadline-Ms values that must not outlive the endpoint's own deadline
+BAD_DEADLINES = ["nan", "inf", "-inf", "1e12", "-5", "0", "soon"]
+
+
+async def check_deadline_header() -> int:
+    """Returns the number of header values that kept a request queued too long."""
+    admission.ADMISSION = True
+    policies = {"POST /slow": Policy(INTERACTIVE, limit=1, deadline=1, expected=0.1)}
+    controller = AdmissionController(capacity=4, max_queue=50)
+    app = AdmissionMiddleware(_backend(4, {"/slow": 30.0}), policies, controller)
+
+    failures = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        # Holds the endpoint's only slot for the whole check
+        blocker = asyncio.create_task(client.post("/slow"))
+        await asyncio.sleep(0.1)
+
+        async def call(value: str) -> tuple[str, object]:
+            try:
+                response = await asyncio.wait_for(client.post("/slow", headers={"X-Deadline-Ms": value}), timeout=3)
+                return value, response.status_code
+            except asyncio.TimeoutError:
+                return value, "still queued after 3s"
+
+        for value, outcome in await asyncio.gather(*(call(v) for v in BAD_DEADLINES)):
+            ok = outcome == 503
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} X-Deadline-Ms: {value:<6} -> {outcome}")
+        blocker.cancel()
+    return failures
+
+
+async def run(enabled: bool, batch: int, interactive: int, capacity: int) -> dict:
+    admission.ADMISSION = enabled
+    controller = AdmissionController(capacity=capacity, max_queue=50)
+    app = AdmissionMiddleware(_backend(capacity, {"/doubt": 0.5, "/render": 3.0}), POLICIES, controller)
+
+    results: dict[str, list] = {"/doubt": [], "/render": []}
+
+    async def call(client: httpx.AsyncClient, path: str) -> None:
+        start = time.perf_counter()
+        response = await client.post(path)
+        results[path].append((response.status_code, time.perf_counter() - start, response.headers.get("retry-after")))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        renders = [asyncio.create_task(call(client, "/render")) for _ in range(batch)]
+        await asyncio.sleep(0.2)
+        doubts = [asyncio.create_task(call(client, "/doubt")) for _ in range(interactive)]
+        await asyncio.sleep(0.5)
+        depth = controller.stats()["queued"]
+        await asyncio.gather(*renders, *doubts)
+
+    summary = {"peak_queue_seen": depth, "stats": controller.stats()}
+    for path, rows in results.items():
+        ok = [t for status, t, _ in rows if status == 200]
+        summary[path] = {
+            "ok": len(ok),
+            "shed": sum(status in (429, 503) for status, _, _ in rows),
+            "retry_after": sorted({r for status, _, r in rows if r}),
+            "p50_s": round(_percentile(ok, 0.5), 2),
+            "p95_s": round(_percentile(ok, 0.95), 2),
+        }
+    return summary
+
+
+async def main(args: argparse.Namespace) -> int:
+    failures = await check_deadline_header()
+    print()
+
+    print(f"{args.batch} batch renders (3s) then {args.interactive} interactive doubts (0.5s, 5s deadline), {args.capacity} workers")
+    for enabled in (False, True):
+        result = await run(enabled, args.batch, args.interactive, args.capacity)
+        print(f"\nadmission {'on' if enabled else 'off'}:")
+        for path in ("/doubt", "/render"):
+            row = result[path]
+            print(
+                f"  {path:<8} ok {row['ok']:>3}  shed {row['shed']:>3}  p50 {row['p50_s']:>6.2f}s"
+                f"  p95 {row['p95_s']:>6.2f}s  retry-after {row['retry_after']}"
+            )
+        if enabled:
+            print(f"  queue depth 0.5s after the doubts arrived: {result['peak_queue_seen']}")
+            for name, endpoint in result["stats"]["endpoints"].items():
+                print(f"  {name}: admitted {endpoint['admitted']}, shed {endpoint['shed']}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch", type=int, default=60)
+    parser.add_argument("--interactive", type=int, default=40)
+    parser.add_argument("--capacity", type=int, default=8)
+    sys.exit(asyncio.run(main(parser.parse_args())))
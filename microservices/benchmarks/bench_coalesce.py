@@ -0,0 +1,52 @@
+"""
+Burst benchmark for request coalescing on /summarize_pages.
+
+Fires a burst of concurrent requests where only a few distinct pages are
+being opened, then reports how many Gemini calls were actually made and
+the coalescing counters from /stats.
+
+    python -m benchmarks.bench_coalesce --requests 60 --distinct 3
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.fakes import install_fake_gemini, install_fake_wikimedia, use_service
+
+use_service("video_lecture_agent")
+
+import main as service  # noqa: E402
+from common import stats  # noqa: E402
+
+
+async def main(requests: int, distinct: int, latency: float) -> None:
+    gateway = install_fake_gemini(latency=latency)
+    install_fake_wikimedia()
+    pages = [f"Page {i}: photosynthesis converts light into chemical energy." for i in range(distinct)]
+
+    transport = httpx.ASGITransport(app=service.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/summarize_pages", json={"text": pages[i % distinct]})
+            for i in range(requests)
+        ))
+        elapsed = time.perf_counter() - start
+
+    gemini_calls = sum(slot.client.aio.models.calls for slot in gateway.slots)
+    ok = sum(r.status_code == 200 for r in responses)
+    print(f"{requests} requests ({distinct} distinct) in {elapsed:.2f}s, {ok} OK")
+    print(f"Gemini calls: {gemini_calls}")
+    print(f"coalescing: {stats.collect()['coalesce']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--distinct", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.distinct, args.latency))
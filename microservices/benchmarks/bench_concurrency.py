@@ -0,0 +1,92 @@
+"""
+Show that video_lecture_agent's throughput scales with concurrent users.
+
+Runs the service under uvicorn against the fake backends at increasing
+numbers of closed-loop users and compares measured throughput with the
+ideal of the single-user rate times the number of users. A handler that
+blocked the event loop would stay near the single-user rate however many
+users were added.
+Finally it checks that a request whose client hangs up is cancelled.
+
+    python -m benchmarks.bench_concurrency --users 1 10 50 --duration 10
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+
+import httpx
+
+from benchmarks.fake_server import add_backend_args, backend_argv
+from benchmarks.fakes import MICROSERVICES_DIR
+from benchmarks.loadtest import _free_port, _wait_ready, lecture_text, run_service
+
+SERVICE = "video_lecture_agent"
+
+
+async def check_disconnect(args: argparse.Namespace) -> None:
+    """Abandon a request mid-flight and read the service's cancellation counters."""
+    port = _free_port()
+    cmd = [sys.executable, "-m", "benchmarks.fake_server", SERVICE, "--port", str(port), *backend_argv(args)]
+    proc = subprocess.Popen(cmd, cwd=MICROSERVICES_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=5.0) as client:
+            await _wait_ready(client, proc)
+            try:
+                await client.post(
+                    "/summarize_pages",
+                    json={"text": lecture_text(10**6, 1500)},
+                    timeout=args.llm_latency / 4,
+                )
+            except httpx.TimeoutException:
+                pass
+            await asyncio.sleep(0.5)
+            stats = (await client.get("/stats")).json()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    flight = stats.get("coalesce", {}).get("/summarize_pages", {})
+    print(
+        f"\nclient gave up after {args.llm_latency / 4:g}s: "
+        f"{stats['disconnects']['cancelled']} request(s) cancelled, "
+        f"{flight.get('cancelled', 0)} Gemini call(s) abandoned"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(f"{SERVICE}, LLM {args.llm_latency:g}s (jitter {args.jitter:g}), {args.duration:g}s per step")
+    print(f"{'users':>6} {'req/s':>8} {'ideal':>8} {'scaling':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+
+    base_rps = None
+    for users in args.users:
+        run_args = argparse.Namespace(**vars(args), concurrency=users)
+        result = await run_service(SERVICE, run_args)
+        rows = result["endpoints"].values()
+        ok = sum(r["ok"] for r in rows)
+        errors = sum(r["errors"] for r in rows)
+        p50 = max((r.get("p50_ms", 0) for r in rows), default=0)
+        p95 = max((r.get("p95_ms", 0) for r in rows), default=0)
+        rps = result["rps"]
+        base_rps = base_rps or rps
+        ideal = base_rps * users / args.users[0]
+        print(
+            f"{users:>6} {rps:>8.2f} {ideal:>8.2f} {rps / base_rps if base_rps else 0:>7.1f}x"
+            f" {p50:>8.0f} {p95:>8.0f} {errors:>7}"
+        )
+        if not ok:
+            break
+
+    await check_disconnect(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per step")
+    parser.add_argument("--distinct", type=int, default=100000, help="distinct pages; large so few requests coalesce")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="show service output")
+    add_backend_args(parser)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,68 @@
+"""
+Compare serial and parallel dialogue generation on a stubbed Gemini model.
+
+Reports wall time and the number of Gemini calls each mode makes: parallel
+mode adds up to one short outline call per chunk.
+
+    python -m benchmarks.bench_dialogue --latency 1.0 --keys 4
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from benchmarks.fakes import install_fake_gemini, use_service
+
+use_service("dialogue_agent")
+
+import dialogue_generator  # noqa: E402
+
+# _chunk_text() packs ten of these paragraphs into one 10k-character chunk.
+PARAGRAPH = "word " * 199 + "end."
+
+
+def _document(chunks: int) -> str:
+    return "\n".join([PARAGRAPH] * (chunks * 10))
+
+
+def _calls(gateway) -> int:
+    return sum(slot.client.aio.models.calls for slot in gateway.slots)
+
+
+async def _time(gateway, text: str, mode: str) -> tuple[float, int, int]:
+    calls = _calls(gateway)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        turns = await dialogue_generator.generate_dialogue(text, mode)
+    return time.perf_counter() - start, len(turns), _calls(gateway) - calls
+
+
+async def main(latency: float, keys: int, sizes: list[int]) -> None:
+    gateway = install_fake_gemini(keys=keys, latency=latency)
+
+    print(
+        f"fake latency {latency:.2f}s, {keys} key(s), concurrency cap {dialogue_generator.MAX_CONCURRENCY},"
+        f" outline cap {dialogue_generator.OUTLINE_CONCURRENCY}"
+    )
+    print(f"{'chunks':>7} {'serial (s)':>12} {'parallel (s)':>13} {'speedup':>8} {'calls serial':>13} {'calls parallel':>15}")
+    for n in sizes:
+        text = _document(n)
+        assert len(dialogue_generator._chunk_text(dialogue_generator._clean_text(text))) == n
+        serial, serial_turns, serial_calls = await _time(gateway, text, "serial")
+        parallel, parallel_turns, parallel_calls = await _time(gateway, text, "parallel")
+        assert serial_turns == parallel_turns
+        print(
+            f"{n:>7} {serial:>12.2f} {parallel:>13.2f} {serial / parallel:>7.1f}x"
+            f" {serial_calls:>13} {parallel_calls:>15}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--keys", type=int, default=1)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.keys, args.sizes))
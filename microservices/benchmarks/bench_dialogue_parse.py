@@ -0,0 +1,81 @@
+"""
+Behaviour check for the dialogue JSON parser.
+
+Feeds model responses shaped like Gemini's (bare arrays, prose preambles,
+```json fences, truncated output) to ``_extract_json_array`` in one piece,
+as the batch path does, and to ``IncrementalJSONArrayParser`` a few
+characters at a time, as the streaming path does. Both must return the
+expected turns, and a cut-off array must be reported as incomplete so the
+chunk is never cached. Exits non-zero on any mismatch.
+
+    python -m benchmarks.bench_dialogue_parse
+"""
+
+import contextlib
+import io
+import json
+import sys
+
+from benchmarks.fakes import use_service
+
+use_service("dialogue_agent")
+
+from dialogue_generator import IncrementalJSONArrayParser, TruncatedDialogue, _extract_json_array  # noqa: E402
+
+TURNS = [
+    {"speaker": "Alex", "text": "So what is [this] about?"},
+    {"speaker": "Sam", "text": "Arrays, braces } and \"quotes\"."},
+]
+ARRAY = json.dumps(TURNS, indent=2)
+
+# (name, model response, expected turns or None when parsing must fail,
+#  whether the array is complete and the chunk may be cached)
+CASES = [
+    ("bare array", ARRAY, TURNS, True),
+    ("prose preamble", "Sure! Here you go:\n" + ARRAY, TURNS, True),
+    ("json fence", f"```json\n{ARRAY}\n```", TURNS, True),
+    ("bracketed preamble before fence", f"Here is the dialogue [2 speakers]:\n```json\n{ARRAY}\n```", TURNS, True),
+    ("bracketed preamble, no fence", f"Here is the dialogue [2 speakers]:\n{ARRAY}", TURNS, True),
+    ("plain fence", f"Dialogue [draft 1]:\n```\n{ARRAY}\n```\nHope that helps [really].", TURNS, True),
+    ("truncated array", ARRAY[: ARRAY.rindex("{")], TURNS[:1], False),
+    ("no array", "I cannot write a dialogue for [this] text.", None, False),
+]
+
+
+def _batch(raw: str):
+    """(turns, complete), or None when nothing parses."""
+    try:
+        return _extract_json_array(raw), True
+    except TruncatedDialogue as e:
+        return e.turns, False
+    except ValueError:
+        return None
+
+
+def _streamed(raw: str, piece: int = 5):
+    parser = IncrementalJSONArrayParser()
+    items = []
+    for i in range(0, len(raw), piece):
+        items += parser.feed(raw[i : i + piece])
+    return (items, parser.done) if parser.started else None
+
+
+def main() -> int:
+    failures = 0
+    for name, raw, turns, complete in CASES:
+        expected = None if turns is None else (turns, complete)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = {"batch": _batch(raw), "streamed": _streamed(raw)}
+        for path, result in results.items():
+            ok = result == expected
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name} ({path})")
+            if not ok:
+                print(f"     expected {expected}\n     got      {result}")
+
+    print(f"\n{len(CASES) * 2} checks, {failures} failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
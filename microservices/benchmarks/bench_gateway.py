@@ -0,0 +1,130 @@
+"""
+Memory and cold start: three service processes versus the combined gateway.
+
+Starts the services with every backend faked, either as three separate
+processes (one per service, as deployed today) or as one gateway process
+mounting all of them. For each layout it reports the time from launch until
+every service answers, the resident memory once idle, and the peak resident
+memory after driving each service's load-test mix concurrently.
+
+    python -m benchmarks.bench_gateway --duration 10 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from typing import Optional
+
+import httpx
+
+from benchmarks.fake_server import GATEWAY, SERVICES, add_backend_args, backend_argv
+from benchmarks.fakes import MICROSERVICES_DIR
+from benchmarks.loadtest import MIXES, Scenario, _free_port, _wait_ready, drive, peak_rss_mb, summarize
+
+PREFIXES = {"video_lecture_agent": "/lecture", "yt_recommend_agent": "/yt", "dialogue_agent": "/dialogue"}
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Current resident set of the process (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _start(name: str, args: argparse.Namespace) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    cmd = [sys.executable, "-m", "benchmarks.fake_server", name, "--port", str(port), *backend_argv(args)]
+    proc = subprocess.Popen(cmd, cwd=MICROSERVICES_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return proc, f"http://127.0.0.1:{port}"
+
+
+def _prefixed(mix: list[Scenario], prefix: str) -> list[Scenario]:
+    return [Scenario(s.name, s.weight, prefix + s.path, s.body) for s in mix]
+
+
+async def run_layout(combined: bool, args: argparse.Namespace) -> dict:
+    start = time.perf_counter()
+    if combined:
+        instances = [_start(GATEWAY, args)]
+        base_url = instances[0][1]
+        targets = [(base_url, _prefixed(MIXES[service], PREFIXES[service])) for service in SERVICES]
+    else:
+        instances = [_start(service, args) for service in SERVICES]
+        targets = [(base_url, MIXES[service]) for service, (_, base_url) in zip(SERVICES, instances)]
+    procs = [proc for proc, _ in instances]
+
+    try:
+        for proc, base_url in instances:
+            async with httpx.AsyncClient(base_url=base_url, timeout=5.0) as client:
+                await _wait_ready(client, proc)
+        cold_start = time.perf_counter() - start
+
+        # Let import-time garbage settle before reading idle memory
+        await asyncio.sleep(1.0)
+        idle = sum(rss_mb(proc.pid) or 0.0 for proc in procs)
+
+        results = await asyncio.gather(*(
+            drive(base_url, mix, args.concurrency, args.duration, args.distinct, args.seed)
+            for base_url, mix in targets
+        ))
+        requests = sum(
+            sum(row["ok"] for row in summarize(samples, elapsed).values()) for samples, elapsed in results
+        )
+        errors = sum(sum(entry["errors"] for entry in samples.values()) for samples, _ in results)
+        return {
+            "processes": len(procs),
+            "cold_start_s": round(cold_start, 2),
+            "idle_rss_mb": round(idle, 1),
+            "peak_rss_mb": round(sum(peak_rss_mb(proc.pid) or 0.0 for proc in procs), 1),
+            "requests": requests,
+            "errors": errors,
+        }
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+async def main(args: argparse.Namespace) -> None:
+    rows = {}
+    for combined in (False, True):
+        layout = "gateway" if combined else "separate"
+        runs = [await run_layout(combined, args) for _ in range(args.repeat)]
+        # Best of the repeats: cold start is noisy on a busy machine
+        rows[layout] = min(runs, key=lambda r: r["cold_start_s"])
+
+    print(f"\n{'layout':<10} {'procs':>5} {'cold start':>11} {'idle RSS':>10} {'peak RSS':>10} {'requests':>9} {'errors':>7}")
+    for layout, r in rows.items():
+        print(
+            f"{layout:<10} {r['processes']:>5} {r['cold_start_s']:>10.2f}s {r['idle_rss_mb']:>8.1f}MB"
+            f" {r['peak_rss_mb']:>8.1f}MB {r['requests']:>9} {r['errors']:>7}"
+        )
+    separate, gateway = rows["separate"], rows["gateway"]
+    print(
+        f"\ngateway saves {separate['idle_rss_mb'] - gateway['idle_rss_mb']:.1f}MB idle"
+        f" ({1 - gateway['idle_rss_mb'] / separate['idle_rss_mb']:.0%}),"
+        f" {separate['peak_rss_mb'] - gateway['peak_rss_mb']:.1f}MB at peak"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per layout")
+    parser.add_argument("--concurrency", type=int, default=4, help="clients per service")
+    parser.add_argument("--distinct", type=int, default=20, help="distinct pages in the load mix")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per layout (best cold start kept)")
+    parser.add_argument("--seed", type=int, default=1)
+    add_backend_args(parser)
+    parser.set_defaults(llm_latency=0.3, tts_latency=0.1, search_latency=0.1, image_latency=0.1, jitter=0.1)
+    asyncio.run(main(parser.parse_args()))
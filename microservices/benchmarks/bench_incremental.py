@@ -0,0 +1,145 @@
+"""
+Show that regenerating an edited document costs in proportion to the edit.
+
+Generates a dialogue for a long synthetic document, applies small edits
+(fix a paragraph, insert one near the start, append one), regenerates, and
+reports how many chunks were reused and how many Gemini calls were made.
+For comparison it also counts the chunks a greedy fixed-size split would
+have changed for the same edit.
+
+It then has the fake model cut off its JSON for one chunk and checks, for
+the batch and streaming paths, that the complete turns are kept but the
+chunk is not cached: the document is not reported complete, and the next
+run regenerates exactly that chunk. Exits non-zero if that check fails.
+
+    python -m benchmarks.bench_incremental --paragraphs 400 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+os.environ["LLM_CACHE_BACKEND"] = "memory"
+
+from benchmarks.fakes import fake_response, install_fake_gemini, use_service  # noqa: E402
+from benchmarks.loadtest import lecture_text  # noqa: E402
+
+use_service("dialogue_agent")
+
+import dialogue_generator  # noqa: E402
+
+
+def _greedy_chunks(text: str, chunk_size: int = 10000) -> list[str]:
+    """The previous fixed-size packing, for comparison."""
+    chunks, current, length = [], [], 0
+    for para in text.split("\n"):
+        if length + len(para) + 1 > chunk_size and current:
+            chunks.append("\n".join(current))
+            current, length = [], 0
+        current.append(para)
+        length += len(para) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+# Dialogue responses for a chunk containing this are cut off mid-array
+TRUNCATE_MARKER = "Truncation marker paragraph for the cut-off check."
+_truncating = {"on": False}
+
+
+def _responder(contents: str, config=None) -> str:
+    text = fake_response(contents, config)
+    if _truncating["on"] and TRUNCATE_MARKER in contents and text.startswith("["):
+        return text[: text.rindex("{")]
+    return text
+
+
+async def _run(text: str, path: str) -> int:
+    with contextlib.redirect_stdout(io.StringIO()):
+        if path == "batch":
+            return len(await dialogue_generator.generate_dialogue(text))
+        return len([turn async for turn in dialogue_generator.stream_dialogue(text)])
+
+
+async def check_truncation(base: list[str], calls) -> int:
+    """Returns the number of failed checks."""
+    failures = 0
+    for path, at in (("batch", 100), ("streamed", 300)):
+        text = "\n".join(base[:at] + [TRUNCATE_MARKER] + base[at:])
+
+        _truncating["on"] = True
+        truncated_turns = await _run(text, path)
+        cached_anyway = dialogue_generator.is_complete(text)
+
+        _truncating["on"] = False
+        before_calls = calls()
+        full_turns = await _run(text, path)
+        regenerated = calls() - before_calls
+
+        checks = [
+            ("complete turns of the cut-off chunk kept", truncated_turns == full_turns - 1),
+            ("cut-off document not reported complete", not cached_anyway),
+            ("next run regenerates only that chunk", regenerated == 1),
+            ("complete after the rerun", dialogue_generator.is_complete(text)),
+        ]
+        for name, ok in checks:
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name} ({path})")
+    return failures
+
+
+def _changed(before: list[str], after: list[str]) -> int:
+    return len(set(after) - set(before))
+
+
+def _document(paragraphs: int) -> list[str]:
+    return [lecture_text(seed, random.Random(seed).randint(150, 600)) for seed in range(paragraphs)]
+
+
+async def main(paragraphs: int, latency: float) -> int:
+    gateway = install_fake_gemini(latency=latency, responder=_responder)
+    calls = lambda: sum(slot.client.aio.models.calls for slot in gateway.slots)  # noqa: E731
+
+    base = _document(paragraphs)
+    edits = {
+        "fix paragraph 200": base[:200] + ["A corrected paragraph replacing the old one."] + base[201:],
+        "insert near start": base[:3] + ["A brand new paragraph added near the start."] + base[3:],
+        "append paragraph": base + ["A closing paragraph appended at the end."],
+    }
+
+    text = "\n".join(base)
+    start = time.perf_counter()
+    await dialogue_generator.generate_dialogue(text)
+    chunks = dialogue_generator._chunk_text(dialogue_generator._clean_text(text))
+    print(f"{len(text)} chars, {len(chunks)} chunks: full generation {time.perf_counter() - start:.2f}s, {calls()} calls")
+
+    print(f"{'edit':<20} {'changed':>8} {'greedy':>7} {'calls':>6} {'time (s)':>9}")
+    for name, paras in edits.items():
+        edited = "\n".join(paras)
+        before_calls = calls()
+        start = time.perf_counter()
+        await dialogue_generator.generate_dialogue(edited)
+        elapsed = time.perf_counter() - start
+
+        clean_before = dialogue_generator._clean_text(text)
+        clean_after = dialogue_generator._clean_text(edited)
+        changed = _changed(dialogue_generator._chunk_text(clean_before), dialogue_generator._chunk_text(clean_after))
+        greedy = _changed(_greedy_chunks(clean_before), _greedy_chunks(clean_after))
+        print(f"{name:<20} {changed:>8} {greedy:>7} {calls() - before_calls:>6} {elapsed:>9.2f}")
+
+    print("\ncut-off model output:")
+    return 1 if await check_truncation(base, calls) else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paragraphs", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.paragraphs, args.latency)))
@@ -0,0 +1,126 @@
+"""
+Cost of the LLM cache's SQLite tier and whether it blocks the event loop.
+
+Times disk-tier writes and hits in a scratch file, checks the tier stays
+within its byte budget, then holds the SQLite write lock from another
+connection (as the precompute CLI does while it writes) and measures how
+long the event loop stalls while a service reads and writes through
+``aget``/``aset``. Exits non-zero when the budget is exceeded or the loop
+stalls for longer than --max-lag-ms.
+
+    python -m benchmarks.bench_llm_cache --entries 2000 --hold 2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.fakes import use_service
+
+use_service(None)
+
+from common.llm_cache import LLMCache, MemoryTier, SQLiteTier  # noqa: E402
+
+VALUE = "x" * 4096
+TTL = 3600.0
+
+
+def _cache(path: str, max_bytes: int) -> LLMCache:
+    # A one-item memory tier, so lookups reach the disk tier
+    return LLMCache(MemoryTier(1, TTL), SQLiteTier(path, max_bytes, TTL))
+
+
+def _timed(fn, n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def measure_ops(path: str, entries: int) -> tuple[float, float, bool]:
+    """Microseconds per disk write and per disk hit, and whether the budget held."""
+    budget = entries * len(VALUE) // 2
+    cache = _cache(path, budget)
+    write_us = _timed(lambda i: cache.set(f"key-{i}", VALUE), entries)
+    # The newest half survives eviction; read it back twice so the second
+    # pass shows the cost once ``accessed`` is fresh
+    survivors = range(entries - entries // 4, entries)
+    _timed(lambda i: cache.get(f"key-{survivors[i]}"), len(survivors))
+    hit_us = _timed(lambda i: cache.get(f"key-{survivors[i]}"), len(survivors))
+    within_budget = cache.disk.usage()["bytes"] <= budget
+    return write_us, hit_us, within_budget
+
+
+def _hold_write_lock(path: str, seconds: float, locked: threading.Event) -> None:
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("INSERT OR REPLACE INTO entries VALUES ('other-process', 'v', 1, ?, ?)", (time.time(), time.time()))
+    locked.set()
+    time.sleep(seconds)
+    conn.execute("COMMIT")
+    conn.close()
+
+
+async def measure_stall(path: str, hold: float) -> tuple[float, int]:
+    """Worst event-loop lag (ms) while another writer holds the lock, and disk errors seen."""
+    cache = _cache(path, 1 << 30)
+    locked = threading.Event()
+    holder = threading.Thread(target=_hold_write_lock, args=(path, hold, locked))
+    holder.start()
+    await asyncio.to_thread(locked.wait)
+
+    worst = 0.0
+    stop = asyncio.Event()
+
+    async def ticker() -> None:
+        nonlocal worst
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            worst = max(worst, time.perf_counter() - start - 0.005)
+
+    async def service() -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(10):
+                await cache.aset_json(f"stall-{i}", {"i": i})
+                await cache.aget_json(f"key-{i}")
+
+    tick = asyncio.create_task(ticker())
+    await service()
+    stop.set()
+    await tick
+    await asyncio.to_thread(holder.join)
+    return worst * 1000, cache.disk_errors
+
+
+async def main(entries: int, hold: float, max_lag_ms: float) -> int:
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "llm_cache.sqlite3")
+        write_us, hit_us, within_budget = measure_ops(path, entries)
+        print(f"{entries} entries of {len(VALUE)} bytes, budget half of that")
+        print(f"  disk write  {write_us:>8.0f} us/op")
+        print(f"  disk hit    {hit_us:>8.0f} us/op")
+        print(f"  budget      {'held' if within_budget else 'EXCEEDED'}")
+
+        lag_ms, errors = await measure_stall(path, hold)
+        print(f"write lock held elsewhere for {hold:.1f}s:")
+        print(f"  worst loop lag {lag_ms:.1f} ms (limit {max_lag_ms:.0f} ms), {errors} disk errors tolerated")
+
+    ok = within_budget and lag_ms <= max_lag_ms
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--hold", type=float, default=2.0, help="seconds the other writer holds the lock")
+    parser.add_argument("--max-lag-ms", type=float, default=100.0)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.entries, args.hold, args.max_lag_ms)))
@@ -0,0 +1,97 @@
+"""
+Offline run of the bulk precompute CLI against the fake backends.
+
+Builds a synthetic textbook, runs ``precompute`` with failing fake
+backends so part of the work is left undone, then runs it again to show the
+checkpoints at work: the second pass only redoes what failed. Finally it
+looks up a precomputed summary through the lecture service to confirm live
+traffic starts warm.
+
+    python -m benchmarks.bench_precompute --pages 60 --llm-latency 0.3
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import tempfile
+
+import httpx
+
+from benchmarks import fake_server
+from benchmarks.loadtest import lecture_text
+
+
+def install_backends(backend_argv: list[str], retries: int, service: str) -> None:
+    """Runs in each precompute worker process."""
+    parser = argparse.ArgumentParser()
+    fake_server.add_backend_args(parser)
+    fake_server.install_fakes(service, parser.parse_args(backend_argv))
+    from common.gemini_gateway import get_gateway
+
+    get_gateway().max_retries = retries
+
+
+def _run(book: str, stages: list[str], checkpoints: str, backend_argv: list[str], retries: int) -> dict:
+    import precompute
+
+    args = precompute.build_parser().parse_args(
+        [book, "--stages", *stages, "--checkpoint-dir", checkpoints, "--concurrency", "8"]
+    )
+    setup = functools.partial(install_backends, backend_argv, retries)
+    reports = precompute.run(args, setup)
+    precompute.print_report(reports)
+    return reports
+
+
+async def _check_warm(book_pages: list[dict]) -> None:
+    from benchmarks.fakes import install_fake_gemini, install_fake_wikimedia, use_service
+
+    use_service("video_lecture_agent")
+    import main as service
+
+    gateway = install_fake_gemini(latency=5.0)
+    install_fake_wikimedia()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=service.app), base_url="http://bench") as client:
+        registered = (await client.post("/documents", json={"pages": book_pages})).json()
+        await client.get(f"/documents/{registered['document_id']}/windows/0")
+    calls = sum(slot.client.aio.models.calls for slot in gateway.slots)
+    print(f"\nlecture service after precompute: window 0 served with {calls} Gemini call(s)")
+
+
+def main(args: argparse.Namespace) -> None:
+    workdir = tempfile.mkdtemp(prefix="precompute-bench-")
+    # Workers inherit these: one on-disk result store shared by every stage
+    os.environ.update({
+        "GEMINI_API_KEY": "fake-key",
+        "LLM_CACHE_BACKEND": "sqlite",
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.sqlite3"),
+        "DIALOGUE_STORE_DIR": os.path.join(workdir, "dialogues"),
+        "TTS_CACHE": "off",
+    })
+    pages = [{"page": n + 1, "text": lecture_text(n, 1800)} for n in range(args.pages)]
+    book = os.path.join(workdir, "book.json")
+    with open(book, "w") as f:
+        json.dump({"pages": pages}, f)
+
+    stages = ["summary", "topics", "dialogue"]
+    checkpoints = os.path.join(workdir, "checkpoints")
+    backend = [
+        "--llm-latency", str(args.llm_latency), "--search-latency", "0.2",
+        "--image-latency", "0.1", "--jitter", "0.1",
+    ]
+    print(f"--- first pass, {args.error_rate:.0%} of backend calls failing, no retries")
+    _run(book, stages, checkpoints, [*backend, "--error-rate", str(args.error_rate)], retries=0)
+    print("\n--- second pass, healthy backends")
+    _run(book, stages, checkpoints, [*backend, "--error-rate", "0"], retries=3)
+
+    asyncio.run(_check_warm(pages))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    main(parser.parse_args())
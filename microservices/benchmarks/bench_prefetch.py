@@ -0,0 +1,75 @@
+"""
+Page-turn latency with and without speculative window prefetch.
+
+Simulates a student reading a registered document window by window,
+spending ``--read`` seconds on each, then jumping ahead once. Each turn is
+timed twice: through /summarize_pages (no prefetch) and through
+/documents/{id}/windows/{n}. Reports the wait per turn and the prefetch
+counters from /stats.
+
+    python -m benchmarks.bench_prefetch --pages 48 --latency 1.5 --read 2
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.fakes import install_fake_gemini, install_fake_wikimedia, use_service
+from benchmarks.loadtest import lecture_text
+
+use_service("video_lecture_agent")
+
+import main as service  # noqa: E402
+from common import stats  # noqa: E402
+from tools.window_prefetch import window_text  # noqa: E402
+
+PAGES_PER_WINDOW = 3
+
+
+async def _timed(request) -> float:
+    start = time.perf_counter()
+    response = await request
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def main(pages: int, latency: float, read: float) -> None:
+    install_fake_gemini(latency=latency)
+    install_fake_wikimedia(latency=0.1)
+    document = [{"page": n + 1, "text": lecture_text(n, 1200)} for n in range(pages)]
+    windows = (pages + PAGES_PER_WINDOW - 1) // PAGES_PER_WINDOW
+    # Read the first quarter in order, then jump ahead and keep reading
+    path = list(range(windows // 4)) + list(range(windows - 3, windows))
+
+    transport = httpx.ASGITransport(app=service.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        plain = []
+        for n in path:
+            pages_in = [(p["page"], p["text"]) for p in document[n * PAGES_PER_WINDOW:(n + 1) * PAGES_PER_WINDOW]]
+            plain.append(await _timed(client.post("/summarize_pages", json={"text": window_text(pages_in)})))
+            await asyncio.sleep(read)
+
+        registered = await client.post("/documents", json={"pages": document, "pages_per_window": PAGES_PER_WINDOW})
+        document_id = registered.json()["document_id"]
+        prefetched = []
+        for n in path:
+            prefetched.append(await _timed(client.get(f"/documents/{document_id}/windows/{n}")))
+            await asyncio.sleep(read)
+
+    print(f"{windows} windows, LLM {latency:g}s, {read:g}s reading per window")
+    print(f"{'window':>7} {'no prefetch (s)':>16} {'prefetch (s)':>13}")
+    for n, a, b in zip(path, plain, prefetched):
+        print(f"{n:>7} {a:>16.2f} {b:>13.2f}")
+    print(f"{'total':>7} {sum(plain):>16.2f} {sum(prefetched):>13.2f}")
+    print(f"prefetch: {stats.collect()['prefetch']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=48)
+    parser.add_argument("--latency", type=float, default=1.5)
+    parser.add_argument("--read", type=float, default=2.0, help="seconds spent on each window")
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.latency, args.read))
@@ -0,0 +1,106 @@
+"""
+Behaviour check for yt_recommend_agent's topic de-duplication.
+
+Runs ``dedupe_topics`` over topic lists shaped like Gemini's per-chunk
+output and compares the result with the expected canonical topics: plural
+and wording variants must collapse into one search, while subtopics, topics
+that only differ by an ordinal or number, and names like "C" / "C++" must
+stay apart. Prints the searches saved
+and exits non-zero on any mismatch.
+
+    python -m benchmarks.bench_topic_dedup
+"""
+
+import sys
+from collections import Counter
+
+from benchmarks.fakes import use_service
+
+use_service("yt_recommend_agent")
+
+from utils.topic_dedup import dedupe_topics  # noqa: E402
+
+# (name, topic -> chunks that produced it, expected canonical topics)
+CASES = [
+    (
+        "plural variants",
+        {"Ideal Gas": 2, "Ideal Gases": 1, "ideal gas": 1},
+        ["Ideal Gas"],
+    ),
+    (
+        "ordinals stay apart",
+        {"Newton's First Law of Motion": 1, "Newton's Second Law of Motion": 1, "Newton's Third Law of Motion": 1},
+        ["Newton's First Law of Motion", "Newton's Second Law of Motion", "Newton's Third Law of Motion"],
+    ),
+    (
+        "ordinal is not a qualifier",
+        {"Newton's Laws of Motion": 2, "Newton's First Law of Motion": 1},
+        ["Newton's First Law of Motion", "Newton's Laws of Motion"],
+    ),
+    (
+        "numbers stay apart",
+        {"World War I": 1, "World War II": 1, "Windows 10": 1, "Windows 11": 1},
+        ["Windows 10", "Windows 11", "World War I", "World War II"],
+    ),
+    (
+        "qualified variant joins the common wording",
+        {"Neural Networks": 3, "Artificial Neural Network": 1, "neural network": 1},
+        ["Neural Networks"],
+    ),
+    (
+        "-ies and -es plurals",
+        {"Monetary Policy": 1, "Monetary Policies": 1, "Chemical Bases": 1, "Chemical Base": 2, "Processes": 1, "Process": 1},
+        ["Chemical Base", "Monetary Policy", "Process"],
+    ),
+    (
+        "-es plurals resolve to the word in use",
+        {"Ideal Gases": 1, "Ideal Gas": 1, "Acid Bases": 1, "Acid Base": 1, "Memory Caches": 1, "Memory Cache": 1},
+        ["Acid Base", "Ideal Gas", "Memory Cache"],
+    ),
+    (
+        "no trailing-letter stemming",
+        {"Monetary Policy": 1, "Monetary Police": 1, "State Machines": 1, "Stat Machines": 1},
+        ["Monetary Police", "Monetary Policy", "Stat Machines", "State Machines"],
+    ),
+    (
+        "subtopics do not fold into their parent",
+        {"Energy": 3, "Kinetic Energy": 1, "Potential Energy": 1, "Conservation of Energy": 1},
+        ["Conservation of Energy", "Energy", "Kinetic Energy", "Potential Energy"],
+    ),
+    (
+        "sibling subtopics stay apart",
+        {"Deep Learning": 1, "Machine Learning": 1, "Learning": 1},
+        ["Deep Learning", "Learning", "Machine Learning"],
+    ),
+    (
+        "symbols are part of the name",
+        {"C++": 1, "C#": 1, "C": 1},
+        ["C", "C#", "C++"],
+    ),
+    (
+        "different subjects stay apart",
+        {"Photosynthesis": 1, "Cellular Respiration": 1, "Mitosis": 1, "Meiosis": 1},
+        ["Cellular Respiration", "Meiosis", "Mitosis", "Photosynthesis"],
+    ),
+]
+
+
+def main() -> int:
+    failures = 0
+    topics_in = topics_out = 0
+    for name, counts, expected in CASES:
+        result = dedupe_topics(Counter(counts))
+        topics_in += len(counts)
+        topics_out += len(result)
+        ok = result == sorted(expected)
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {len(counts)} -> {len(result)}")
+        if not ok:
+            print(f"     expected {sorted(expected)}\n     got      {result}")
+
+    print(f"\n{topics_in} topics -> {topics_out} searches ({topics_in - topics_out} saved), {failures} failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
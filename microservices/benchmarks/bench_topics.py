@@ -0,0 +1,52 @@
+"""
+Wall-time benchmark for yt_recommend_agent's topic extraction.
+
+Runs ``extract_topics`` against a fake Gemini client with injected latency,
+once fully serial (concurrency 1) and once with the configured cap.
+
+    python -m benchmarks.bench_topics --latency 0.5
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.fakes import install_fake_gemini, use_service
+
+use_service("yt_recommend_agent")
+
+from tools import topics_agent  # noqa: E402
+
+# chunk_text() advances 2200 characters per chunk (2500 size, 300 overlap).
+CHUNK_STEP = 2200
+
+
+def _text_with_chunks(n: int) -> str:
+    return "x" * (CHUNK_STEP * n - 100)
+
+
+async def _time(text: str, concurrency: int) -> float:
+    start = time.perf_counter()
+    await topics_agent.extract_topics(text, max_concurrency=concurrency)
+    return time.perf_counter() - start
+
+
+async def main(latency: float, concurrency: int, sizes: list[int]) -> None:
+    install_fake_gemini(latency=latency)
+
+    print(f"fake latency {latency:.2f}s, concurrency cap {concurrency}")
+    print(f"{'chunks':>7} {'serial (s)':>12} {'concurrent (s)':>15} {'speedup':>8}")
+    for n in sizes:
+        text = _text_with_chunks(n)
+        serial = await _time(text, 1)
+        concurrent = await _time(text, concurrency)
+        print(f"{n:>7} {serial:>12.2f} {concurrent:>15.2f} {serial / concurrent:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=topics_agent.MAX_CONCURRENCY)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.concurrency, args.sizes))
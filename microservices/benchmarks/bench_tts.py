@@ -0,0 +1,172 @@
+"""
+Show that podcast TTS wall time scales with concurrency, not turn count,
+and check the per-turn retry and timeout handling.
+
+Synthesizes dialogues through a fake edge-tts backend with injected latency
+at several worker counts and checks the audio comes back in turn order.
+Before that, scripted faults check that failed and hung turns are retried
+within their timeout, that a turn backing off does not hold a worker, and
+that a turn still failing after TTS_RETRIES retries is reported as an
+error by the batch and streaming paths. Exits non-zero if any check fails.
+
+    python -m benchmarks.bench_tts --latency 0.5 --turns 12
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import sys
+import time
+
+from benchmarks.fakes import FakeCommunicate, fake_edge_tts, use_service
+
+use_service("dialogue_agent")
+
+import audio_generator  # noqa: E402
+from models import DialogueTurn  # noqa: E402
+
+# Per-attempt timeout for the fault checks; hung calls are cut off by it
+CHECK_TIMEOUT = 0.2
+
+
+def _dialogue(turns: int) -> list[DialogueTurn]:
+    return [
+        DialogueTurn(speaker=f"Speaker {i % 2 + 1}", text=f"turn {i}")
+        for i in range(turns)
+    ]
+
+
+def _expected_audio(dialogue: list[DialogueTurn]) -> bytes:
+    return b"".join(
+        f"<{audio_generator._voice_for_speaker(t.speaker)}:{t.text}>".encode("utf-8")
+        for t in dialogue
+    )
+
+
+async def _streamed(dialogue: list[DialogueTurn]) -> bytes:
+    async def turns():
+        for turn in dialogue:
+            yield turn
+
+    audio = b""
+    async for segment in audio_generator.stream_audio_from_dialogue(turns(), timeout=CHECK_TIMEOUT):
+        audio += segment
+    return audio
+
+
+async def _run(path: str, dialogue: list[DialogueTurn], faults: dict[str, list[str]]) -> dict:
+    """Synthesize ``dialogue`` with ``faults`` injected; report audio or error, calls and time."""
+    FakeCommunicate.faults = {text: list(outcomes) for text, outcomes in faults.items()}
+    calls = FakeCommunicate.calls
+    start = time.perf_counter()
+    result = {"audio": None, "error": None}
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            if path == "batch":
+                result["audio"] = await audio_generator.generate_audio_from_dialogue(dialogue, timeout=CHECK_TIMEOUT)
+            else:
+                result["audio"] = await _streamed(dialogue)
+        except Exception as e:
+            result["error"] = e
+    result["calls"] = FakeCommunicate.calls - calls
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+async def check_faults(latency: float) -> int:
+    """Run the fault scenarios on both paths; returns the number of failed checks."""
+    attempts = audio_generator.TTS_RETRIES + 1
+    # Backoff sleeps between attempts, plus one timeout or latency per attempt
+    worst_case = sum(0.5 * 2 ** a for a in range(attempts - 1)) + attempts * (CHECK_TIMEOUT + latency) + 0.5
+
+    dialogue = _dialogue(3)
+    flaky = {"turn 1": ["error", "hang"][: attempts - 1]}
+    failing = {"turn 1": ["error"] * attempts}
+    hanging = {"turn 1": ["hang"] * attempts}
+
+    failures = 0
+    for path in ("batch", "streamed"):
+        checks = []
+
+        r = await _run(path, dialogue, flaky)
+        checks.append((
+            f"error then timeout, retried ({len(flaky['turn 1'])} retries)",
+            r["error"] is None and r["audio"] == _expected_audio(dialogue)
+            and r["calls"] == len(dialogue) + len(flaky["turn 1"]),
+        ))
+
+        r = await _run(path, dialogue[1:2], failing)
+        checks.append((
+            f"still failing after TTS_RETRIES={audio_generator.TTS_RETRIES} is an error",
+            isinstance(r["error"], RuntimeError) and f"after {attempts} attempts" in str(r["error"])
+            and isinstance(r["error"].__cause__, ConnectionError) and r["calls"] == attempts,
+        ))
+
+        r = await _run(path, dialogue[1:2], hanging)
+        checks.append((
+            f"hung on every attempt times out within {worst_case:.1f}s",
+            isinstance(r["error"], RuntimeError) and isinstance(r["error"].__cause__, asyncio.TimeoutError)
+            and r["calls"] == attempts and r["seconds"] < worst_case,
+        ))
+
+        r = await _run(path, dialogue, failing)
+        checks.append((
+            "failing turn fails the whole dialogue",
+            isinstance(r["error"], RuntimeError) and "turn 2" in str(r["error"]),
+        ))
+
+        for name, ok in checks:
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name} ({path})")
+
+    # One worker: while turn 0 waits out its first backoff (0.5s), the
+    # healthy turns behind it should get the worker and finish
+    FakeCommunicate.faults = {"turn 0": ["error"]}
+    finished: list[float] = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await audio_generator.generate_audio_from_dialogue(
+            dialogue, max_concurrency=1, timeout=CHECK_TIMEOUT,
+            progress=lambda done, total: finished.append(time.perf_counter() - start),
+        )
+    healthy_done = finished[len(dialogue) - 2] if len(finished) == len(dialogue) else float("inf")
+    ok = healthy_done < 0.25
+    failures += not ok
+    print(f"{'ok  ' if ok else 'FAIL'} backoff frees the worker: healthy turns done after {healthy_done:.2f}s")
+
+    FakeCommunicate.faults = {}
+    return failures
+
+
+async def main(latency: float, turn_counts: list[int], workers: list[int]) -> int:
+    audio_generator.edge_tts = fake_edge_tts
+
+    FakeCommunicate.latency = 0.01
+    failures = await check_faults(FakeCommunicate.latency)
+    print(f"{failures} fault checks failed\n")
+
+    FakeCommunicate.latency = latency
+    print(f"fake TTS latency {latency:.2f}s per turn")
+    print(f"{'turns':>6} {'workers':>8} {'wall (s)':>9} {'ideal (s)':>10}")
+    for turns in turn_counts:
+        dialogue = _dialogue(turns)
+        for n in workers:
+            start = time.perf_counter()
+            audio = await audio_generator.generate_audio_from_dialogue(dialogue, max_concurrency=n)
+            elapsed = time.perf_counter() - start
+            if audio != _expected_audio(dialogue):
+                print(f"FAIL turns reassembled out of order ({turns} turns, {n} workers)")
+                failures += 1
+            ideal = latency * -(-turns // n)
+            print(f"{turns:>6} {n:>8} {elapsed:>9.2f} {ideal:>10.2f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--turns", type=int, nargs="+", default=[12, 24])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 12])
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.latency, args.turns, args.workers)))
@@ -0,0 +1,93 @@
+"""
+Run one microservice under uvicorn with every external backend faked.
+
+Used by ``benchmarks.loadtest``, which starts one of these per service in a
+child process, but it can also be run by hand to poke at a service offline:
+
+    python -m benchmarks.fake_server video_lecture_agent --port 8101 --llm-latency 1.0
+
+``gateway`` instead of a service name serves all three from the combined
+gateway app (see ``gateway.py``).
+"""
+
+import argparse
+
+from benchmarks import fakes
+
+SERVICES = ("video_lecture_agent", "yt_recommend_agent", "dialogue_agent")
+GATEWAY = "gateway"
+
+
+def add_backend_args(parser: argparse.ArgumentParser) -> None:
+    """Fake-backend knobs shared with the load-test driver."""
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="seconds per Gemini call")
+    parser.add_argument("--tts-latency", type=float, default=0.4, help="seconds per edge-tts turn")
+    parser.add_argument("--search-latency", type=float, default=0.5, help="seconds per YouTube search")
+    parser.add_argument("--image-latency", type=float, default=0.3, help="seconds per Wikimedia search")
+    parser.add_argument("--jitter", type=float, default=0.3, help="spread of the latency distribution")
+    parser.add_argument("--dist", choices=fakes.LATENCY_DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of backend calls that fail")
+    parser.add_argument("--keys", type=int, default=1, help="fake Gemini API keys")
+
+
+def backend_argv(args: argparse.Namespace) -> list[str]:
+    return [
+        "--llm-latency", str(args.llm_latency),
+        "--tts-latency", str(args.tts_latency),
+        "--search-latency", str(args.search_latency),
+        "--image-latency", str(args.image_latency),
+        "--jitter", str(args.jitter),
+        "--dist", args.dist,
+        "--error-rate", str(args.error_rate),
+        "--keys", str(args.keys),
+    ]
+
+
+def install_fakes(service: str, args: argparse.Namespace, gemini: bool = True) -> None:
+    fakes.latency_distribution = args.dist
+    if gemini:
+        fakes.install_fake_gemini(
+            keys=args.keys, latency=args.llm_latency, jitter=args.jitter, error_rate=args.error_rate
+        )
+    if service == "video_lecture_agent":
+        fakes.install_fake_wikimedia(args.image_latency, args.jitter, args.error_rate)
+    elif service == "yt_recommend_agent":
+        fakes.install_fake_youtube(args.search_latency, args.jitter, args.error_rate)
+    elif service == "dialogue_agent":
+        fakes.install_fake_tts(args.tts_latency, args.jitter, args.error_rate)
+
+
+def gateway_app(args: argparse.Namespace):
+    """The combined gateway with every service's backends faked."""
+    fakes.use_service(None)
+    import gateway
+
+    for n, service in enumerate(SERVICES):
+        # The fakes patch service modules by their own names
+        with gateway.service_modules(service):
+            install_fakes(service, args, gemini=n == 0)
+    return gateway.app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("service", choices=(*SERVICES, GATEWAY))
+    parser.add_argument("--port", type=int, default=8100)
+    add_backend_args(parser)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    if args.service == GATEWAY:
+        app = gateway_app(args)
+    else:
+        fakes.use_service(args.service)
+        import main as service  # noqa: E402
+
+        install_fakes(args.service, args)
+        app = service.app
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Local stand-ins for the external backends used by the microservices, so
+benchmarks can run offline without spending Gemini quota.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+import httpx
+
+MICROSERVICES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def use_service(name: Optional[str]) -> None:
+    """
+    Put a service directory on sys.path so its modules import as in
+    production; ``None`` only makes ``common`` and the gateway importable.
+    """
+    os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+    # Benchmarks measure the pipeline itself, not cache hits
+    os.environ.setdefault("LLM_CACHE_BACKEND", "off")
+    os.environ.setdefault("TTS_CACHE", "off")
+    paths = [MICROSERVICES_DIR] if name is None else [MICROSERVICES_DIR, os.path.join(MICROSERVICES_DIR, name)]
+    for path in paths:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+# Shape of the injected latency: "uniform" adds U(0, jitter) to the base,
+# "lognormal" multiplies it by a log-normal factor with sigma = jitter
+# (a long right tail, like real model calls), "fixed" ignores jitter.
+LATENCY_DISTRIBUTIONS = ("uniform", "lognormal", "fixed")
+latency_distribution = os.getenv("FAKE_LATENCY_DIST", "uniform")
+
+
+def sample_latency(latency: float, jitter: float = 0.0) -> float:
+    if latency_distribution == "lognormal" and jitter > 0:
+        return latency * random.lognormvariate(0, jitter)
+    if latency_distribution == "fixed":
+        return latency
+    return latency + random.uniform(0, jitter)
+
+
+FAKE_TOPICS = [
+    "Photosynthesis", "Cellular respiration", "Mitosis", "Meiosis", "DNA replication",
+    "Newton's laws of motion", "Thermodynamics", "Electromagnetic induction",
+    "Ohm's law", "Wave optics", "Organic chemistry", "Chemical bonding",
+    "Acids and bases", "Periodic table", "Linear algebra", "Calculus",
+    "Probability", "Graph theory", "Sorting algorithms", "Dynamic programming",
+    "Supply and demand", "Inflation", "World War II", "French Revolution",
+]
+
+
+def fake_response(contents: str, config=None) -> str:
+    """Plausible JSON/text for each prompt the services send to Gemini."""
+    system = (config or {}).get("system_instruction", "") if isinstance(config, dict) else ""
+    if system.lstrip().startswith("You summarize"):
+        return "The speakers covered the basics."
+    if system:
+        return json.dumps([
+            {"speaker": "Speaker 1", "text": "Let's look at this part."},
+            {"speaker": "Speaker 2", "text": "Agreed, the key point is clear."},
+        ])
+    if "academic topics" in contents:
+        # Stable per chunk, so repeated text behaves like the real model
+        rng = random.Random(contents)
+        return json.dumps({"topics": rng.sample(FAKE_TOPICS, 3)})
+    if "doubt_clear" in contents:
+        return json.dumps({"doubt_clear": "Here is a clear explanation of the doubt."})
+    return json.dumps({
+        "resp": "A concise explanation of the page with an example. " * 8,
+        "image_needed": "yes",
+        "image_of": ["labelled diagram of the topic"],
+    })
+
+
+class FakeRateLimitError(Exception):
+    code = 429
+
+
+# Output length a call is assumed to produce when it does not cap it with
+# ``max_output_tokens``; capped calls are proportionally faster, as
+# generation time grows with the tokens written
+FULL_RESPONSE_TOKENS = 1024
+
+
+class FakeModels:
+    """Mimics ``client.aio.models`` with a fixed or random latency per call."""
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0, error_rate: float = 0.0, responder=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.responder = responder or fake_response
+        self.calls = 0
+
+    def _delay(self, config=None) -> float:
+        delay = sample_latency(self.latency, self.jitter)
+        tokens = config.get("max_output_tokens") if isinstance(config, dict) else None
+        if tokens:
+            delay *= min(1.0, tokens / FULL_RESPONSE_TOKENS)
+        return delay
+
+    async def generate_content(self, *, model, contents, config=None):
+        self.calls += 1
+        await asyncio.sleep(self._delay(config))
+        if random.random() < self.error_rate:
+            raise FakeRateLimitError("429 RESOURCE_EXHAUSTED (fake)")
+        return SimpleNamespace(text=self.responder(contents, config))
+
+    async def generate_content_stream(self, *, model, contents, config=None):
+        self.calls += 1
+        if random.random() < self.error_rate:
+            raise FakeRateLimitError("429 RESOURCE_EXHAUSTED (fake)")
+        return _fake_stream(self.responder(contents, config), self._delay(config))
+
+
+class FakeGenaiClient:
+    """Drop-in for ``google.genai.Client`` exposing only the async surface."""
+
+    def __init__(self, api_key=None, **kwargs):
+        self.api_key = api_key
+        self.aio = SimpleNamespace(models=FakeModels(**kwargs))
+
+
+def install_fake_gemini(keys: int = 1, **kwargs):
+    """
+    Route every service's Gemini calls through fake clients by replacing the
+    shared gateway. Keyword arguments configure each key's FakeModels.
+    """
+    from common.gemini_gateway import GeminiGateway, set_gateway
+
+    gateway = GeminiGateway(
+        [f"fake-key-{i}" for i in range(keys)],
+        client_factory=lambda api_key: FakeGenaiClient(api_key=api_key, **kwargs),
+        rpm_per_key=float(os.getenv("GEMINI_RPM_PER_KEY", "100000")),
+    )
+    set_gateway(gateway)
+    return gateway
+
+
+async def _fake_stream(text: str, latency: float, pieces: int = 8):
+    """Spread ``text`` over ``pieces`` parts arriving evenly across ``latency``."""
+    size = -(-len(text) // pieces)
+    for i in range(0, len(text), size):
+        await asyncio.sleep(latency / pieces)
+        yield SimpleNamespace(text=text[i : i + size])
+
+
+class FakeCommunicate:
+    """
+    Mimics ``edge_tts.Communicate``: waits ``latency`` seconds, then yields
+    a few audio chunks whose bytes identify the text that produced them.
+
+    ``faults`` scripts failures per text: each call for that text takes the
+    next outcome from its list, "error" (raise) or "hang" (never finish, so
+    the caller's timeout fires), and succeeds once the list is empty.
+    """
+
+    latency = 0.5
+    jitter = 0.0
+    failure_rate = 0.0
+    calls = 0
+    faults: dict[str, list[str]] = {}
+
+    def __init__(self, text, voice, **kwargs):
+        self.text = text
+        self.voice = voice
+
+    async def stream(self):
+        FakeCommunicate.calls += 1
+        scripted = self.faults.get(self.text)
+        fault = scripted.pop(0) if scripted else None
+        await asyncio.sleep(sample_latency(self.latency, self.jitter))
+        if fault == "hang":
+            await asyncio.Event().wait()
+        if fault == "error" or random.random() < self.failure_rate:
+            raise ConnectionError("fake TTS failure")
+        payload = f"<{self.voice}:{self.text}>".encode("utf-8")
+        for i in range(0, len(payload), 16):
+            yield {"type": "audio", "data": payload[i : i + 16]}
+        yield {"type": "WordBoundary", "offset": 0}
+
+
+fake_edge_tts = SimpleNamespace(Communicate=FakeCommunicate)
+
+
+class FakeVideosSearch:
+    """Mimics ``youtubesearchpython.VideosSearch`` with a blocking sleep."""
+
+    latency = 0.5
+    jitter = 0.0
+    failure_rate = 0.0
+    calls = 0
+
+    def __init__(self, query, limit=1, **kwargs):
+        self.query = query
+        self.limit = limit
+
+    def result(self):
+        FakeVideosSearch.calls += 1
+        time.sleep(sample_latency(self.latency, self.jitter))
+        if random.random() < self.failure_rate:
+            raise ConnectionError("fake YouTube search failure")
+        slug = "-".join(self.query.lower().split())
+        return {
+            "result": [
+                {
+                    "title": f"{self.query} explained ({i + 1})",
+                    "link": f"https://www.youtube.com/watch?v={slug}-{i}",
+                    "channel": {"name": "Fake Channel"},
+                }
+                for i in range(self.limit)
+            ]
+        }
+
+
+class FakeWikimediaTransport(httpx.AsyncBaseTransport):
+    """Answers Wikimedia Commons image searches locally after ``latency`` seconds."""
+
+    def __init__(self, latency: float = 0.3, jitter: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await asyncio.sleep(sample_latency(self.latency, self.jitter))
+        if random.random() < self.error_rate:
+            return httpx.Response(503, json={"error": "fake outage"})
+        query = request.url.params.get("gsrsearch", "").replace(" filetype:bitmap", "")
+        limit = int(request.url.params.get("gsrlimit", "2"))
+        slug = "_".join(query.split()) or "image"
+        pages = {
+            str(i): {
+                "imageinfo": [{
+                    "url": f"https://upload.wikimedia.org/{slug}_{i}.jpg",
+                    "thumburl": f"https://upload.wikimedia.org/thumb/{slug}_{i}.jpg/800px.jpg",
+                }]
+            }
+            for i in range(limit)
+        }
+        return httpx.Response(200, json={"query": {"pages": pages}})
+
+
+def install_fake_wikimedia(latency: float = 0.3, jitter: float = 0.0, error_rate: float = 0.0) -> FakeWikimediaTransport:
+    """Point video_lecture_agent's image fetcher at a local fake Commons API."""
+    from tools import image_fetcher
+
+    transport = FakeWikimediaTransport(latency, jitter, error_rate)
+    client = httpx.AsyncClient(transport=transport)
+    image_fetcher.get_http_client = lambda: client
+    return transport
+
+
+def install_fake_tts(latency: float = 0.5, jitter: float = 0.0, failure_rate: float = 0.0) -> None:
+    """Swap dialogue_agent's edge-tts for FakeCommunicate."""
+    import audio_generator
+
+    FakeCommunicate.latency = latency
+    FakeCommunicate.jitter = jitter
+    FakeCommunicate.failure_rate = failure_rate
+    audio_generator.edge_tts = fake_edge_tts
+
+
+def install_fake_youtube(latency: float = 0.5, jitter: float = 0.0, failure_rate: float = 0.0) -> None:
+    """Swap yt_recommend_agent's VideosSearch for FakeVideosSearch."""
+    from tools import yt_search
+
+    FakeVideosSearch.latency = latency
+    FakeVideosSearch.jitter = jitter
+    FakeVideosSearch.failure_rate = failure_rate
+    yt_search.VideosSearch = FakeVideosSearch
@@ -0,0 +1,108 @@
+"""
+Import-time report and startup budget per service.
+
+Imports each service's ``main`` (and the combined gateway) in a fresh
+interpreter under ``python -X importtime`` and reports the total import
+time, the top-level packages that cost the most, and whether any of the
+SDKs that should load lazily were imported at startup. Exits non-zero when
+a service is over its budget or imports a lazy SDK eagerly, so it can gate
+changes in CI.
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --services dialogue_agent --top 15 --json imports.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from benchmarks.fakes import MICROSERVICES_DIR
+
+# Milliseconds for ``import main`` on a developer laptop; generous enough
+# to absorb noise, tight enough to catch a heavy SDK creeping back in.
+BUDGETS_MS = {
+    "video_lecture_agent": 650,
+    "yt_recommend_agent": 650,
+    "dialogue_agent": 650,
+    "gateway": 800,
+}
+
+# Loaded on first use (see common/warmup.py); never at import
+LAZY_MODULES = ("google.genai", "edge_tts", "youtubesearchpython", "aiohttp", "httpx")
+
+
+def _profile(target: str) -> list[tuple[int, str]]:
+    """(self time in microseconds, module) per module imported by ``target``."""
+    if target == "gateway":
+        cwd, statement = MICROSERVICES_DIR, "import gateway"
+    else:
+        cwd, statement = os.path.join(MICROSERVICES_DIR, target), "import main"
+    env = {**os.environ, "GEMINI_API_KEY": "fake-key", "LLM_CACHE_BACKEND": "off", "WARMUP": "off"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), name.strip()))
+    return rows
+
+
+def report(target: str, runs: int, top: int) -> dict:
+    # Fastest of several runs: the rest is disk cache and scheduler noise
+    profiles = [_profile(target) for _ in range(runs)]
+    rows = min(profiles, key=lambda p: sum(self_us for self_us, _ in p))
+
+    by_package: dict[str, int] = defaultdict(int)
+    for self_us, name in rows:
+        by_package[name.split(".")[0]] += self_us
+    total_ms = sum(self_us for self_us, _ in rows) / 1000
+    imported = {name for _, name in rows}
+    eager = [m for m in LAZY_MODULES if m in imported]
+
+    budget = BUDGETS_MS.get(target)
+    return {
+        "total_ms": round(total_ms, 1),
+        "budget_ms": budget,
+        "over_budget": budget is not None and total_ms > budget,
+        "eager_lazy_modules": eager,
+        "modules": len(rows),
+        "top_packages": [
+            {"package": package, "ms": round(us / 1000, 1)}
+            for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:top]
+        ],
+    }
+
+
+def main(args: argparse.Namespace) -> int:
+    results = {target: report(target, args.runs, args.top) for target in args.services}
+
+    failed = False
+    for target, r in results.items():
+        verdict = "over budget" if r["over_budget"] else "ok"
+        if r["eager_lazy_modules"]:
+            verdict = f"imports {', '.join(r['eager_lazy_modules'])} at startup"
+        failed = failed or verdict != "ok"
+        print(f"\n{target}: {r['total_ms']:.0f} ms of imports, budget {r['budget_ms']} ms, {r['modules']} modules: {verdict}")
+        for row in r["top_packages"]:
+            print(f"  {row['package']:<28} {row['ms']:>8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--services", nargs="+", choices=BUDGETS_MS, default=list(BUDGETS_MS))
+    parser.add_argument("--runs", type=int, default=3, help="imports per service (fastest kept)")
+    parser.add_argument("--top", type=int, default=10, help="packages listed per service")
+    parser.add_argument("--json", help="also write the report to this file")
+    sys.exit(main(parser.parse_args()))
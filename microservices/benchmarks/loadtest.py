@@ -0,0 +1,308 @@
+"""
+Offline load test for the microservices.
+
+Starts each service in its own process against the fake backends in
+``benchmarks.fakes`` (Gemini, edge-tts, YouTube search, Wikimedia), drives a
+weighted mix of realistic requests at a fixed concurrency, and reports
+p50/p95/p99 latency, time to first byte and throughput per endpoint plus
+the peak RSS of every service process.
+
+    python -m benchmarks.loadtest --concurrency 20 --duration 15
+    python -m benchmarks.loadtest --services dialogue_agent --llm-latency 2 --dist lognormal
+
+Results can be saved with ``--json`` and compared against a saved run with
+``--baseline``; the exit status is 1 when any endpoint's p95 latency or
+throughput regresses by more than ``--tolerance``.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import httpx
+
+from benchmarks.fake_server import SERVICES, add_backend_args, backend_argv
+from benchmarks.fakes import FAKE_TOPICS, MICROSERVICES_DIR
+
+REQUEST_TIMEOUT = 120.0
+STARTUP_TIMEOUT = 30.0
+
+
+# ---------------------------------------------------------------------------
+# Request mixes
+# ---------------------------------------------------------------------------
+
+_FILLER = (
+    "The lecture explains how {topic} works with a worked example. "
+    "Students often confuse {topic} with related ideas, so the text compares them. "
+    "A short derivation shows why {topic} holds under the stated assumptions. "
+    "Exercises at the end apply {topic} to everyday situations. "
+)
+
+_QUESTIONS = [
+    "Can you explain {topic} more simply?",
+    "Why does {topic} matter here?",
+    "What is the difference between {topic} and the previous section?",
+    "Could you give another example of {topic}?",
+]
+
+
+def lecture_text(seed: int, chars: int) -> str:
+    """Deterministic pseudo-lecture text, so ``seed`` identifies a page."""
+    rng = random.Random(seed)
+    parts = []
+    while sum(len(p) for p in parts) < chars:
+        parts.append(_FILLER.format(topic=rng.choice(FAKE_TOPICS)))
+        if rng.random() < 0.3:
+            parts.append("\n\n")
+    return "".join(parts)[:chars]
+
+
+@dataclass
+class Scenario:
+    name: str
+    weight: float
+    path: str
+    body: Callable[[random.Random, int], dict]
+
+
+def _page(rng: random.Random, distinct: int, chars: int) -> str:
+    return lecture_text(rng.randrange(distinct), chars)
+
+
+def _doubt(rng: random.Random, distinct: int) -> dict:
+    return {
+        "query": rng.choice(_QUESTIONS).format(topic=rng.choice(FAKE_TOPICS)),
+        "context": _page(rng, distinct, 12000),
+    }
+
+
+MIXES: dict[str, list[Scenario]] = {
+    "video_lecture_agent": [
+        Scenario("summarize", 0.60, "/summarize_pages", lambda r, d: {"text": _page(r, d, 1500)}),
+        Scenario("summarize stream", 0.10, "/summarize_pages?stream=true", lambda r, d: {"text": _page(r, d, 1500)}),
+        Scenario("doubt", 0.25, "/doubt_clear", _doubt),
+        Scenario("doubt stream", 0.05, "/doubt_clear?stream=true", _doubt),
+    ],
+    "yt_recommend_agent": [
+        Scenario("extract_topics", 1.0, "/extract_topics", lambda r, d: {"text": _page(r, d, 6000)}),
+    ],
+    "dialogue_agent": [
+        Scenario("dialogue", 0.60, "/generate-dialogue", lambda r, d: {"text": _page(r, d, 4000)}),
+        Scenario("audio", 0.25, "/generate-audio", lambda r, d: {"text": _page(r, d, 4000)}),
+        Scenario("audio stream", 0.15, "/generate-audio?stream=true", lambda r, d: {"text": _page(r, d, 4000)}),
+    ],
+}
+
+
+# ---------------------------------------------------------------------------
+# Service processes
+# ---------------------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """High-water mark of the process's resident set (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+async def _wait_ready(client: httpx.AsyncClient, proc: subprocess.Popen) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"service exited during startup (status {proc.returncode})")
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"service not ready after {STARTUP_TIMEOUT:g}s")
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _request(client: httpx.AsyncClient, scenario: Scenario, body: dict, samples: dict) -> None:
+    start = time.perf_counter()
+    ttfb = None
+    try:
+        async with client.stream("POST", scenario.path, json=body) as response:
+            async for _ in response.aiter_raw():
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+            ok = response.status_code < 400
+    except httpx.HTTPError:
+        ok = False
+    elapsed = time.perf_counter() - start
+
+    entry = samples.setdefault(scenario.name, {"latency": [], "ttfb": [], "errors": 0})
+    if ok:
+        entry["latency"].append(elapsed)
+        entry["ttfb"].append(ttfb if ttfb is not None else elapsed)
+    else:
+        entry["errors"] += 1
+
+
+async def drive(base_url: str, mix: list[Scenario], concurrency: int, duration: float, distinct: int, seed: int) -> tuple[dict, float]:
+    """Closed-loop load: ``concurrency`` clients each send back-to-back requests."""
+    samples: dict[str, dict] = {}
+    weights = [s.weight for s in mix]
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=REQUEST_TIMEOUT, limits=limits) as client:
+        async def worker(n: int) -> None:
+            rng = random.Random(seed * 1000 + n)
+            while time.monotonic() < deadline:
+                scenario = rng.choices(mix, weights)[0]
+                await _request(client, scenario, scenario.body(rng, distinct), samples)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return samples, elapsed
+
+
+def summarize(samples: dict, elapsed: float) -> dict:
+    endpoints = {}
+    for name, entry in sorted(samples.items()):
+        latency = entry["latency"]
+        row = {"ok": len(latency), "errors": entry["errors"], "rps": round(len(latency) / elapsed, 2)}
+        if latency:
+            row.update({
+                "p50_ms": round(_percentile(latency, 0.50) * 1000, 1),
+                "p95_ms": round(_percentile(latency, 0.95) * 1000, 1),
+                "p99_ms": round(_percentile(latency, 0.99) * 1000, 1),
+                "ttfb_p50_ms": round(_percentile(entry["ttfb"], 0.50) * 1000, 1),
+            })
+        endpoints[name] = row
+    return endpoints
+
+
+async def run_service(service: str, args: argparse.Namespace) -> dict:
+    port = _free_port()
+    cmd = [sys.executable, "-m", "benchmarks.fake_server", service, "--port", str(port), *backend_argv(args)]
+    # Services print per-request logs; keep them out of the report
+    log = subprocess.DEVNULL if not args.verbose else None
+    proc = subprocess.Popen(cmd, cwd=MICROSERVICES_DIR, stdout=log, stderr=log)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=5.0) as client:
+            await _wait_ready(client, proc)
+        samples, elapsed = await drive(
+            base_url, MIXES[service], args.concurrency, args.duration, args.distinct, args.seed
+        )
+        endpoints = summarize(samples, elapsed)
+        return {
+            "endpoints": endpoints,
+            "rps": round(sum(e["ok"] for e in endpoints.values()) / elapsed, 2),
+            "peak_rss_mb": peak_rss_mb(proc.pid),
+        }
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def print_report(results: dict) -> None:
+    header = f"  {'endpoint':<18} {'ok':>6} {'err':>5} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ttfb p50':>9}"
+    for service, result in results.items():
+        rss = result["peak_rss_mb"]
+        rss_text = f"{rss:.0f} MB" if rss is not None else "n/a"
+        print(f"\n{service}: {result['rps']} req/s, peak RSS {rss_text}")
+        print(header)
+        for name, row in result["endpoints"].items():
+            print(
+                f"  {name:<18} {row['ok']:>6} {row['errors']:>5} {row['rps']:>7.2f}"
+                f" {row.get('p50_ms', 0):>9.0f} {row.get('p95_ms', 0):>9.0f}"
+                f" {row.get('p99_ms', 0):>9.0f} {row.get('ttfb_p50_ms', 0):>9.0f}"
+            )
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Endpoints whose p95 rose or throughput fell by more than ``tolerance``."""
+    regressions = []
+    for service, result in results.items():
+        for name, row in result["endpoints"].items():
+            old = baseline.get(service, {}).get("endpoints", {}).get(name)
+            if not old or "p95_ms" not in old or "p95_ms" not in row:
+                continue
+            if row["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{service} {name}: p95 {old['p95_ms']:.0f} -> {row['p95_ms']:.0f} ms")
+            if row["rps"] < old["rps"] * (1 - tolerance):
+                regressions.append(f"{service} {name}: throughput {old['rps']:.2f} -> {row['rps']:.2f} req/s")
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    print(
+        f"concurrency {args.concurrency}, {args.duration:g}s per service, {args.distinct} distinct pages, "
+        f"LLM {args.llm_latency:g}s ({args.dist}, jitter {args.jitter:g}), error rate {args.error_rate:g}"
+    )
+    results = {}
+    for service in args.services:
+        results[service] = await run_service(service, args)
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--services", nargs="+", choices=SERVICES, default=list(SERVICES))
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per service")
+    parser.add_argument("--distinct", type=int, default=50, help="distinct pages in the request pool")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against results saved with --json")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--verbose", action="store_true", help="show service output")
+    add_backend_args(parser)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,11 @@
+"""
+Code shared by the microservices.
+
+Importing the package loads ``.env`` (searched from the working directory
+upwards) once per process, before any shared or service module reads its
+configuration from the environment.
+"""
+
+from dotenv import find_dotenv, load_dotenv
+
+load_dotenv(find_dotenv(usecwd=True))
@@ -0,0 +1,330 @@
+"""
+Deadline- and priority-aware admission control for the HTTP services.
+
+Every controlled endpoint has a ``Policy``: a priority class, a limit on
+how many of its requests run at once, and a default deadline. On top of the
+per-endpoint limits the process serves at most ADMISSION_MAX_CONCURRENCY
+requests at once; when a slot frees up, the waiting request with the best
+priority class that its endpoint limit allows goes first, so interactive
+questions overtake queued podcast renders.
+
+A request carries a deadline: ``X-Deadline-Ms`` (milliseconds from now) if
+the client sends one, never later than its endpoint's default, otherwise
+that default. A request that
+cannot start early enough to finish in time, given the queue ahead of it
+and the endpoint's recent service time, is rejected at once with 503; one
+that arrives to a full endpoint queue gets 429. Both carry ``Retry-After``.
+Requests still queued when their latest start time passes are shed with
+503 as well.
+
+The priority of the request being served is also available to the code it
+calls through ``current_priority``; the Gemini gateway uses it to keep some
+quota back from batch work.
+
+Configuration (environment):
+    ADMISSION                   "on" (default) or "off"
+    ADMISSION_MAX_CONCURRENCY   requests served at once per process (default 64)
+    ADMISSION_MAX_QUEUE         requests queued per endpoint before 429 (default 100)
+"""
+
+import asyncio
+import contextvars
+import itertools
+import json
+import math
+import os
+import re
+import time
+from bisect import insort
+from typing import Optional
+
+from common import stats, tracing
+
+ADMISSION = os.getenv("ADMISSION", "on").lower() != "off"
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "64"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "100"))
+
+INTERACTIVE, STANDARD, BATCH = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", STANDARD: "standard", BATCH: "batch"}
+
+DEADLINE_HEADER = b"x-deadline-ms"
+
+# Weight of the newest sample in an endpoint's service-time average
+EWMA_ALPHA = 0.2
+
+current_priority: contextvars.ContextVar[int] = contextvars.ContextVar("current_priority", default=STANDARD)
+
+
+class Policy:
+    def __init__(self, priority: int, limit: int, deadline: float, expected: float = 1.0):
+        """
+        ``deadline`` is the default time budget in seconds and ``expected``
+        the service time assumed until real requests have been measured.
+        """
+        self.priority = priority
+        self.limit = max(1, limit)
+        self.deadline = deadline
+        self.expected = expected
+
+
+class Rejected(Exception):
+    def __init__(self, status: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Endpoint:
+    def __init__(self, name: str, policy: Policy):
+        self.name = name
+        self.policy = policy
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "deadline": 0, "expired": 0}
+        self.service_time = policy.expected
+
+    def observe(self, seconds: float) -> None:
+        self.service_time += EWMA_ALPHA * (seconds - self.service_time)
+
+
+class _Waiter:
+    def __init__(self, endpoint: _Endpoint, future: asyncio.Future):
+        self.endpoint = endpoint
+        self.future = future
+
+
+class AdmissionController:
+    def __init__(self, capacity: int = ADMISSION_MAX_CONCURRENCY, max_queue: int = ADMISSION_MAX_QUEUE):
+        self.capacity = max(1, capacity)
+        self.max_queue = max_queue
+        self.active = 0
+        self._endpoints: dict[str, _Endpoint] = {}
+        self._routes: list[tuple[str, re.Pattern, _Endpoint]] = []
+        # (priority, arrival) -> waiter, kept sorted
+        self._waiting: list[tuple[tuple[int, int], _Waiter]] = []
+        self._seq = itertools.count()
+
+    def add_policies(self, policies: dict[str, Policy]) -> None:
+        """``policies`` maps "METHOD /path/{param}" to the endpoint's policy."""
+        for route, policy in policies.items():
+            if route in self._endpoints:
+                continue
+            method, template = route.split(" ", 1)
+            pattern = re.compile("^" + re.sub(r"\{[^/]+\}", "[^/]+", template) + "$")
+            endpoint = self._endpoints[route] = _Endpoint(route, policy)
+            self._routes.append((method, pattern, endpoint))
+
+    def match(self, method: str, path: str) -> Optional[_Endpoint]:
+        for route_method, pattern, endpoint in self._routes:
+            if route_method == method and pattern.match(path):
+                return endpoint
+        return None
+
+    # -- admission ----------------------------------------------------------
+
+    def _can_start(self, endpoint: _Endpoint) -> bool:
+        return self.active < self.capacity and endpoint.active < endpoint.policy.limit
+
+    def _estimated_wait(self, endpoint: _Endpoint) -> float:
+        """
+        Rough queueing delay for a request that cannot start now: half a
+        typical running request, plus the work queued ahead of it spread
+        over the process's slots or its own endpoint's backlog spread over
+        the endpoint's limit, whichever is longer.
+        """
+        running = [e.service_time for e in self._endpoints.values() if e.active]
+        residual = 0.5 * sum(running) / len(running) if running else 0.0
+        priority = endpoint.policy.priority
+        ahead = sum(w.endpoint.service_time for (p, _), w in self._waiting if p <= priority)
+        own = endpoint.queued * endpoint.service_time / endpoint.policy.limit
+        return residual + max(ahead / self.capacity, own)
+
+    def _start(self, endpoint: _Endpoint) -> None:
+        self.active += 1
+        endpoint.active += 1
+        endpoint.admitted += 1
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters, best priority first, skipping endpoints at their limit."""
+        for entry in list(self._waiting):
+            if self.active >= self.capacity:
+                break
+            waiter = entry[1]
+            if waiter.future.done() or not self._can_start(waiter.endpoint):
+                continue
+            self._waiting.remove(entry)
+            waiter.endpoint.queued -= 1
+            self._start(waiter.endpoint)
+            waiter.future.set_result(None)
+
+    async def acquire(self, endpoint: _Endpoint, deadline: float) -> None:
+        """Wait for a slot, or raise ``Rejected`` if the deadline cannot be met."""
+        # Latest moment the request can start and still finish in time
+        latest_start = deadline - endpoint.service_time
+        now = time.monotonic()
+
+        # Waiters are dispatched whenever a slot frees, so anyone still
+        # queued is blocked: a request that fits now cannot jump a peer
+        if self._can_start(endpoint) and now <= latest_start:
+            self._start(endpoint)
+            return
+
+        wait = 0.0 if self._can_start(endpoint) else self._estimated_wait(endpoint)
+        retry_after = max(1.0, wait)
+        if endpoint.queued >= self.max_queue:
+            endpoint.shed["queue_full"] += 1
+            raise Rejected(429, f"{endpoint.name} has {endpoint.queued} requests queued", retry_after)
+
+        if now + wait > latest_start:
+            endpoint.shed["deadline"] += 1
+            raise Rejected(
+                503,
+                f"cannot finish before the deadline (wait {wait:.1f}s + service {endpoint.service_time:.1f}s)",
+                retry_after,
+            )
+
+        waiter = _Waiter(endpoint, asyncio.get_running_loop().create_future())
+        entry = ((endpoint.policy.priority, next(self._seq)), waiter)
+        insort(self._waiting, entry, key=lambda e: e[0])
+        endpoint.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=latest_start - now)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done():
+                # Admitted just as we gave up: hand the slot back
+                self.release(endpoint, None)
+            else:
+                waiter.future.cancel()
+                self._waiting.remove(entry)
+                endpoint.queued -= 1
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            endpoint.shed["expired"] += 1
+            raise Rejected(503, "deadline passed while queued", max(1.0, self._estimated_wait(endpoint)))
+
+    def release(self, endpoint: _Endpoint, seconds: Optional[float]) -> None:
+        self.active -= 1
+        endpoint.active -= 1
+        if seconds is not None:
+            endpoint.observe(seconds)
+        self._dispatch()
+
+    # -- reporting ----------------------------------------------------------
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "queued": len(self._waiting),
+            "endpoints": {
+                name: {
+                    "priority": PRIORITY_NAMES[e.policy.priority],
+                    "limit": e.policy.limit,
+                    "active": e.active,
+                    "queued": e.queued,
+                    "admitted": e.admitted,
+                    "shed": dict(e.shed),
+                    "service_time_s": round(e.service_time, 3),
+                }
+                for name, e in sorted(self._endpoints.items())
+            },
+        }
+
+    def metric_lines(self) -> list[str]:
+        lines = [
+            "# HELP admission_queue_depth Requests waiting for admission.",
+            "# TYPE admission_queue_depth gauge",
+        ]
+        for name, e in sorted(self._endpoints.items()):
+            lines.append(f'admission_queue_depth{{endpoint="{name}",priority="{PRIORITY_NAMES[e.policy.priority]}"}} {e.queued}')
+        lines += ["# HELP admission_in_flight Admitted requests being served.", "# TYPE admission_in_flight gauge"]
+        for name, e in sorted(self._endpoints.items()):
+            lines.append(f'admission_in_flight{{endpoint="{name}"}} {e.active}')
+        lines += ["# HELP admission_shed_total Requests rejected by admission control.", "# TYPE admission_shed_total counter"]
+        for name, e in sorted(self._endpoints.items()):
+            for reason, count in sorted(e.shed.items()):
+                lines.append(f'admission_shed_total{{endpoint="{name}",reason="{reason}"}} {count}')
+        return lines
+
+
+_controller = AdmissionController()
+stats.register("admission", _controller.stats)
+tracing.register_metrics(_controller.metric_lines)
+
+
+def get_controller() -> AdmissionController:
+    return _controller
+
+
+def _deadline(scope, endpoint: _Endpoint) -> float:
+    """
+    Absolute deadline from ``X-Deadline-Ms``, capped at the endpoint's own;
+    a missing, malformed, non-finite or non-positive header gets the default.
+    """
+    seconds = endpoint.policy.deadline
+    for name, value in scope.get("headers", ()):
+        if name == DEADLINE_HEADER:
+            try:
+                requested = float(value) / 1000
+            except ValueError:
+                break
+            if math.isfinite(requested) and requested > 0:
+                seconds = min(requested, seconds)
+            break
+    return time.monotonic() + seconds
+
+
+async def _reject(send, rejected: Rejected) -> None:
+    body = json.dumps({"detail": rejected.reason}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": rejected.status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(math.ceil(rejected.retry_after)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying ``policies`` (see ``AdmissionController.add_policies``);
+    routes without a policy pass straight through. The slot is held until the
+    last body byte is sent, so streamed responses count in full.
+
+    Add it before ``CORSMiddleware``: Starlette wraps later middleware around
+    earlier ones, so it then runs inside CORS and its 429/503 rejections still
+    carry CORS headers for the browser.
+    """
+
+    def __init__(self, app, policies: dict[str, Policy], controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or _controller
+        self.controller.add_policies(policies)
+
+    async def __call__(self, scope, receive, send):
+        endpoint = self.controller.match(scope["method"], tracing.route_path(scope)) if scope["type"] == "http" else None
+        if endpoint is None or not ADMISSION:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(endpoint, _deadline(scope, endpoint))
+        except Rejected as rejected:
+            await _reject(send, rejected)
+            return
+
+        token = current_priority.set(endpoint.policy.priority)
+        start = time.monotonic()
+        seconds = None
+        try:
+            await self.app(scope, receive, send)
+            seconds = time.monotonic() - start
+        finally:
+            current_priority.reset(token)
+            # Failed requests say little about service time
+            self.controller.release(endpoint, seconds)
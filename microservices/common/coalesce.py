@@ -0,0 +1,54 @@
+"""
+Request coalescing for the HTTP endpoints.
+
+When many clients post the same payload at once (a class opening the same
+page), only the first request does the work; identical requests arriving
+while it is still running await the same result. Keys are built from the
+endpoint name and the whitespace-normalized payload fields, so the LLM
+cache and this layer agree on what "the same request" means.
+
+Waiters are shielded: a client disconnecting does not cancel the shared
+work for everyone else. Once every waiting client has gone, though, the
+work itself is cancelled rather than left running for nobody.
+"""
+
+from typing import Awaitable, Callable, TypeVar
+
+from common import stats
+from common.llm_cache import make_key
+from common.singleflight import SingleFlight
+
+T = TypeVar("T")
+
+_flights: dict[str, SingleFlight] = {}
+
+
+def request_key(endpoint: str, *fields: str) -> str:
+    return make_key(endpoint, "request", *fields)
+
+
+async def coalesce(endpoint: str, fields: tuple[str, ...], fn: Callable[[], Awaitable[T]]) -> T:
+    """Run ``fn`` once per distinct ``(endpoint, fields)`` currently in flight."""
+    flight = _flights.get(endpoint)
+    if flight is None:
+        flight = _flights[endpoint] = SingleFlight(cancel_orphans=True)
+    return await flight.do(request_key(endpoint, *fields), fn)
+
+
+def coalesce_stats() -> dict:
+    per_endpoint = {}
+    for endpoint, flight in sorted(_flights.items()):
+        counts = flight.stats()
+        requests = counts["calls"] + counts["shared"]
+        per_endpoint[endpoint] = {
+            "requests": requests,
+            "executed": counts["calls"],
+            "collapsed": counts["shared"],
+            "collapse_rate": round(counts["shared"] / requests, 4) if requests else 0.0,
+            "cancelled": counts["cancelled"],
+            "in_flight": counts["in_flight"],
+        }
+    return per_endpoint
+
+
+stats.register("coalesce", coalesce_stats)
@@ -0,0 +1,52 @@
+"""
+Cancel request handlers whose client has gone away.
+
+uvicorn keeps running a non-streaming handler after its client disconnects,
+so a user who closes the tab still costs the full Gemini call. ``run_or_cancel``
+races the handler's work against the ``http.disconnect`` message and cancels
+the work as soon as it arrives. (Streaming responses need no help: Starlette
+already cancels the body iterator on disconnect.)
+"""
+
+import asyncio
+from typing import Awaitable, TypeVar, Union
+
+from fastapi import Request, Response
+
+from common import stats
+
+T = TypeVar("T")
+
+# Non-standard status used by nginx for "client closed request"; nobody is
+# left to read it, but it shows up in access logs and traces.
+CLIENT_CLOSED_REQUEST = 499
+
+_counts = {"cancelled": 0}
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    # The body has already been read, so the next message is the disconnect
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def run_or_cancel(request: Request, work: Awaitable[T]) -> Union[T, Response]:
+    """Await ``work``; if the client disconnects first, cancel it and return a 499."""
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+
+    if task.done():
+        return task.result()
+
+    _counts["cancelled"] += 1
+    print(f"{request.url.path}: client disconnected, request cancelled")
+    return Response(status_code=CLIENT_CLOSED_REQUEST)
+
+
+stats.register("disconnects", lambda: dict(_counts))
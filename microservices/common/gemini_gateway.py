@@ -0,0 +1,411 @@
+"""
+Shared Gemini client gateway.
+
+Holds one ``genai.Client`` per API key (``GEMINI_API_KEY`` may list several,
+comma-separated) and routes every call to the least-loaded healthy key:
+
+- each key has a token bucket sized to its requests-per-minute quota, so
+  bursts queue locally instead of turning into 429s;
+- a 429 puts the key in exponential cool-down and the call is retried on
+  another key;
+- a 5xx is retried after an exponential back-off, a timed-out attempt at
+  once; streamed calls follow the same policy until their first chunk;
+- optionally, a call still running past the observed p95 latency gets a
+  hedged duplicate on a second key that has quota to spare; whichever
+  answers first wins and the other is cancelled.
+
+Configuration (environment):
+    GEMINI_API_KEY          one or more keys, comma-separated
+    GEMINI_RPM_PER_KEY      requests per minute allowed per key (default 60)
+    GEMINI_MAX_RETRIES      retries after 429/5xx (default 3)
+    GEMINI_HEDGE            "on" (default) or "off"
+    GEMINI_HEDGE_MIN_DELAY  never hedge earlier than this many seconds (default 2)
+    GEMINI_CALL_TIMEOUT     seconds one attempt may take, or a stream may go
+                            without a chunk, before it is retried (default 60)
+    GEMINI_BATCH_RESERVE    share of each key's burst that batch-priority
+                            requests leave for interactive ones (default 0.2)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Optional
+
+from common import stats, tracing, warmup
+from common.admission import BATCH, current_priority
+
+GEMINI_RPM_PER_KEY = float(os.getenv("GEMINI_RPM_PER_KEY", "60"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+GEMINI_HEDGE = os.getenv("GEMINI_HEDGE", "on").lower() != "off"
+GEMINI_HEDGE_MIN_DELAY = float(os.getenv("GEMINI_HEDGE_MIN_DELAY", "2"))
+GEMINI_CALL_TIMEOUT = float(os.getenv("GEMINI_CALL_TIMEOUT", "60"))
+GEMINI_BATCH_RESERVE = float(os.getenv("GEMINI_BATCH_RESERVE", "0.2"))
+
+# Latency samples needed per model before hedging kicks in
+HEDGE_MIN_SAMPLES = 20
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+
+def _default_client_factory(api_key: str):
+    from google import genai
+
+    return genai.Client(api_key=api_key)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return _status_code(error) == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    code = _status_code(error)
+    return is_rate_limited(error) or (code is not None and code >= 500)
+
+
+# ---------------------------------------------------------------------------
+# Per-key state
+# ---------------------------------------------------------------------------
+
+class TokenBucket:
+    """Classic token bucket; ``rate`` tokens per second up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def try_acquire(self, reserve: float = 0.0) -> bool:
+        """Take a token if more than ``reserve`` tokens would be left."""
+        self._refill()
+        if self.tokens >= 1 + reserve:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self, reserve: float = 0.0) -> None:
+        while not self.try_acquire(reserve):
+            await asyncio.sleep(max(self.wait_time(), (1 + reserve - self.tokens) / self.rate))
+
+
+class KeySlot:
+    def __init__(self, api_key: str, client: Any, rpm: float):
+        self.api_key = api_key
+        self.client = client
+        # Allow a burst of up to 10% of the minute's quota
+        self.bucket = TokenBucket(rate=rpm / 60.0, capacity=max(1.0, rpm / 10.0))
+        self.in_flight = 0
+        self.calls = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.cooldown_until = 0.0
+        self._backoff = BASE_BACKOFF
+
+    @property
+    def label(self) -> str:
+        return f"...{self.api_key[-4:]}"
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def load(self) -> tuple:
+        return (self.in_flight, self.bucket.wait_time())
+
+    def penalize(self) -> float:
+        """Enter cool-down after a 429; repeated 429s back off exponentially."""
+        delay = self._backoff
+        self.cooldown_until = time.monotonic() + delay
+        self._backoff = min(self._backoff * 2, MAX_BACKOFF)
+        self.rate_limited += 1
+        return delay
+
+    def recovered(self) -> None:
+        self._backoff = BASE_BACKOFF
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "rate_limited": self.rate_limited,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "cooldown_s": round(max(0.0, self.cooldown_until - time.monotonic()), 2),
+            "tokens": round(self.bucket.tokens, 2),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Gateway
+# ---------------------------------------------------------------------------
+
+class GeminiGateway:
+    def __init__(
+        self,
+        api_keys: list[str],
+        client_factory: Callable[[str], Any] = _default_client_factory,
+        rpm_per_key: float = GEMINI_RPM_PER_KEY,
+        max_retries: int = GEMINI_MAX_RETRIES,
+        hedge: bool = GEMINI_HEDGE,
+        hedge_min_delay: float = GEMINI_HEDGE_MIN_DELAY,
+        call_timeout: float = GEMINI_CALL_TIMEOUT,
+    ):
+        if not api_keys:
+            raise RuntimeError("No valid API keys found in GEMINI_API_KEY.")
+        self.slots = [KeySlot(key, client_factory(key), rpm_per_key) for key in api_keys]
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.call_timeout = call_timeout
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._latencies: dict[str, deque] = {}
+
+    # -- key selection ------------------------------------------------------
+
+    def _pick(self, exclude: tuple = ()) -> KeySlot:
+        now = time.monotonic()
+        candidates = [s for s in self.slots if s not in exclude] or self.slots
+        healthy = [s for s in candidates if s.healthy(now)]
+        if healthy:
+            return min(healthy, key=KeySlot.load)
+        # Everything is cooling down: take the key that recovers first
+        return min(candidates, key=lambda s: s.cooldown_until)
+
+    def _hedge_deadline(self, model: str) -> Optional[float]:
+        samples = self._latencies.get(model)
+        if not self.hedge or len(self.slots) < 2 or not samples or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        p95 = ordered[int(0.95 * (len(ordered) - 1))]
+        return max(p95, self.hedge_min_delay)
+
+    def _record_latency(self, model: str, seconds: float) -> None:
+        self._latencies.setdefault(model, deque(maxlen=200)).append(seconds)
+
+    # -- calls --------------------------------------------------------------
+
+    async def _wait_for_slot(self, slot: KeySlot) -> None:
+        delay = slot.cooldown_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # Batch work (podcasts, prefetch) leaves part of the burst to
+        # interactive requests, so a render cannot drain a key's quota
+        reserve = 0.0
+        if current_priority.get() == BATCH:
+            reserve = min(slot.bucket.capacity * GEMINI_BATCH_RESERVE, slot.bucket.capacity - 1)
+        await slot.bucket.acquire(reserve)
+
+    async def _on_failure(self, slot: KeySlot, error: Exception, attempt: int) -> None:
+        """
+        Retry policy shared by plain and streamed calls. Re-raises ``error``
+        when it is not retryable or ``attempt`` was the last one; otherwise
+        a timed-out call is retried straight away on another key, a rate
+        limited key is cooled down, and a server error backs off
+        exponentially first.
+        """
+        retryable = is_retryable(error)
+        backoff = False
+        if isinstance(error, asyncio.TimeoutError):
+            slot.timeouts += 1
+            print(f"Gemini key {slot.label} timed out after {self.call_timeout:g}s")
+        elif is_rate_limited(error):
+            delay = slot.penalize()
+            print(f"Gemini key {slot.label} rate limited, cooling down {delay:.0f}s")
+        else:
+            slot.errors += 1
+            backoff = retryable
+
+        if not retryable or attempt == self.max_retries:
+            raise error
+        if backoff:
+            await asyncio.sleep(min(BASE_BACKOFF * 2 ** attempt, MAX_BACKOFF))
+
+    async def _call(self, model: str, contents: Any, config: Any, used: list, exclude: tuple = ()) -> Any:
+        """One logical call with retries; ``used`` collects the keys tried."""
+        for attempt in range(self.max_retries + 1):
+            # Retries avoid the key that just failed
+            slot = self._pick((exclude + tuple(used[-1:])) if attempt else exclude)
+            used.append(slot)
+
+            # Counted as in flight while queued so concurrent picks spread out
+            slot.in_flight += 1
+            try:
+                await self._wait_for_slot(slot)
+                slot.calls += 1
+                start = time.monotonic()
+                response = await asyncio.wait_for(
+                    slot.client.aio.models.generate_content(model=model, contents=contents, config=config),
+                    timeout=self.call_timeout,
+                )
+            except Exception as e:
+                await self._on_failure(slot, e, attempt)
+                continue
+            finally:
+                slot.in_flight -= 1
+
+            slot.recovered()
+            self._record_latency(model, time.monotonic() - start)
+            return response
+
+    async def generate_content(self, *, model: str, contents: Any, config: Any = None) -> Any:
+        """Async ``generate_content`` on the best available key, hedged if slow."""
+        with tracing.span("llm.generate", model=model, prompt_chars=len(str(contents))) as span:
+            response = await self._generate_hedged(model, contents, config)
+            span.set(response_chars=len(getattr(response, "text", None) or ""))
+            return response
+
+    async def _generate_hedged(self, model: str, contents: Any, config: Any) -> Any:
+        used: list[KeySlot] = []
+        primary = asyncio.ensure_future(self._call(model, contents, config, used))
+        pending = {primary}
+        try:
+            deadline = self._hedge_deadline(model)
+            done, _ = await asyncio.wait(pending, timeout=deadline)
+            if done:
+                return primary.result()
+
+            # Only hedge onto a key that has quota to spare right now
+            now = time.monotonic()
+            spare = [
+                s for s in self.slots
+                if s not in used and s.healthy(now) and s.bucket.wait_time() == 0
+            ]
+            if spare:
+                self.hedges += 1
+                hedge = asyncio.ensure_future(self._call(model, contents, config, [], exclude=tuple(used)))
+                pending.add(hedge)
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+            # Every attempt failed: report the primary's error
+            return primary.result()
+        finally:
+            # Cancel the loser, or everything if our caller was cancelled
+            for task in pending:
+                task.cancel()
+
+    async def generate_content_stream(self, *, model: str, contents: Any, config: Any = None) -> AsyncIterator[Any]:
+        """
+        Streamed generation. Rate-limit retries only happen before the first
+        chunk; once output is flowing a failure is raised to the caller. A
+        stream that produces nothing for ``call_timeout`` seconds is abandoned.
+        """
+        with tracing.span("llm.stream", model=model, prompt_chars=len(str(contents))) as span:
+            start = time.perf_counter()
+            response_chars = 0
+            async with aclosing(self._stream_with_retries(model, contents, config)) as chunks:
+                async for chunk in chunks:
+                    if "ttft_ms" not in span.attrs:
+                        span.set(ttft_ms=round((time.perf_counter() - start) * 1000, 2))
+                    response_chars += len(getattr(chunk, "text", None) or "")
+                    span.set(response_chars=response_chars)
+                    yield chunk
+
+    async def _stream_with_retries(self, model: str, contents: Any, config: Any) -> AsyncIterator[Any]:
+        used: list[KeySlot] = []
+        for attempt in range(self.max_retries + 1):
+            slot = self._pick(tuple(used[-1:]))
+            used.append(slot)
+
+            slot.in_flight += 1
+            try:
+                try:
+                    await self._wait_for_slot(slot)
+                    slot.calls += 1
+                    stream = await asyncio.wait_for(
+                        slot.client.aio.models.generate_content_stream(
+                            model=model, contents=contents, config=config
+                        ),
+                        timeout=self.call_timeout,
+                    )
+                    iterator = stream.__aiter__()
+                    first = await asyncio.wait_for(iterator.__anext__(), timeout=self.call_timeout)
+                except StopAsyncIteration:
+                    return
+                except Exception as e:
+                    await self._on_failure(slot, e, attempt)
+                    continue
+
+                slot.recovered()
+                yield first
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(iterator.__anext__(), timeout=self.call_timeout)
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.TimeoutError:
+                        slot.timeouts += 1
+                        raise
+                    yield chunk
+            finally:
+                slot.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "keys": {slot.label: slot.stats() for slot in self.slots},
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_deadline_s": {
+                model: self._hedge_deadline(model) for model in self._latencies
+            },
+        }
+
+
+# ---------------------------------------------------------------------------
+# Process-wide instance
+# ---------------------------------------------------------------------------
+
+_gateway: Optional[GeminiGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> GeminiGateway:
+    """Return the shared gateway, creating the per-key clients on first use."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            api_keys_str = os.getenv("GEMINI_API_KEY", "")
+            if not api_keys_str:
+                raise RuntimeError(
+                    "GEMINI_API_KEY environment variable is not set. "
+                    "Please set it before starting the service."
+                )
+            _gateway = GeminiGateway([k.strip() for k in api_keys_str.split(",") if k.strip()])
+        return _gateway
+
+
+def set_gateway(gateway: Optional[GeminiGateway]) -> None:
+    """Replace the shared gateway (benchmarks, alternative backends)."""
+    global _gateway
+    with _gateway_lock:
+        _gateway = gateway
+
+
+stats.register("gemini", lambda: _gateway.stats() if _gateway is not None else {"keys": {}})
+# Imports google-genai and builds the per-key clients
+warmup.register("gemini", get_gateway)
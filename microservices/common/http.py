@@ -0,0 +1,56 @@
+"""
+Process-wide pooled ``httpx.AsyncClient``.
+
+Reusing one client keeps TCP/TLS connections alive between requests instead
+of paying a fresh handshake per call. A client is bound to the event loop it
+was created on, so a new one is made if the loop changes (tests, scripts
+calling ``asyncio.run`` more than once). httpx itself is imported with the
+first client (or by the warm-up hook), not at startup.
+"""
+
+import asyncio
+import os
+from typing import TYPE_CHECKING, Optional
+
+from common import warmup
+
+if TYPE_CHECKING:
+    import httpx
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+
+_client: Optional["httpx.AsyncClient"] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _import_httpx():
+    import httpx
+
+    return httpx
+
+
+def get_http_client() -> "httpx.AsyncClient":
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        httpx = _import_httpx()
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            ),
+            timeout=httpx.Timeout(10.0),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+warmup.register("httpx", _import_httpx)
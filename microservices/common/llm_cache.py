@@ -0,0 +1,347 @@
+"""
+Content-addressed cache for LLM responses.
+
+Entries are keyed by ``hash(model, prompt template, normalized input)`` and
+looked up in two tiers: a small in-process LRU and a SQLite file on disk
+that is shared by every service running on the same host. The disk tier
+is bounded by total size and by entry age.
+
+Async code uses ``aget``/``aset`` (and the ``_json`` variants): memory hits
+are answered inline and disk reads and writes run in a worker thread, so a
+slow disk or another process holding the SQLite write lock (the precompute
+CLI, say) never stalls the event loop.
+
+Configuration (environment):
+    LLM_CACHE_BACKEND       "sqlite" (default), "memory" or "off"
+    LLM_CACHE_PATH          SQLite file, defaults to <tmp>/llm_cache.sqlite3
+    LLM_CACHE_TTL           entry lifetime in seconds (default 7 days)
+    LLM_CACHE_MAX_BYTES     disk tier size budget (default 256 MB)
+    LLM_CACHE_MEMORY_ITEMS  in-process LRU capacity (default 512)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from common import stats, warmup
+
+
+def normalize_input(text: str) -> str:
+    """Collapse whitespace so cosmetic differences share an entry."""
+    return " ".join(text.split())
+
+
+def make_key(model: str, template: str, *inputs: str) -> str:
+    """
+    Build a cache key. ``template`` is the prompt template text (or an
+    explicit version tag), so editing a prompt invalidates old entries.
+    """
+    h = hashlib.sha256()
+    for part in (model, template, *map(normalize_input, inputs)):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Tiers
+# ---------------------------------------------------------------------------
+
+class MemoryTier:
+    """Thread-safe LRU of recently used entries."""
+
+    def __init__(self, max_items: int, ttl: float):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            created, value = item
+            if time.time() - created > self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, created: Optional[float] = None) -> None:
+        with self._lock:
+            self._items[key] = (created or time.time(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class SQLiteTier:
+    """
+    On-disk tier with TTL expiry and least-recently-used size eviction.
+
+    Hits refresh an entry's ``accessed`` time at most every
+    ACCESS_UPDATE_INTERVAL, so most reads do not write. Writes keep a
+    running byte total; expiry and a resync of that total with the file,
+    which other processes write too, run at most every MAINTENANCE_INTERVAL
+    or when the total goes over budget; eviction then goes down to
+    EVICT_TO of the budget so the next few writes need none.
+    """
+
+    ACCESS_UPDATE_INTERVAL = 60.0
+    MAINTENANCE_INTERVAL = 60.0
+    EVICT_TO = 0.9
+    # Seconds to wait for another writer before giving up on a statement
+    BUSY_TIMEOUT = 1.0
+
+    def __init__(self, path: str, max_bytes: int, ttl: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=self.BUSY_TIMEOUT, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_created ON entries(created)")
+        self._bytes = 0
+        self._maintained = 0.0
+        with self._lock:
+            self._maintain(time.time())
+
+    def get(self, key: str) -> Optional[tuple[float, str]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created, accessed FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created, accessed = row
+            if now - created > self.ttl:
+                # Left for the next maintenance pass; no write on the read path
+                return None
+            if now - accessed > self.ACCESS_UPDATE_INTERVAL:
+                self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            return created, value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._bytes += size - (old[0] if old else 0)
+            if self._bytes > self.max_bytes or now - self._maintained > self.MAINTENANCE_INTERVAL:
+                self._maintain(now)
+
+    def _maintain(self, now: float) -> None:
+        """Drop expired entries, resync the byte total, then evict down to budget."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._expire_and_evict(now)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._maintained = now
+
+    def _expire_and_evict(self, now: float) -> None:
+        expired = self._conn.execute(
+            "DELETE FROM entries WHERE created < ?", (now - self.ttl,)
+        ).rowcount
+        self.evictions += max(expired, 0)
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if self._bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * self.EVICT_TO
+        while self._bytes > target:
+            batch = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed LIMIT 64"
+            ).fetchall()
+            if not batch:
+                break
+            for key, size in batch:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.evictions += 1
+                self._bytes -= size
+                if self._bytes <= target:
+                    break
+
+    def usage(self) -> dict:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {"entries": count, "bytes": self._bytes, "evictions": self.evictions}
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+class LLMCache:
+    def __init__(self, memory: Optional[MemoryTier], disk: Optional[SQLiteTier] = None):
+        self.memory = memory
+        self.disk = disk
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory is not None
+
+    def get(self, key: str) -> Optional[str]:
+        if self.memory is None:
+            return None
+
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        return self._get_disk(key)
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        found = None
+        if self.disk is not None:
+            try:
+                found = self.disk.get(key)
+            except sqlite3.Error as e:
+                self.disk_errors += 1
+                print(f"LLM cache: disk read failed ({e}), treating as a miss")
+
+        if found is None:
+            self.misses += 1
+            return None
+        created, value = found
+        self.memory.set(key, value, created)
+        self.hits += 1
+        self.disk_hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        if self.memory is None:
+            return
+        self.memory.set(key, value)
+        self._set_disk(key, value)
+
+    def _set_disk(self, key: str, value: str) -> None:
+        if self.disk is None:
+            return
+        try:
+            self.disk.set(key, value)
+        except sqlite3.Error as e:
+            # The memory tier still has it; the disk copy is best effort
+            self.disk_errors += 1
+            print(f"LLM cache: disk write failed ({e})")
+
+    async def aget(self, key: str) -> Optional[str]:
+        """``get`` for async code: the disk tier is read in a worker thread."""
+        if self.memory is None:
+            return None
+
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self.disk is None:
+            return self._get_disk(key)
+        return await asyncio.to_thread(self._get_disk, key)
+
+    async def aset(self, key: str, value: str) -> None:
+        """``set`` for async code: the disk tier is written in a worker thread."""
+        if self.memory is None:
+            return
+        self.memory.set(key, value)
+        if self.disk is not None:
+            await asyncio.to_thread(self._set_disk, key, value)
+
+    def get_json(self, key: str) -> Any:
+        value = self.get(key)
+        return None if value is None else json.loads(value)
+
+    def set_json(self, key: str, value: Any) -> None:
+        self.set(key, json.dumps(value))
+
+    async def aget_json(self, key: str) -> Any:
+        value = await self.aget(key)
+        return None if value is None else json.loads(value)
+
+    async def aset_json(self, key: str, value: Any) -> None:
+        await self.aset(key, json.dumps(value))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        snapshot = {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "disk_errors": self.disk_errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory) if self.memory is not None else 0,
+        }
+        if self.disk is not None:
+            snapshot["disk"] = self.disk.usage()
+        return snapshot
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Return the process-wide cache, creating it from the environment on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = _build_from_env()
+        return _cache
+
+
+def _build_from_env() -> LLMCache:
+    backend = os.getenv("LLM_CACHE_BACKEND", "sqlite").lower()
+    if backend == "off":
+        return LLMCache(memory=None)
+
+    ttl = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+    memory = MemoryTier(int(os.getenv("LLM_CACHE_MEMORY_ITEMS", "512")), ttl)
+    if backend == "memory":
+        return LLMCache(memory)
+
+    path = os.getenv("LLM_CACHE_PATH", os.path.join(tempfile.gettempdir(), "llm_cache.sqlite3"))
+    max_bytes = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    try:
+        disk = SQLiteTier(path, max_bytes, ttl)
+    except sqlite3.Error as e:
+        print(f"LLM cache: disk tier unavailable ({e}), using memory only")
+        disk = None
+    return LLMCache(memory, disk)
+
+
+stats.register("llm_cache", lambda: get_llm_cache().stats())
+warmup.register("llm_cache", get_llm_cache)
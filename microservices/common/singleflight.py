@@ -0,0 +1,66 @@
+"""
+Coalesce concurrent calls that would do the same work.
+
+The first caller for a key runs the coroutine; callers arriving while it is
+still running await the same result instead of starting their own.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    ``cancel_orphans=True`` cancels the shared coroutine once every caller
+    waiting on it has been cancelled (e.g. all their clients disconnected);
+    by default the work keeps running so it can still fill a cache.
+    """
+
+    def __init__(self, cancel_orphans: bool = False):
+        self.cancel_orphans = cancel_orphans
+        self.calls = 0      # coroutines actually run
+        self.shared = 0     # callers that joined an in-flight call
+        self.cancelled = 0  # coroutines cancelled because nobody was waiting
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._waiters: dict[asyncio.Future, int] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+            self.calls += 1
+        else:
+            self.shared += 1
+
+        # shield() keeps one caller's cancellation from failing the others
+        self._waiters[future] = self._waiters.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._release(future)
+
+    def _release(self, future: asyncio.Future) -> None:
+        left = self._waiters.pop(future) - 1
+        if left:
+            self._waiters[future] = left
+        elif self.cancel_orphans and not future.done():
+            future.cancel()
+            self.cancelled += 1
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            future.exception()  # mark retrieved so failures don't warn twice
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "cancelled": self.cancelled,
+            "in_flight": len(self._inflight),
+        }
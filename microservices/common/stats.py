@@ -0,0 +1,24 @@
+"""
+Process-wide registry of stats providers.
+
+Modules that keep counters (caches, pools, ...) register a callable here and
+every service exposes the collected snapshot from ``GET /stats``.
+"""
+
+from typing import Callable
+
+_providers: dict[str, Callable[[], dict]] = {}
+
+
+def register(name: str, provider: Callable[[], dict]) -> None:
+    _providers[name] = provider
+
+
+def collect() -> dict:
+    snapshot = {}
+    for name, provider in sorted(_providers.items()):
+        try:
+            snapshot[name] = provider()
+        except Exception as e:
+            snapshot[name] = {"error": str(e)}
+    return snapshot
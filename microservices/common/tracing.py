@@ -0,0 +1,317 @@
+"""
+Per-request stage timing.
+
+Code wraps each stage of interest in ``span(stage, **attrs)``. Every span
+feeds a latency histogram for its stage, and spans opened while a request
+is being served are also collected into that request's trace:
+
+    with tracing.span("tts.turn", index=i, text_chars=len(text)) as s:
+        audio = await synthesize(text)
+        s.set(audio_bytes=len(audio))
+
+Numeric attributes ending in ``_chars`` or ``_bytes`` are also summed per
+stage (prompt and response sizes, audio produced, ...). ``render_metrics``
+returns the histograms plus process resource usage in the Prometheus text
+format for ``GET /metrics``.
+
+Configuration (environment):
+    TRACE_SINK  append one JSON line per finished request trace to this file
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import resource
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from common import stats
+
+TRACE_SINK = os.getenv("TRACE_SINK", "")
+
+# Upper bounds in seconds; stages range from sub-millisecond parsing to
+# multi-minute podcast generations.
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_SIZE_SUFFIXES = ("_chars", "_bytes")
+
+
+# ---------------------------------------------------------------------------
+# Aggregation
+# ---------------------------------------------------------------------------
+
+class Histogram:
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self.sizes: dict[str, float] = {}
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+_histograms: dict[str, Histogram] = {}
+_lock = threading.Lock()
+
+
+def _record(stage: str, seconds: float, attrs: dict, failed: bool) -> None:
+    with _lock:
+        hist = _histograms.get(stage)
+        if hist is None:
+            hist = _histograms[stage] = Histogram()
+        hist.observe(seconds)
+        if failed:
+            hist.errors += 1
+        for name, value in attrs.items():
+            if name.endswith(_SIZE_SUFFIXES) and isinstance(value, (int, float)):
+                hist.sizes[name] = hist.sizes.get(name, 0) + value
+
+
+# ---------------------------------------------------------------------------
+# Spans and traces
+# ---------------------------------------------------------------------------
+
+class Trace:
+    def __init__(self, method: str, path: str):
+        self.request_id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.start = time.perf_counter()
+        self.spans: list[dict] = []
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+
+
+class Span:
+    def __init__(self, stage: str, attrs: dict):
+        self.stage = stage
+        self.attrs = attrs
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+@contextmanager
+def span(stage: str, **attrs: Any) -> Iterator[Span]:
+    """Time a stage; works in sync and async code alike."""
+    current = Span(stage, attrs)
+    trace = _current.get()
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield current
+    except BaseException as e:
+        failed = not isinstance(e, (GeneratorExit, asyncio.CancelledError))
+        current.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        # The stage may have been renamed while it ran
+        _record(current.stage, elapsed, current.attrs, failed)
+        if trace is not None:
+            trace.spans.append({
+                "stage": current.stage,
+                "start_ms": round((start - trace.start) * 1000, 2),
+                "duration_ms": round(elapsed * 1000, 2),
+                **current.attrs,
+            })
+
+
+_sink_lock = threading.Lock()
+
+
+def _write_trace(trace: Trace, status: int, elapsed: float) -> None:
+    line = json.dumps({
+        "request_id": trace.request_id,
+        "method": trace.method,
+        "path": trace.path,
+        "status": status,
+        "duration_ms": round(elapsed * 1000, 2),
+        "spans": trace.spans,
+    }, default=str)
+    with _sink_lock:
+        with open(TRACE_SINK, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def route_path(scope) -> str:
+    """Request path relative to the app handling it (apps may be mounted under a prefix)."""
+    path, root = scope["path"], scope.get("root_path", "")
+    if root and path.startswith(root + "/"):
+        return path[len(root):]
+    return path
+
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _route_template(scope, prefix: str) -> str:
+    """The matched route's template ("/podcast-jobs/{job_id}"), so ids do not become series."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return prefix + path if path is not None else UNMATCHED_ROUTE
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a trace per HTTP request. Records an ``http``
+    stage per route template (until the last body byte, so streamed
+    responses are timed in full; requests no route matched share one
+    stage) and ``http.send`` for the time spent writing the body.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or route_path(scope) in ("/metrics", "/stats"):
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(scope["method"], scope["path"])
+        # Mount prefix of this app, if any, to qualify its route templates
+        root, app_root = scope.get("root_path", ""), scope.get("app_root_path", "")
+        prefix = root[len(app_root):] if root.startswith(app_root) else root
+        token = _current.set(trace)
+        status = 500
+        send_start: Optional[float] = None
+
+        async def send_wrapper(message):
+            nonlocal status, send_start
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                send_start = time.perf_counter()
+            await send(message)
+
+        try:
+            with span(f"http {trace.method} {UNMATCHED_ROUTE}") as s:
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    # The router has filled in the matched route by now
+                    s.stage = f"http {trace.method} {_route_template(scope, prefix)}"
+                    s.set(status=status)
+                    if send_start is not None:
+                        send_time = time.perf_counter() - send_start
+                        _record("http.send", send_time, {}, False)
+                        s.set(ttfb_ms=round((send_start - trace.start) * 1000, 2))
+        finally:
+            _current.reset(token)
+            if TRACE_SINK:
+                try:
+                    _write_trace(trace, status, time.perf_counter() - trace.start)
+                except OSError as e:
+                    print(f"Trace sink write failed: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Exposition
+# ---------------------------------------------------------------------------
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _open_fds() -> Optional[int]:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def _resource_lines() -> list[str]:
+    times = os.times()
+    # ru_maxrss is KiB on Linux
+    gauges = {
+        "process_cpu_seconds_total": times.user + times.system,
+        "process_resident_memory_bytes": _rss_bytes(),
+        "process_max_resident_memory_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "process_open_fds": _open_fds(),
+        "process_threads": threading.active_count(),
+    }
+    try:
+        gauges["asyncio_tasks"] = len(asyncio.all_tasks())
+    except RuntimeError:
+        pass
+    return [f"{name} {value}" for name, value in gauges.items() if value is not None]
+
+
+_extra_metrics: list = []
+
+
+def register_metrics(fn) -> None:
+    """Add a provider of extra exposition lines (other modules' gauges and counters)."""
+    _extra_metrics.append(fn)
+
+
+def render_metrics() -> str:
+    lines = [
+        "# HELP stage_duration_seconds Time spent in each request stage.",
+        "# TYPE stage_duration_seconds histogram",
+    ]
+    errors = ["# HELP stage_errors_total Stages that raised.", "# TYPE stage_errors_total counter"]
+    sizes = ["# HELP stage_size_total Characters or bytes handled per stage.", "# TYPE stage_size_total counter"]
+
+    with _lock:
+        for stage, hist in sorted(_histograms.items()):
+            label = _label(stage)
+            cumulative = 0
+            for bound, n in zip(hist.buckets, hist.counts):
+                cumulative += n
+                lines.append(f'stage_duration_seconds_bucket{{stage="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'stage_duration_seconds_bucket{{stage="{label}",le="+Inf"}} {hist.count}')
+            lines.append(f'stage_duration_seconds_sum{{stage="{label}"}} {hist.sum:.6f}')
+            lines.append(f'stage_duration_seconds_count{{stage="{label}"}} {hist.count}')
+            errors.append(f'stage_errors_total{{stage="{label}"}} {hist.errors}')
+            for name, total in sorted(hist.sizes.items()):
+                sizes.append(f'stage_size_total{{stage="{label}",field="{name}"}} {total:g}')
+
+    extra = [line for fn in _extra_metrics for line in fn()]
+    return "\n".join(lines + errors + sizes + _resource_lines() + extra) + "\n"
+
+
+def stage_stats() -> dict:
+    with _lock:
+        return {
+            stage: {
+                "count": hist.count,
+                "errors": hist.errors,
+                "mean_ms": round(hist.sum / hist.count * 1000, 1) if hist.count else None,
+                "p95_le_s": hist.quantile(0.95),
+            }
+            for stage, hist in sorted(_histograms.items())
+        }
+
+
+stats.register("stages", stage_stats)
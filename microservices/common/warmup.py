@@ -0,0 +1,99 @@
+"""
+Lazy SDKs and startup warm-up.
+
+The heavy SDKs (google-genai, edge-tts, youtube-search-python) are imported
+on first use rather than when a service module loads, so a cold process
+starts serving quickly. Modules that defer such work register a warm-up
+hook that does it ahead of the first request, and every app runs them from
+its lifespan:
+
+    app = FastAPI(lifespan=warmup.lifespan)
+
+Each hook runs at most once per process (the gateway starts several apps in
+one). Timings are in ``/stats`` ("startup") and ``/metrics``.
+
+``benchmarks/import_budget.py`` reports what each service still imports at
+startup and checks it against a per-service budget.
+
+Configuration (environment):
+    WARMUP   "background" (default): run hooks in a thread once the app is
+             up, so the health check passes at once; "blocking": finish them
+             before accepting requests; "off": first requests pay instead
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Optional
+
+from common import stats, tracing
+
+WARMUP = os.getenv("WARMUP", "background").lower()
+
+_hooks: dict[str, Callable[[], object]] = {}
+_results: dict[str, dict] = {}
+_startup_cpu: Optional[float] = None
+_task: Optional[asyncio.Task] = None
+
+
+def register(name: str, hook: Callable[[], object]) -> None:
+    """``hook`` is called without arguments in a worker thread; exceptions are logged."""
+    _hooks[name] = hook
+
+
+def run_hooks() -> None:
+    for name, hook in list(_hooks.items()):
+        if name in _results:
+            continue
+        _results[name] = {"status": "running"}
+        start = time.perf_counter()
+        try:
+            hook()
+            status = "ok"
+        except Exception as e:
+            print(f"Warm-up of {name} failed: {e!r}")
+            status = "failed"
+        _results[name] = {"status": status, "seconds": round(time.perf_counter() - start, 3)}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global _startup_cpu, _task
+    if _startup_cpu is None:
+        # CPU spent on imports and app setup before the first lifespan
+        _startup_cpu = time.process_time()
+
+    if WARMUP == "blocking":
+        await asyncio.to_thread(run_hooks)
+    elif WARMUP != "off" and (_task is None or _task.done()):
+        _task = asyncio.create_task(asyncio.to_thread(run_hooks))
+    yield
+
+
+def startup_stats() -> dict:
+    return {
+        "mode": WARMUP,
+        "startup_cpu_s": round(_startup_cpu, 3) if _startup_cpu is not None else None,
+        "warm": all(_results.get(name, {}).get("status") == "ok" for name in _hooks),
+        "hooks": {name: _results.get(name, {"status": "pending"}) for name in sorted(_hooks)},
+    }
+
+
+def metric_lines() -> list[str]:
+    lines = []
+    if _startup_cpu is not None:
+        lines += [
+            "# HELP startup_cpu_seconds CPU time spent before the app started serving.",
+            "# TYPE startup_cpu_seconds gauge",
+            f"startup_cpu_seconds {_startup_cpu:.3f}",
+        ]
+    lines += ["# HELP warmup_hook_seconds Time each warm-up hook took.", "# TYPE warmup_hook_seconds gauge"]
+    for name, result in sorted(_results.items()):
+        if "seconds" in result:
+            lines.append(f'warmup_hook_seconds{{hook="{name}",status="{result["status"]}"}} {result["seconds"]}')
+    return lines
+
+
+stats.register("startup", startup_stats)
+tracing.register_metrics(metric_lines)
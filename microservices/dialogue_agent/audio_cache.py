@@ -0,0 +1,157 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from common import stats
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE", "on").lower() != "off"
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "tts_cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+def segment_key(voice: str, text: str, rate: str, pitch: str) -> str:
+    """Cache key for one synthesized turn."""
+    h = hashlib.sha256()
+    for part in (voice, rate, pitch, text):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+class SegmentCache:
+    """
+    Disk store of MP3 segments, one file per key, evicted least-recently-used
+    once the total size exceeds ``max_bytes``.
+
+    The in-memory index is rebuilt from file modification times on start-up,
+    and every hit touches the file so recency survives restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def _load_index(self) -> None:
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".mp3"):
+                continue
+            st = os.stat(os.path.join(self.directory, name))
+            entries.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._total_bytes -= self._index.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if not data or len(data) > self.max_bytes:
+            return
+
+        # Write to a temp file first so readers never see a partial segment
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            # e.g. ENOSPC: the temp file is neither counted nor ever evicted
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self._total_bytes += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            evicted = []
+            while self._total_bytes > self.max_bytes and self._index:
+                old_key, size = self._index.popitem(last=False)
+                self._total_bytes -= size
+                self.evictions += 1
+                evicted.append(old_key)
+
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+_cache: Optional[SegmentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_segment_cache() -> Optional[SegmentCache]:
+    """Return the process-wide segment cache, or None when TTS_CACHE=off."""
+    global _cache
+    if not TTS_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = SegmentCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES)
+        return _cache
+
+
+stats.register(
+    "tts_cache",
+    lambda: get_segment_cache().stats() if TTS_CACHE_ENABLED else {"enabled": False},
+)
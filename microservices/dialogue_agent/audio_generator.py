@@ -1,40 +1,226 @@
 import asyncio
-import edge_tts
+import io
+import os
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Callable, Optional
 from models import DialogueTurn
+from audio_cache import get_segment_cache, segment_key
+from mp3_frames import trim_to_frames
+from common import tracing, warmup
 
 # Voice constants
 VOICE_MALE = "en-US-ChristopherNeural"  # Teacher / Expert 1
 VOICE_FEMALE = "en-US-AriaNeural"       # Student / Expert 2
 
-async def generate_audio_from_dialogue(dialogue: list[DialogueTurn]) -> bytes:
+# Prosody settings; part of the segment cache key
+TTS_RATE = os.getenv("TTS_RATE", "+0%")
+TTS_PITCH = os.getenv("TTS_PITCH", "+0Hz")
+
+# Turns synthesized at once, per-attempt timeout and retries per turn
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "4"))
+TTS_TURN_TIMEOUT = float(os.getenv("TTS_TURN_TIMEOUT", "30"))
+TTS_RETRIES = int(os.getenv("TTS_RETRIES", "2"))
+
+# edge-tts pulls in aiohttp; imported on the first synthesis
+edge_tts = None
+
+
+def _edge_tts():
+    global edge_tts
+    if edge_tts is None:
+        import edge_tts as module
+
+        edge_tts = module
+    return edge_tts
+
+
+warmup.register("edge_tts", _edge_tts)
+
+
+def _voice_for_speaker(speaker_label: str) -> str:
+    # Select voice based on speaker
+    # Default logic: Teacher/Expert 1/Speaker 1 -> Male
+    #                Student/Expert 2/Speaker 2 -> Female
+    if any(x in speaker_label for x in ["1", "First", "Teacher", "Expert 1"]):
+        return VOICE_MALE
+    elif any(x in speaker_label for x in ["2", "Second", "Student", "Expert 2"]):
+        return VOICE_FEMALE
+    else:
+        # Fallback based on turn index or random? For now default to Male
+        return VOICE_MALE
+
+
+async def _synthesize(text: str, voice: str) -> bytes:
+    communicate = _edge_tts().Communicate(text, voice, rate=TTS_RATE, pitch=TTS_PITCH)
+
+    # edge-tts generates MP3 stream by default
+    audio = bytearray()
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            audio.extend(chunk["data"])
+    # Whole frames only, so turns join into one clean MP3 stream
+    return trim_to_frames(bytes(audio))
+
+
+async def _synthesize_turn(
+    index: int,
+    turn: DialogueTurn,
+    semaphore: asyncio.Semaphore,
+    timeout: float,
+    retries: int,
+) -> bytes:
+    if not turn.text.strip():
+        return b""
+
+    voice = _voice_for_speaker(turn.speaker)
+
+    with tracing.span("tts.turn", index=index, text_chars=len(turn.text)) as span:
+        audio = await _synthesize_turn_cached(index, turn.text, voice, semaphore, timeout, retries, span)
+        span.set(audio_bytes=len(audio))
+        return audio
+
+
+async def _synthesize_turn_cached(
+    index: int,
+    text: str,
+    voice: str,
+    semaphore: asyncio.Semaphore,
+    timeout: float,
+    retries: int,
+    span: tracing.Span,
+) -> bytes:
+    # Unchanged turns and recurring phrases are served from disk
+    cache = get_segment_cache()
+    key = segment_key(voice, text, TTS_RATE, TTS_PITCH)
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            span.set(cached=True)
+            return cached
+
+    for attempt in range(retries + 1):
+        try:
+            # One slot per attempt: a turn backing off leaves it to healthy turns
+            async with semaphore:
+                with tracing.span("tts.synthesize", attempt=attempt):
+                    audio = await asyncio.wait_for(_synthesize(text, voice), timeout=timeout)
+            break
+        except Exception as e:
+            if attempt == retries:
+                raise RuntimeError(f"TTS failed for turn {index + 1} after {attempt + 1} attempts: {e!r}") from e
+            print(f"TTS attempt {attempt + 1} for turn {index + 1} failed ({e!r}), retrying...")
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+    if cache is not None:
+        try:
+            await asyncio.to_thread(cache.put, key, audio)
+        except OSError as e:
+            print(f"Could not cache TTS segment: {e}")
+    return audio
+
+
+async def write_audio_from_dialogue(
+    dialogue: list[DialogueTurn],
+    out: BinaryIO,
+    max_concurrency: int = TTS_MAX_CONCURRENCY,
+    timeout: float = TTS_TURN_TIMEOUT,
+    retries: int = TTS_RETRIES,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Synthesize every turn (at most ``max_concurrency`` at a time) and write
+    the MP3 segments to ``out`` in dialogue order. Each segment is written
+    and released as soon as it and all earlier turns are done, so only
+    turns finished out of order are held in memory. ``progress`` is called
+    with ``(turns_done, turns_total)`` as turns finish. Returns the number
+    of bytes written.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    turns_done = 0
+
+    def on_done(task: asyncio.Task) -> None:
+        nonlocal turns_done
+        if not task.cancelled() and task.exception() is None:
+            turns_done += 1
+            if progress:
+                progress(turns_done, len(dialogue))
+
+    tasks = [
+        asyncio.create_task(_synthesize_turn(i, turn, semaphore, timeout, retries))
+        for i, turn in enumerate(dialogue)
+    ]
+    for task in tasks:
+        task.add_done_callback(on_done)
+
+    written = 0
+    try:
+        for task in tasks:
+            audio = await task
+            out.write(audio)
+            written += len(audio)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return written
+
+
+async def generate_audio_from_dialogue(
+    dialogue: list[DialogueTurn],
+    max_concurrency: int = TTS_MAX_CONCURRENCY,
+    timeout: float = TTS_TURN_TIMEOUT,
+    retries: int = TTS_RETRIES,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> bytes:
     """
     Takes a list of DialogueTurns and generates a single audio file (MP3 bytes)
     using edge-tts (Microsoft Edge Online TTS) with multi-speaker configuration.
+
+    Turns are synthesized concurrently (at most ``max_concurrency`` at a time)
+    and concatenated in dialogue order. Prefer ``write_audio_from_dialogue``
+    for long podcasts; this keeps the whole MP3 in memory.
+    """
+    out = io.BytesIO()
+    await write_audio_from_dialogue(dialogue, out, max_concurrency, timeout, retries, progress)
+    return out.getvalue()
+
+
+async def stream_audio_from_dialogue(
+    turns: AsyncIterable[DialogueTurn],
+    max_concurrency: int = TTS_MAX_CONCURRENCY,
+    timeout: float = TTS_TURN_TIMEOUT,
+    retries: int = TTS_RETRIES,
+) -> AsyncIterator[bytes]:
     """
-    
-    combined_audio = bytearray()
-
-    for turn in dialogue:
-        speaker_label = turn.speaker
-        text = turn.text
-        
-        # Select voice based on speaker
-        # Default logic: Teacher/Expert 1/Speaker 1 -> Male
-        #                Student/Expert 2/Speaker 2 -> Female
-        if any(x in speaker_label for x in ["1", "First", "Teacher", "Expert 1"]):
-            voice = VOICE_MALE
-        elif any(x in speaker_label for x in ["2", "Second", "Student", "Expert 2"]):
-            voice = VOICE_FEMALE
-        else:
-            # Fallback based on turn index or random? For now default to Male
-            voice = VOICE_MALE
-
-        communicate = edge_tts.Communicate(text, voice)
-        
-        # Accumulate audio bytes for this turn
-        # edge-tts generates MP3 stream by default
-        async for chunk in communicate.stream():
-            if chunk["type"] == "audio":
-                combined_audio.extend(chunk["data"])
-
-    return bytes(combined_audio)
+    Streaming counterpart of ``generate_audio_from_dialogue``.
+
+    Each turn is handed to TTS as soon as ``turns`` produces it, and its MP3
+    bytes are yielded in dialogue order once it and every earlier turn are
+    done, so playback can start after the first turn.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    pending: asyncio.Queue = asyncio.Queue()
+
+    async def schedule() -> None:
+        try:
+            i = 0
+            async for turn in turns:
+                pending.put_nowait(
+                    asyncio.create_task(_synthesize_turn(i, turn, semaphore, timeout, retries))
+                )
+                i += 1
+        finally:
+            pending.put_nowait(None)
+
+    scheduler = asyncio.create_task(schedule())
+    try:
+        while (task := await pending.get()) is not None:
+            audio = await task
+            if audio:
+                yield audio
+        # Surface errors raised while producing the dialogue itself
+        await scheduler
+    finally:
+        scheduler.cancel()
+        while not pending.empty():
+            task = pending.get_nowait()
+            if task is not None:
+                task.cancel()
@@ -0,0 +1,108 @@
+import os
+import re
+import tempfile
+from typing import Optional
+
+from fastapi.responses import FileResponse, Response
+from starlette.background import BackgroundTask
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+# Podcasts up to this size are assembled in memory; larger ones spill to a
+# temp file in AUDIO_SPOOL_DIR and are served from disk.
+AUDIO_SPOOL_MAX_MEMORY = int(os.getenv("AUDIO_SPOOL_MAX_MEMORY", str(8 * 1024 * 1024)))
+AUDIO_SPOOL_DIR = os.getenv("AUDIO_SPOOL_DIR", tempfile.gettempdir())
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class AudioSpool:
+    """
+    Write-once MP3 buffer: bytes stay in one in-memory buffer until
+    ``max_memory`` is exceeded, then everything moves to a temp file and
+    later writes go straight to disk. Only one copy of the audio exists at
+    any time, and a spilled file is served without reading it into memory.
+    """
+
+    def __init__(self, max_memory: int = AUDIO_SPOOL_MAX_MEMORY, directory: str = AUDIO_SPOOL_DIR):
+        self.max_memory = max_memory
+        self.directory = directory
+        self.size = 0
+        self.path: Optional[str] = None
+        self._buffer: Optional[bytearray] = bytearray()
+        self._file = None
+
+    def write(self, data: bytes) -> None:
+        if self._buffer is not None and len(self._buffer) + len(data) > self.max_memory:
+            self._spill()
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._buffer.extend(data)
+        self.size += len(data)
+
+    def _spill(self) -> None:
+        fd, self.path = tempfile.mkstemp(dir=self.directory, suffix=".mp3")
+        self._file = os.fdopen(fd, "wb")
+        self._file.write(self._buffer)
+        self._buffer = None
+
+    def close(self) -> None:
+        """Release the buffer or delete the temp file."""
+        if self._file is not None:
+            self._file.close()
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        self._buffer = None
+
+    def response(self, range_header: Optional[str], filename: str = "dialogue.mp3") -> Response:
+        """Serve the audio with ``Range`` support; the spool is closed once sent."""
+        disposition = {"Content-Disposition": f"attachment; filename={filename}"}
+        if self._file is not None:
+            self._file.close()
+            # Starlette handles Range/If-Range for files and streams from disk
+            return FileResponse(
+                self.path,
+                media_type="audio/mpeg",
+                headers=disposition,
+                background=BackgroundTask(self.close),
+            )
+        return _memory_response(memoryview(self._buffer), range_header, disposition, BackgroundTask(self.close))
+
+
+def _memory_response(view: memoryview, range_header: Optional[str], headers: dict, background) -> Response:
+    """Single byte-range support for in-memory audio; other ranges get the full body."""
+    size = len(view)
+    headers = {**headers, "Accept-Ranges": "bytes"}
+    match = _RANGE_RE.match(range_header.strip()) if range_header else None
+    if match is None or not any(match.groups()):
+        return Response(content=view, media_type="audio/mpeg", headers=headers, background=background)
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the final N bytes
+        start = max(0, size - int(last))
+        end = size - 1
+    if start >= size or start > end:
+        return Response(
+            status_code=416,
+            headers={**headers, "Content-Range": f"bytes */{size}"},
+            background=background,
+        )
+
+    return Response(
+        content=view[start : end + 1],
+        status_code=206,
+        media_type="audio/mpeg",
+        headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"},
+        background=background,
+    )
@@ -1,21 +1,39 @@
+import hashlib
 import json
 import os
 import re
-from dotenv import load_dotenv
+from typing import AsyncIterator, Callable, Optional
 import asyncio
 
-load_dotenv()
-
-import google.generativeai as genai
-
 from models import DialogueTurn
+from common import stats, tracing
+from common.gemini_gateway import get_gateway
+from common.llm_cache import get_llm_cache, make_key
 
 
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+MODEL_NAME = "gemini-2.5-flash"
+
+# "parallel" generates all chunks concurrently after a short outline pass;
+# "serial" is the original chunk-by-chunk loop. Parallel mode costs more
+# quota: a document of N chunks takes N dialogue calls plus up to N-1
+# outline calls (short, at most OUTLINE_MAX_TOKENS of output each), where
+# serial mode takes N. Single-chunk documents cost the same either way.
+DIALOGUE_MODES = ("parallel", "serial")
+DIALOGUE_MODE = os.getenv("DIALOGUE_MODE", "parallel")
+MAX_CONCURRENCY = int(os.getenv("DIALOGUE_MAX_CONCURRENCY", "4"))
+# Outline calls have their own, smaller budget so they never hold a slot a
+# dialogue chunk could use
+OUTLINE_CONCURRENCY = int(os.getenv("DIALOGUE_OUTLINE_CONCURRENCY", "2"))
+OUTLINE_INPUT_CHARS = 3000
+OUTLINE_MAX_TOKENS = 128
+
+# A chunk may end after a paragraph whose hash is divisible by this once it
+# is at least half full; see _chunk_text.
+CHUNK_BOUNDARY_DIVISOR = 8
 
 SYSTEM_PROMPT = """You are an expert dialogue writer. Your job is to take the provided 
 text and transform it into an engaging, natural-sounding conversation between **two professionals** 
@@ -36,51 +54,149 @@ Output format (strict JSON):
   ...
 ]"""
 
+OUTLINE_PROMPT = """You summarize one part of a longer document so that a dialogue
+writer working on the NEXT part can continue smoothly.
+
+Return 2-3 plain sentences naming the main points covered. No JSON, no lists."""
 
-# ---------------------------------------------------------------------------
-# Generator
-# ---------------------------------------------------------------------------
 
 # ---------------------------------------------------------------------------
 # Generator
 # ---------------------------------------------------------------------------
 
+# Where the dialogue array starts: inside a ```json fence if the model wrote
+# one, otherwise at the first "[" that opens an array of objects (so a
+# preamble like "Here is the dialogue [2 speakers]:" is not mistaken for it)
+_FENCED_ARRAY_START = re.compile(r"```(?:json)?\s*\[", re.IGNORECASE)
+_BARE_ARRAY_START = re.compile(r"\[(?=\s*[{\]])")
+
+
+class IncrementalJSONArrayParser:
+    """
+    Pulls the objects of a JSON array out of text that arrives in pieces.
+
+    Prose before the array is skipped: the array inside a ```json fence is
+    preferred, falling back to the first ``[`` followed by ``{`` or ``]``.
+    Each ``{...}`` element is returned as soon as its closing brace has been
+    fed, so callers can act on dialogue turns while the model is still
+    writing the rest of the array.
+    """
+
+    def __init__(self):
+        self.started = False  # seen the opening "["
+        self.done = False     # seen the matching "]"
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start: Optional[int] = None
+
+    def feed(self, text: str) -> list[dict]:
+        """Consume more text and return any objects completed by it."""
+        if self.done:
+            return []
+
+        self._buf += text
+        items: list[dict] = []
+        buf = self._buf
+
+        if not self.started:
+            start = _FENCED_ARRAY_START.search(buf) or _BARE_ARRAY_START.search(buf)
+            if start is None:
+                return items
+            self._pos = start.end() - 1
+
+        while self._pos < len(buf):
+            ch = buf[self._pos]
+
+            if not self.started:
+                if ch == "[":
+                    self.started = True
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 1 and ch == "{":
+                    self._item_start = self._pos
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1 and ch == "}" and self._item_start is not None:
+                    try:
+                        items.append(json.loads(buf[self._item_start : self._pos + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self._item_start = None
+                elif self._depth == 0:
+                    self.done = True
+                    self._pos += 1
+                    break
+
+            self._pos += 1
+
+        # Drop text that can no longer be part of an unfinished element
+        keep_from = self._item_start if self._item_start is not None else self._pos
+        self._buf = buf[keep_from:]
+        self._pos -= keep_from
+        if self._item_start is not None:
+            self._item_start = 0
+
+        return items
+
+
+class TruncatedDialogue(ValueError):
+    """
+    The model's JSON array was cut off before its closing ``]``. ``turns``
+    holds the elements that arrived whole; callers may use them, but the
+    chunk is not finished and must not be cached.
+    """
+
+    def __init__(self, turns: list[dict]):
+        super().__init__(f"Model response was cut off after {len(turns)} complete turns.")
+        self.turns = turns
+
+
 def _extract_json_array(raw: str) -> list[dict]:
     """
     Best-effort extraction of a JSON array from the LLM response.
-    Handles cases where the model wraps the output in markdown code fences.
+    Handles cases where the model wraps the output in markdown code fences
+    or prose. A truncated array raises ``TruncatedDialogue`` carrying its
+    complete elements.
     """
-    # Try direct parse first
-    raw = raw.strip()
-    try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
-        pass
+    with tracing.span("dialogue.parse_json", response_chars=len(raw)) as span:
+        parser = IncrementalJSONArrayParser()
+        items = parser.feed(raw)
+        if not parser.started or (not items and not parser.done):
+            raise ValueError("Could not parse a valid JSON array from the model response.")
+        span.set(turns=len(items), truncated=not parser.done)
+        if not parser.done:
+            raise TruncatedDialogue(items)
+        return items
 
-    # Strip markdown code fences if present  (```json ... ```)
-    match = re.search(r"```(?:json)?\s*\n?(.*?)\n?```", raw, re.DOTALL)
-    if match:
-        try:
-            return json.loads(match.group(1).strip())
-        except json.JSONDecodeError:
-            pass
-
-    # Last resort: find first [ ... ] block
-    start = raw.find("[")
-    end = raw.rfind("]")
-    if start != -1 and end != -1 and end > start:
-        try:
-            return json.loads(raw[start : end + 1])
-        except json.JSONDecodeError:
-            pass
 
-    raise ValueError("Could not parse a valid JSON array from the model response.")
+def _is_boundary(paragraph: str) -> bool:
+    digest = hashlib.blake2b(paragraph.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "big") % CHUNK_BOUNDARY_DIVISOR == 0
 
 
 def _chunk_text(text: str, chunk_size: int = 10000) -> list[str]:
     """
-    Splits text into chunks of approximately `chunk_size` characters.
-    Tries to split at newlines to keep paragraphs intact.
+    Splits text into chunks of at most about `chunk_size` characters at
+    paragraph (newline) boundaries.
+
+    Boundaries are content-defined: once a chunk is half full it ends after
+    the first paragraph whose hash matches a fixed pattern, and it always
+    ends before it would exceed `chunk_size`. Where a chunk ends depends only
+    on nearby paragraphs, so editing one paragraph leaves every other chunk
+    byte-identical and its cached dialogue reusable.
     """
     if len(text) <= chunk_size:
         return [text]
@@ -88,6 +204,7 @@ def _chunk_text(text: str, chunk_size: int = 10000) -> list[str]:
     chunks = []
     current_chunk = []
     current_length = 0
+    min_length = chunk_size // 2
     
     # Split by paragraphs or newlines
     paragraphs = text.split('\n')
@@ -101,6 +218,11 @@ def _chunk_text(text: str, chunk_size: int = 10000) -> list[str]:
         
         current_chunk.append(para)
         current_length += len(para) + 1
+
+        if current_length >= min_length and para.strip() and _is_boundary(para):
+            chunks.append("\n".join(current_chunk))
+            current_chunk = []
+            current_length = 0
         
     if current_chunk:
         chunks.append("\n".join(current_chunk))
@@ -142,98 +264,405 @@ def _clean_text(text: str) -> str:
     return text.strip()
 
 
-async def generate_dialogue(text: str) -> list[DialogueTurn]:
+def _resolve_mode(mode: Optional[str]) -> str:
+    mode = (mode or DIALOGUE_MODE).lower()
+    if mode not in DIALOGUE_MODES:
+        raise ValueError(f"Unknown dialogue mode {mode!r}; expected one of {DIALOGUE_MODES}.")
+    return mode
+
+
+def _cache_key(text: str, mode: str) -> str:
+    return make_key(MODEL_NAME, SYSTEM_PROMPT, mode, text)
+
+
+def _chunk_key(chunk: str, first: bool) -> str:
     """
-    Send the input text to Google Gemini and return a list of DialogueTurns.
-    Handles long text by chunking, rate limiting, and API key rotation.
+    Per-chunk dialogue entry. Only whether the chunk opens the conversation
+    is part of the key, not its neighbours, so unchanged chunks of an edited
+    document are reused.
     """
-    # Clean up the input text first
-    text = _clean_text(text)
+    return make_key(MODEL_NAME, SYSTEM_PROMPT, "chunk", "first" if first else "next", chunk)
+
+
+def _outline_key(chunk: str) -> str:
+    return make_key(MODEL_NAME, OUTLINE_PROMPT, chunk[:OUTLINE_INPUT_CHARS])
+
+
+_chunk_usage = {"reused": 0, "generated": 0}
+
+stats.register("dialogue_chunks", lambda: dict(_chunk_usage))
+
+
+def _to_turn(turn: dict) -> DialogueTurn:
+    return DialogueTurn(
+        speaker=turn.get("speaker", "Speaker 1"),
+        text=turn.get("text", ""),
+    )
+
+
+async def _call_model(system_instruction: str, prompt: str, max_output_tokens: Optional[int] = None) -> str:
+    config = {"system_instruction": system_instruction}
+    if max_output_tokens is not None:
+        config["max_output_tokens"] = max_output_tokens
+    response = await get_gateway().generate_content(
+        model=MODEL_NAME,
+        contents=prompt,
+        config=config,
+    )
+    return response.text
+
+
+async def _stream_model(system_instruction: str, prompt: str) -> AsyncIterator[str]:
+    stream = get_gateway().generate_content_stream(
+        model=MODEL_NAME,
+        contents=prompt,
+        config={"system_instruction": system_instruction},
+    )
+    async for part in stream:
+        yield part.text or ""
+
+
+def _dialogue_prompt(chunk: str, step_prompt: str) -> str:
+    return (
+        f"{step_prompt}Convert the following text into a podcast dialogue:\n\n"
+        f"---\n{chunk}\n---"
+    )
 
-    api_keys_str = os.getenv("GEMINI_API_KEY", "")
-    if not api_keys_str:
-        raise RuntimeError(
-            "GEMINI_API_KEY environment variable is not set. "
-            "Please set it before starting the service."
+
+def _serial_step_prompt(i: int, total: int, previous_context: str) -> str:
+    step_prompt = ""
+    if total > 1:
+        step_prompt = f"(Part {i+1} of {total}) "
+        if i > 0:
+            step_prompt += (
+                f"Continue the conversation based on the previous context:\n"
+                f"Context: {previous_context[-500:]}...\n\n"
+                f"Do NOT re-introduce the speakers. Jump straight into discussion.\n"
+            )
+    return step_prompt
+
+
+def _parallel_step_prompt(i: int, total: int, outline: Optional[str]) -> str:
+    step_prompt = f"(Part {i+1} of {total}) " if total > 1 else ""
+    if outline is not None:
+        step_prompt += (
+            f"The conversation so far has covered:\n"
+            f"{outline}\n\n"
+            f"Do NOT re-introduce the speakers. Pick up from there and jump straight into discussion.\n"
         )
+    return step_prompt
 
-    # Parse multiple keys (comma-separated)
-    api_keys = [k.strip() for k in api_keys_str.split(",") if k.strip()]
-    if not api_keys:
-         raise RuntimeError("No valid API keys found in GEMINI_API_KEY.")
-    
-    import itertools
-    key_cycle = itertools.cycle(api_keys)
 
-    chunks = _chunk_text(text)
+# Called with (chunks_done, chunks_total) as chunks finish
+ProgressCallback = Optional[Callable[[int, int], None]]
+
+
+async def _generate_serial(chunks: list[str], progress: ProgressCallback = None) -> tuple[list[dict], int]:
+    """
+    Original pipeline: one chunk at a time, each prompt seeded with the
+    last turns of the previous chunk's output.
+    """
+    cache = get_llm_cache()
     full_dialogue_data: list[dict] = []
+    failed_chunks = 0
     previous_context = ""
-    
-    print(f"Processing {len(chunks)} chunks with {len(api_keys)} API keys...")
 
     for i, chunk in enumerate(chunks):
-        # Rotate API Key
-        current_key = next(key_cycle)
-        genai.configure(api_key=current_key)
-        model = genai.GenerativeModel(
-            model_name="gemini-2.5-flash",
-            system_instruction=SYSTEM_PROMPT,
-        )
-
-        if i > 0:
-            # Rate limiting: mostly relying on key rotation, but a small buffer is good
-            # If we have many keys, we might not need to sleep as much.
-            # But to be safe and avoid hitting checking limits too hard:
-            delay = 2.0 / len(api_keys) if len(api_keys) > 0 else 2.0
-            # Cap delay at 0.5s minimum to avoid spamming even with many keys
-            delay = max(delay, 0.5) 
-            
-            print(f"Waiting {delay:.2f}s before processing chunk {i+1} using key ...{current_key[-4:]}...")
-            await asyncio.sleep(delay)
-        else:
-            print(f"Processing chunk {i+1} using key ...{current_key[-4:]}...")
-
-        step_prompt = ""
-        if len(chunks) > 1:
-            step_prompt = f"(Part {i+1} of {len(chunks)}) "
-            if i > 0:
-                step_prompt += (
-                    f"Continue the conversation based on the previous context:\n"
-                    f"Context: {previous_context[-500:]}...\n\n"
-                    f"Do NOT re-introduce the speakers. Jump straight into discussion.\n"
-                )
-        
-        user_prompt = (
-            f"{step_prompt}Convert the following text into a podcast dialogue:\n\n"
-            f"---\n{chunk}\n---"
-        )
+        print(f"Processing chunk {i+1}...")
+        step_prompt = _serial_step_prompt(i, len(chunks), previous_context)
 
         try:
-            response = await model.generate_content_async(user_prompt)
-            turns = _extract_json_array(response.text)
-            
-            # Simple validation to ensure it's a list
-            if isinstance(turns, list):
-                full_dialogue_data.extend(turns)
-                
-                # Update context for next iteration
-                # We take the text of the last few turns
-                last_turns_text = " ".join([t.get("text", "") for t in turns[-2:]])
-                previous_context = last_turns_text
-                
+            turns = await cache.aget_json(_chunk_key(chunk, i == 0))
+            if turns is not None:
+                _chunk_usage["reused"] += 1
+            else:
+                with tracing.span("dialogue.chunk", index=i, chunk_chars=len(chunk)):
+                    raw = await _call_model(SYSTEM_PROMPT, _dialogue_prompt(chunk, step_prompt))
+                    turns = _extract_json_array(raw)
+                await cache.aset_json(_chunk_key(chunk, i == 0), turns)
+                _chunk_usage["generated"] += 1
+            full_dialogue_data.extend(turns)
+
+            # Update context for next iteration
+            # We take the text of the last few turns
+            last_turns_text = " ".join([t.get("text", "") for t in turns[-2:]])
+            previous_context = last_turns_text
+
         except Exception as e:
-            print(f"Error processing chunk {i+1} with key ...{current_key[-4:]}: {e}")
+            print(f"Error processing chunk {i+1}: {e}")
             # Continue to next chunk or raise?
-            pass
+            failed_chunks += 1
+            if isinstance(e, TruncatedDialogue):
+                # Keep what arrived; the chunk stays uncached and is regenerated next time
+                full_dialogue_data.extend(e.turns)
+                previous_context = " ".join([t.get("text", "") for t in e.turns[-2:]])
+
+        if progress:
+            progress(i + 1, len(chunks))
+
+    return full_dialogue_data, failed_chunks
+
+
+async def _outline_chunk(chunk: str, semaphore: asyncio.Semaphore) -> str:
+    """Short hand-off summary of a chunk; falls back to its opening text."""
+    cache = get_llm_cache()
+    cached = await cache.aget(_outline_key(chunk))
+    if cached is not None:
+        return cached
+
+    async with semaphore:
+        try:
+            with tracing.span("dialogue.outline", chunk_chars=len(chunk)):
+                outline = await _call_model(
+                    OUTLINE_PROMPT,
+                    f"---\n{chunk[:OUTLINE_INPUT_CHARS]}\n---",
+                    max_output_tokens=OUTLINE_MAX_TOKENS,
+                )
+            outline = outline.strip()[:500]
+            await cache.aset(_outline_key(chunk), outline)
+            return outline
+        except Exception as e:
+            print(f"Outline pass failed, using chunk excerpt instead: {e}")
+            return chunk[:300]
+
+
+def _start_outlines(chunks: list[str], reused: list[Optional[list[dict]]]) -> dict[int, asyncio.Task]:
+    # A chunk's outline only seeds the next chunk, so it is skipped for the
+    # last chunk and wherever the next chunk's dialogue is reused.
+    semaphore = asyncio.Semaphore(max(1, OUTLINE_CONCURRENCY))
+    return {
+        i: asyncio.create_task(_outline_chunk(chunk, semaphore))
+        for i, chunk in enumerate(chunks[:-1])
+        if reused[i + 1] is None
+    }
+
+
+async def _reused_chunks(chunks: list[str]) -> list[Optional[list[dict]]]:
+    """Stored dialogue for each chunk, or None where it must be generated."""
+    cache = get_llm_cache()
+    return [await cache.aget_json(_chunk_key(chunk, i == 0)) for i, chunk in enumerate(chunks)]
+
+
+async def _generate_parallel(chunks: list[str], progress: ProgressCallback = None) -> tuple[list[dict], int]:
+    """
+    Two-phase pipeline: a cheap outline of every chunk, then all chunks
+    generated concurrently. Each chunk is seeded with the outline of the
+    chunk before it instead of that chunk's finished dialogue, so it only
+    waits for one short outline call rather than the whole prefix.
+    """
+    semaphore = asyncio.Semaphore(max(1, MAX_CONCURRENCY))
+    reused = await _reused_chunks(chunks)
+
+    outline_tasks: dict[int, asyncio.Task] = {}
+    chunks_done = 0
+
+    async def generate_chunk(i: int, chunk: str) -> list[dict]:
+        nonlocal chunks_done
+        try:
+            if reused[i] is not None:
+                _chunk_usage["reused"] += 1
+                return reused[i]
+
+            outline = await outline_tasks[i - 1] if i > 0 else None
+            step_prompt = _parallel_step_prompt(i, len(chunks), outline)
+
+            async with semaphore:
+                print(f"Processing chunk {i+1}...")
+                with tracing.span("dialogue.chunk", index=i, chunk_chars=len(chunk)):
+                    raw = await _call_model(SYSTEM_PROMPT, _dialogue_prompt(chunk, step_prompt))
+
+            turns = _extract_json_array(raw)
+            await get_llm_cache().aset_json(_chunk_key(chunk, i == 0), turns)
+            _chunk_usage["generated"] += 1
+            return turns
+        finally:
+            chunks_done += 1
+            if progress:
+                progress(chunks_done, len(chunks))
+
+    # Chunk tasks are created before the outline tasks so the first chunk,
+    # which needs no outline, starts first.
+    chunk_tasks = [
+        asyncio.create_task(generate_chunk(i, chunk))
+        for i, chunk in enumerate(chunks)
+    ]
+    outline_tasks.update(_start_outlines(chunks, reused))
+
+    # gather() keeps results in chunk order
+    results = await asyncio.gather(*chunk_tasks, return_exceptions=True)
+
+    full_dialogue_data: list[dict] = []
+    failed_chunks = 0
+    for i, result in enumerate(results):
+        if isinstance(result, BaseException):
+            print(f"Error processing chunk {i+1}: {result}")
+            failed_chunks += 1
+            if isinstance(result, TruncatedDialogue):
+                full_dialogue_data.extend(result.turns)
+            continue
+        full_dialogue_data.extend(result)
+
+    return full_dialogue_data, failed_chunks
+
+
+async def generate_dialogue(
+    text: str, mode: Optional[str] = None, progress: ProgressCallback = None
+) -> list[DialogueTurn]:
+    """
+    Send the input text to Google Gemini and return a list of DialogueTurns.
+    Handles long text by chunking; key rotation and rate limiting are done
+    by the shared Gemini gateway.
+
+    ``mode`` is "parallel" (default, see DIALOGUE_MODE) or "serial".
+    ``progress`` is called with ``(chunks_done, chunks_total)``.
+    """
+    # Clean up the input text first
+    with tracing.span("dialogue.clean_text", input_chars=len(text)):
+        text = _clean_text(text)
+    mode = _resolve_mode(mode)
+
+    # Identical documents (after cleaning) reuse the previous dialogue
+    cache = get_llm_cache()
+    cache_key = _cache_key(text, mode)
+    cached = await cache.aget_json(cache_key)
+    if cached is not None:
+        if progress:
+            progress(1, 1)
+        return [DialogueTurn(**turn) for turn in cached]
+
+    # Fail fast when no API key is configured
+    gateway = get_gateway()
+    chunks = _chunk_text(text)
+
+    print(f"Processing {len(chunks)} chunks with {len(gateway.slots)} API keys ({mode} mode)...")
+
+    if mode == "serial":
+        full_dialogue_data, failed_chunks = await _generate_serial(chunks, progress)
+    else:
+        full_dialogue_data, failed_chunks = await _generate_parallel(chunks, progress)
 
     # Validate and convert to DialogueTurn objects
-    dialogue: list[DialogueTurn] = []
-    for turn in full_dialogue_data:
-        dialogue.append(
-            DialogueTurn(
-                speaker=turn.get("speaker", "Speaker 1"),
-                text=turn.get("text", ""),
-            )
-        )
+    dialogue = [_to_turn(turn) for turn in full_dialogue_data]
+
+    # Only cache complete runs; a failed chunk should be retried next time
+    if dialogue and not failed_chunks:
+        await cache.aset_json(cache_key, [turn.model_dump() for turn in dialogue])
 
     return dialogue
+
+
+def is_complete(text: str, mode: Optional[str] = None) -> bool:
+    """True when a full dialogue for ``text`` is cached, i.e. every chunk succeeded."""
+    return get_llm_cache().get(_cache_key(_clean_text(text), _resolve_mode(mode))) is not None
+
+
+# ---------------------------------------------------------------------------
+# Streaming
+# ---------------------------------------------------------------------------
+
+async def _stream_chunk_turns(chunk: str, first: bool, step_prompt: str, queue: asyncio.Queue) -> None:
+    """Stream one chunk from the model, queueing each turn as soon as it parses."""
+    parser = IncrementalJSONArrayParser()
+    turns = []
+    async for piece in _stream_model(SYSTEM_PROMPT, _dialogue_prompt(chunk, step_prompt)):
+        for turn in parser.feed(piece):
+            turns.append(turn)
+            await queue.put(turn)
+    if not parser.started:
+        raise ValueError("Could not parse a valid JSON array from the model response.")
+    if not parser.done:
+        # The turns already went out, but a cut-off chunk is not cached
+        raise TruncatedDialogue(turns)
+    await get_llm_cache().aset_json(_chunk_key(chunk, first), turns)
+    _chunk_usage["generated"] += 1
+
+
+async def stream_dialogue(text: str, mode: Optional[str] = None) -> AsyncIterator[DialogueTurn]:
+    """
+    Streaming counterpart of ``generate_dialogue``: yields turns in order as
+    soon as the model has written them. In parallel mode later chunks are
+    generated in the background while earlier ones are being consumed.
+    """
+    with tracing.span("dialogue.clean_text", input_chars=len(text)):
+        text = _clean_text(text)
+    mode = _resolve_mode(mode)
+
+    cache = get_llm_cache()
+    cache_key = _cache_key(text, mode)
+    cached = await cache.aget_json(cache_key)
+    if cached is not None:
+        for turn in cached:
+            yield DialogueTurn(**turn)
+        return
+
+    gateway = get_gateway()
+    chunks = _chunk_text(text)
+    reused = await _reused_chunks(chunks)
+    semaphore = asyncio.Semaphore(max(1, MAX_CONCURRENCY))
+    outline_tasks: dict[int, asyncio.Task] = {}
+    tasks: list[asyncio.Task] = []
+    emitted: list[DialogueTurn] = []
+    failed_chunks = 0
+
+    print(f"Streaming {len(chunks)} chunks with {len(gateway.slots)} API keys ({mode} mode)...")
+
+    async def produce(queue: asyncio.Queue, i: int, chunk: str, step_prompt=None) -> None:
+        try:
+            if reused[i] is not None:
+                _chunk_usage["reused"] += 1
+                for turn in reused[i]:
+                    await queue.put(turn)
+                return
+            if step_prompt is None:
+                outline = await outline_tasks[i - 1] if i > 0 else None
+                step_prompt = _parallel_step_prompt(i, len(chunks), outline)
+            async with semaphore:
+                await _stream_chunk_turns(chunk, i == 0, step_prompt, queue)
+        finally:
+            await queue.put(None)
+
+    async def drain(i: int, queue: asyncio.Queue, task: asyncio.Task) -> AsyncIterator[DialogueTurn]:
+        nonlocal failed_chunks
+        while (turn := await queue.get()) is not None:
+            yield _to_turn(turn)
+        try:
+            await task
+        except Exception as e:
+            print(f"Error streaming chunk {i+1}: {e}")
+            failed_chunks += 1
+
+    try:
+        if mode == "serial":
+            previous_context = ""
+            for i, chunk in enumerate(chunks):
+                queue: asyncio.Queue = asyncio.Queue()
+                step_prompt = _serial_step_prompt(i, len(chunks), previous_context)
+                task = asyncio.create_task(produce(queue, i, chunk, step_prompt))
+                tasks.append(task)
+                chunk_turns = []
+                async for turn in drain(i, queue, task):
+                    chunk_turns.append(turn)
+                    emitted.append(turn)
+                    yield turn
+                if chunk_turns:
+                    previous_context = " ".join(t.text for t in chunk_turns[-2:])
+        else:
+            # Producers first so chunk 1 starts first
+            queues = [asyncio.Queue() for _ in chunks]
+            producers = [
+                asyncio.create_task(produce(queues[i], i, chunk))
+                for i, chunk in enumerate(chunks)
+            ]
+            outline_tasks.update(_start_outlines(chunks, reused))
+            tasks.extend(producers + list(outline_tasks.values()))
+            for i, (queue, task) in enumerate(zip(queues, producers)):
+                async for turn in drain(i, queue, task):
+                    emitted.append(turn)
+                    yield turn
+    finally:
+        # Client went away or an error escaped: stop any remaining model calls
+        for task in tasks:
+            task.cancel()
+
+    if emitted and not failed_chunks:
+        await cache.aset_json(cache_key, [turn.model_dump() for turn in emitted])
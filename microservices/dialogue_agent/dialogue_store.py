@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Optional
+
+from models import DialogueTurn
+from common import stats
+from common.ttl_cache import TTLCache
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+DIALOGUE_STORE_DIR = os.getenv("DIALOGUE_STORE_DIR", os.path.join(tempfile.gettempdir(), "dialogues"))
+DIALOGUE_STORE_TTL = float(os.getenv("DIALOGUE_STORE_TTL", str(7 * 24 * 3600)))
+
+PRUNE_INTERVAL = 600
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def dialogue_id_for(turns: list[DialogueTurn]) -> str:
+    """Content hash of a dialogue, so the same dialogue always gets the same id."""
+    payload = json.dumps([turn.model_dump() for turn in turns], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+class DialogueStore:
+    """
+    Finished dialogues by id: one JSON file per dialogue, fronted by a small
+    in-memory cache. Lets /generate-audio render a dialogue returned earlier
+    by /generate-dialogue without another LLM pass.
+    """
+
+    def __init__(self, directory: str, ttl: float):
+        self.directory = directory
+        self.ttl = ttl
+        self.saved = 0
+        self.hits = 0
+        self.misses = 0
+        self._memory = TTLCache(maxsize=256, ttl=min(ttl, 3600))
+        self._last_prune = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, dialogue_id: str) -> str:
+        return os.path.join(self.directory, f"{dialogue_id}.json")
+
+    def save(self, turns: list[DialogueTurn]) -> str:
+        dialogue_id = dialogue_id_for(turns)
+        self._memory.set(dialogue_id, turns)
+        path = self._path(dialogue_id)
+        if os.path.exists(path):
+            # Same content already stored: just refresh its age
+            os.utime(path)
+            return dialogue_id
+
+        data = json.dumps([turn.model_dump() for turn in turns], ensure_ascii=False)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.saved += 1
+        self._prune()
+        return dialogue_id
+
+    def _prune(self) -> None:
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.stat(path).st_mtime > self.ttl:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def load(self, dialogue_id: str) -> Optional[list[DialogueTurn]]:
+        if not _ID_RE.match(dialogue_id):
+            self.misses += 1
+            return None
+
+        turns = self._memory.get(dialogue_id)
+        if turns is None:
+            path = self._path(dialogue_id)
+            try:
+                if time.time() - os.stat(path).st_mtime > self.ttl:
+                    os.remove(path)
+                    raise FileNotFoundError(path)
+                with open(path, encoding="utf-8") as f:
+                    turns = [DialogueTurn(**turn) for turn in json.load(f)]
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            self._memory.set(dialogue_id, turns)
+
+        self.hits += 1
+        return turns
+
+    def stats(self) -> dict:
+        return {"saved": self.saved, "hits": self.hits, "misses": self.misses}
+
+
+_store: Optional[DialogueStore] = None
+
+
+def get_dialogue_store() -> DialogueStore:
+    global _store
+    if _store is None:
+        _store = DialogueStore(DIALOGUE_STORE_DIR, DIALOGUE_STORE_TTL)
+    return _store
+
+
+stats.register("dialogue_store", lambda: get_dialogue_store().stats())
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Optional
+
+from models import PodcastJob
+from dialogue_generator import generate_dialogue
+from audio_generator import write_audio_from_dialogue
+from common import stats
+from common.admission import BATCH, current_priority
+from common.llm_cache import make_key
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+PODCAST_JOB_WORKERS = int(os.getenv("PODCAST_JOB_WORKERS", "2"))
+PODCAST_JOB_QUEUE_SIZE = int(os.getenv("PODCAST_JOB_QUEUE_SIZE", "100"))
+PODCAST_JOB_DIR = os.getenv("PODCAST_JOB_DIR", os.path.join(tempfile.gettempdir(), "podcast_jobs"))
+# Finished jobs and their MP3s are kept this long (seconds)
+PODCAST_JOB_TTL = float(os.getenv("PODCAST_JOB_TTL", str(24 * 3600)))
+
+PRUNE_INTERVAL = 600
+_JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+def job_id_for(text: str, mode: Optional[str]) -> str:
+    """Identical text and mode map to the same job."""
+    return make_key("podcast-job", mode or "", text)[:32]
+
+
+# ---------------------------------------------------------------------------
+# Manager
+# ---------------------------------------------------------------------------
+
+class JobManager:
+    """
+    Runs podcast generations (dialogue, then audio) on a bounded pool of
+    background workers. Job state lives in memory while the job is active;
+    finished MP3s and their final state are written to ``directory`` so they
+    can still be downloaded after a restart, until ``ttl`` expires.
+    """
+
+    def __init__(self, directory: str, workers: int, queue_size: int, ttl: float):
+        self.directory = directory
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.ttl = ttl
+        self.submitted = 0
+        self.attached = 0
+        self._jobs: dict[str, PodcastJob] = {}
+        self._inputs: dict[str, tuple[str, Optional[str]]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: list[asyncio.Task] = []
+        self._last_prune = 0.0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def audio_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.mp3")
+
+    def _meta_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    # -- public API ---------------------------------------------------------
+
+    def submit(self, text: str, mode: Optional[str] = None) -> PodcastJob:
+        """Queue a job, or return the existing one for the same input."""
+        self._prune()
+        job_id = job_id_for(text, mode)
+        existing = self.get(job_id)
+        if existing is not None and existing.status != "failed":
+            self.attached += 1
+            return existing
+
+        self._ensure_workers()
+        job = PodcastJob(job_id=job_id, status="queued", created_at=time.time())
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"{self.queue_size} podcast jobs are already queued; try again later.")
+        self._jobs[job_id] = job
+        self._inputs[job_id] = (text, mode)
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[PodcastJob]:
+        if not _JOB_ID_RE.match(job_id):
+            return None
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+
+        # Finished by an earlier process
+        try:
+            with open(self._meta_path(job_id), encoding="utf-8") as f:
+                job = PodcastJob(**json.load(f))
+        except (OSError, ValueError):
+            return None
+        if job.status == "done" and not os.path.exists(self.audio_path(job_id)):
+            return None
+        self._jobs[job_id] = job
+        return job
+
+    # -- workers ------------------------------------------------------------
+
+    def _ensure_workers(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self) -> None:
+        current_priority.set(BATCH)
+        queue = self._queue
+        while True:
+            job_id = await queue.get()
+            try:
+                await self._run(self._jobs[job_id])
+            except Exception as e:
+                print(f"Podcast job {job_id} crashed: {e!r}")
+            finally:
+                queue.task_done()
+
+    async def _run(self, job: PodcastJob) -> None:
+        text, mode = self._inputs.pop(job.job_id)
+        job.status = "running"
+        job.stage = "dialogue"
+
+        def on_chunks(done: int, total: int) -> None:
+            job.chunks_done = done
+            job.chunks_total = total
+
+        def on_turns(done: int, total: int) -> None:
+            job.turns_done = done
+
+        try:
+            turns = await generate_dialogue(text, mode, progress=on_chunks)
+            if not turns:
+                raise RuntimeError("The model returned no dialogue.")
+
+            job.stage = "audio"
+            job.turns_total = len(turns)
+            job.audio_bytes = await self._render_audio(job.job_id, turns, on_turns)
+            job.audio_url = f"/podcast-jobs/{job.job_id}/audio"
+            job.status = "done"
+        except Exception as e:
+            print(f"Podcast job {job.job_id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.stage = None
+            job.finished_at = time.time()
+
+        try:
+            await asyncio.to_thread(self._write_meta, job)
+        except OSError as e:
+            print(f"Could not persist podcast job {job.job_id}: {e}")
+
+    # -- storage ------------------------------------------------------------
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        # Readers never see a partially written file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    async def _render_audio(self, job_id: str, turns, progress) -> int:
+        # Segments go straight to disk; the MP3 is never held in memory whole
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                size = await write_audio_from_dialogue(turns, f, progress=progress)
+            os.replace(tmp_path, self.audio_path(job_id))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return size
+
+    def _write_meta(self, job: PodcastJob) -> None:
+        self._write_atomic(self._meta_path(job.job_id), job.model_dump_json().encode("utf-8"))
+
+    def _prune(self) -> None:
+        """Forget finished jobs and delete artifacts older than the TTL."""
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.ttl:
+                del self._jobs[job_id]
+
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.stat(path).st_mtime > self.ttl:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {
+            **counts,
+            "submitted": self.submitted,
+            "attached": self.attached,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+        }
+
+
+_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    global _manager
+    if _manager is None:
+        _manager = JobManager(
+            PODCAST_JOB_DIR, PODCAST_JOB_WORKERS, PODCAST_JOB_QUEUE_SIZE, PODCAST_JOB_TTL
+        )
+    return _manager
+
+
+stats.register("podcast_jobs", lambda: get_job_manager().stats())
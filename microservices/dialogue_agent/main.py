@@ -1,10 +1,24 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import os
+import sys
+from typing import AsyncIterator, Optional
+
+# The shared ``common`` package lives next to the service directories.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
-from models import DialogueRequest, DialogueResponse
-from dialogue_generator import generate_dialogue
-from audio_generator import generate_audio_from_dialogue
-from fastapi.responses import Response
+from models import AudioRequest, DialogueRequest, DialogueResponse, DialogueTurn, PodcastJob
+from dialogue_generator import _resolve_mode, generate_dialogue, stream_dialogue
+from audio_generator import stream_audio_from_dialogue, write_audio_from_dialogue
+from audio_spool import AudioSpool
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from jobs import JobQueueFull, get_job_manager
+from dialogue_store import get_dialogue_store
+from common import stats, tracing, warmup
+from common.admission import BATCH, AdmissionMiddleware, Policy
+from common.coalesce import coalesce
 
 # ---------------------------------------------------------------------------
 # App
@@ -14,8 +28,16 @@ app = FastAPI(
     title="Professional Dialogue Generator",
     description="Converts raw text into a conversation between two professionals discussing the topic.",
     version="1.0.0",
+    lifespan=warmup.lifespan,
 )
 
+# Podcast generation is batch work: few at a time, generous deadlines.
+app.add_middleware(AdmissionMiddleware, policies={
+    "POST /generate-dialogue": Policy(BATCH, limit=4, deadline=300, expected=60),
+    "POST /generate-audio": Policy(BATCH, limit=4, deadline=600, expected=120),
+    "GET /dialogues/{dialogue_id}/audio": Policy(BATCH, limit=4, deadline=600, expected=60),
+})
+
 # Allow all origins for hackathon ease
 app.add_middleware(
     CORSMiddleware,
@@ -25,6 +47,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(tracing.TracingMiddleware)
+
 
 # ---------------------------------------------------------------------------
 # Routes
@@ -36,6 +60,18 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/stats")
+async def service_stats():
+    """Cache and pool counters for this process."""
+    return stats.collect()
+
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage latency histograms and process resource usage (Prometheus text format)."""
+    return PlainTextResponse(tracing.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/generate-dialogue", response_model=DialogueResponse)
 async def create_dialogue(request: DialogueRequest):
     """
@@ -43,8 +79,7 @@ async def create_dialogue(request: DialogueRequest):
     discussing the content, powered by Google Gemini.
     """
     try:
-        turns = await generate_dialogue(request.text)
-        return DialogueResponse(dialogue=turns)
+        turns = await _coalesced_dialogue(request.text, request.mode)
     except RuntimeError as exc:
         raise HTTPException(status_code=500, detail=str(exc))
     except ValueError as exc:
@@ -57,25 +92,172 @@ async def create_dialogue(request: DialogueRequest):
             status_code=500,
             detail=f"An unexpected error occurred: {exc}",
         )
+
+    # Stored so /generate-audio can render it later by id
+    try:
+        dialogue_id = await asyncio.to_thread(get_dialogue_store().save, turns)
+    except OSError as exc:
+        print(f"Could not store dialogue: {exc}")
+        dialogue_id = None
+    return DialogueResponse(dialogue=turns, dialogue_id=dialogue_id)
+
+
 @app.post("/generate-audio")
-async def generate_audio_endpoint(request: DialogueRequest):
+async def generate_audio_endpoint(
+    request: AudioRequest,
+    stream: bool = False,
+    range_header: Optional[str] = Header(None, alias="Range"),
+):
     """
-    Accepts raw text, generates a dialogue, and then converts it to audio
-    using Gemini 2.5 Pro TTS (preview).
-    Returns a WAV file.
+    Converts a dialogue to audio using edge-tts. Returns an MP3 file.
+
+    The body is either raw ``text`` (a dialogue is generated first) or a
+    finished dialogue: the response of /generate-dialogue as-is, or just
+    its ``dialogue_id``. A finished dialogue is rendered without any LLM call.
+
+    With ``?stream=true`` turns are synthesized as soon as each one is
+    available (for text input, as Gemini writes them) and the MP3 is
+    streamed to the client while later turns are still being produced.
+
+    Without streaming the MP3 is assembled in a memory-bounded spool and
+    served with ``Range`` support.
     """
-    # 1. Generate Dialogue (Reuse existing logic)
-    dialogue_turns = await generate_dialogue(request.text)
+    dialogue_turns = await _provided_dialogue(request)
+
+    if stream:
+        return await _stream_audio_response(request, dialogue_turns)
+
+    # 1. Generate Dialogue (Reuse existing logic) unless one was provided
+    if dialogue_turns is None:
+        dialogue_turns = await _coalesced_dialogue(request.text, request.mode)
     
     # 2. Generate Audio
+    return await _render_audio(dialogue_turns, range_header)
+
+
+@app.get("/dialogues/{dialogue_id}/audio")
+async def dialogue_audio(dialogue_id: str, range_header: Optional[str] = Header(None, alias="Range")):
+    """
+    Audio of a stored dialogue at a stable URL, so players can seek with
+    ``Range`` requests. Re-renders come from the TTS segment cache.
+    """
+    turns = await asyncio.to_thread(get_dialogue_store().load, dialogue_id)
+    if turns is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired dialogue_id.")
+    return await _render_audio(turns, range_header)
+
+
+async def _render_audio(turns: list[DialogueTurn], range_header: Optional[str]) -> Response:
+    spool = AudioSpool()
     try:
-        audio_bytes = await generate_audio_from_dialogue(dialogue_turns)
+        await write_audio_from_dialogue(turns, spool)
     except Exception as e:
+        spool.close()
         raise HTTPException(status_code=500, detail=str(e))
-    
-    # 3. Return Audio File
-    return Response(
-        content=audio_bytes, 
+    except BaseException:
+        spool.close()
+        raise
+    return spool.response(range_header)
+
+
+async def _coalesced_dialogue(text: str, mode: Optional[str]) -> list[DialogueTurn]:
+    """Identical concurrent requests (from either endpoint) share one generation."""
+    # Keyed on the effective mode, so "no mode" joins an explicit default
+    mode = _resolve_mode(mode)
+    return await coalesce(
+        "generate_dialogue",
+        (text, mode),
+        lambda: generate_dialogue(text, mode),
+    )
+
+
+async def _provided_dialogue(request: AudioRequest) -> Optional[list[DialogueTurn]]:
+    """The dialogue sent with the request or referenced by id; None for text input."""
+    if request.dialogue is not None:
+        return request.dialogue
+    if request.dialogue_id is not None:
+        turns = await asyncio.to_thread(get_dialogue_store().load, request.dialogue_id)
+        if turns is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired dialogue_id.")
+        return turns
+    return None
+
+
+async def _iterate(turns: list[DialogueTurn]) -> AsyncIterator[DialogueTurn]:
+    for turn in turns:
+        yield turn
+
+
+async def _stream_audio_response(
+    request: AudioRequest, turns: Optional[list[DialogueTurn]] = None
+) -> StreamingResponse:
+    source = _iterate(turns) if turns is not None else stream_dialogue(request.text, request.mode)
+    audio_stream = stream_audio_from_dialogue(source)
+
+    # Wait for the first segment so configuration and model errors still
+    # produce a proper status code instead of a truncated stream.
+    try:
+        first_segment = await anext(audio_stream, b"")
+    except Exception as e:
+        await audio_stream.aclose()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def body():
+        try:
+            if first_segment:
+                yield first_segment
+            async for segment in audio_stream:
+                yield segment
+        except Exception as e:
+            # Headers are already sent; all we can do is end the stream early
+            print(f"Audio stream aborted: {e}")
+        finally:
+            await audio_stream.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type="audio/mpeg",
+        headers={"Content-Disposition": "attachment; filename=dialogue.mp3"},
+    )
+
+
+# ---------------------------------------------------------------------------
+# Background podcast jobs
+# ---------------------------------------------------------------------------
+
+@app.post("/podcast-jobs", response_model=PodcastJob, status_code=202)
+async def submit_podcast_job(request: DialogueRequest):
+    """
+    Queue dialogue and audio generation in the background and return the
+    job immediately. Submitting the same text again returns the existing
+    job instead of starting a new one.
+    """
+    try:
+        return get_job_manager().submit(request.text, request.mode)
+    except JobQueueFull as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "30"})
+
+
+@app.get("/podcast-jobs/{job_id}", response_model=PodcastJob)
+async def podcast_job_status(job_id: str):
+    """Poll a job's status and progress (chunks generated, turns synthesized)."""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job.")
+    return job
+
+
+@app.get("/podcast-jobs/{job_id}/audio")
+async def podcast_job_audio(job_id: str):
+    """Download the finished MP3 of a job."""
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job.")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}, audio is not available.")
+    return FileResponse(
+        manager.audio_path(job_id),
         media_type="audio/mpeg",
-        headers={"Content-Disposition": "attachment; filename=dialogue.mp3"}
+        filename="dialogue.mp3",
     )
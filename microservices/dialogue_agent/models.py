@@ -1,4 +1,6 @@
-from pydantic import BaseModel, Field
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field, model_validator
 
 
 class DialogueRequest(BaseModel):
@@ -9,6 +11,10 @@ class DialogueRequest(BaseModel):
         description="The raw input text to convert into a podcast-style dialogue.",
         examples=["Machine learning is a subset of artificial intelligence that enables systems to learn from data."]
     )
+    mode: Optional[Literal["parallel", "serial"]] = Field(
+        None,
+        description="Chunk pipeline: 'parallel' (outline pass, then all chunks concurrently) or 'serial'. Defaults to the server's DIALOGUE_MODE.",
+    )
 
 
 class DialogueTurn(BaseModel):
@@ -31,3 +37,63 @@ class DialogueResponse(BaseModel):
         ...,
         description="Ordered list of dialogue turns between two professionals."
     )
+    dialogue_id: Optional[str] = Field(
+        None,
+        description="Server-side id of this dialogue; pass it to /generate-audio to render it without regenerating.",
+    )
+
+
+class AudioRequest(BaseModel):
+    """
+    Request body for /generate-audio: raw text to turn into a dialogue first,
+    or a finished dialogue (a /generate-dialogue response, or just its id).
+    """
+    text: Optional[str] = Field(
+        None,
+        min_length=1,
+        description="Raw input text; a dialogue is generated from it before rendering.",
+    )
+    mode: Optional[Literal["parallel", "serial"]] = Field(
+        None,
+        description="Chunk pipeline used when generating from text.",
+    )
+    dialogue: Optional[list[DialogueTurn]] = Field(
+        None,
+        min_length=1,
+        description="A finished dialogue to render as-is.",
+    )
+    dialogue_id: Optional[str] = Field(
+        None,
+        description="Id returned by /generate-dialogue for a stored dialogue.",
+    )
+
+    @model_validator(mode="after")
+    def _one_source(self) -> "AudioRequest":
+        # A /generate-dialogue response carries both dialogue and dialogue_id
+        if self.text is None and self.dialogue is None and self.dialogue_id is None:
+            raise ValueError("Provide 'text', 'dialogue' or 'dialogue_id'.")
+        if self.text is not None and (self.dialogue is not None or self.dialogue_id is not None):
+            raise ValueError("Provide either 'text' or a dialogue, not both.")
+        return self
+
+
+class PodcastJob(BaseModel):
+    """State of an asynchronous podcast generation job."""
+    job_id: str = Field(..., description="Identifier to poll; identical submissions share one job.")
+    status: Literal["queued", "running", "done", "failed"] = Field(
+        ...,
+        description="Lifecycle state of the job.",
+    )
+    stage: Optional[Literal["dialogue", "audio"]] = Field(
+        None,
+        description="What a running job is working on.",
+    )
+    chunks_done: int = Field(0, description="Dialogue chunks generated so far.")
+    chunks_total: int = Field(0, description="Dialogue chunks in the document, once known.")
+    turns_done: int = Field(0, description="Dialogue turns synthesized to audio so far.")
+    turns_total: int = Field(0, description="Dialogue turns to synthesize, once known.")
+    audio_url: Optional[str] = Field(None, description="Download link once the job is done.")
+    audio_bytes: Optional[int] = Field(None, description="Size of the finished MP3.")
+    error: Optional[str] = Field(None, description="Failure reason for failed jobs.")
+    created_at: float = Field(..., description="Submission time (Unix seconds).")
+    finished_at: Optional[float] = Field(None, description="Completion time (Unix seconds).")
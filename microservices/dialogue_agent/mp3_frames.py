@@ -0,0 +1,98 @@
+"""
+MPEG audio Layer III frame walking.
+
+Each TTS turn is a separate MP3 stream. Concatenating them byte-for-byte can
+leave an ID3 tag, a Xing/Info header frame (which tells players the length
+of *that turn only*) or a truncated last frame in the middle of the podcast,
+which some players treat as the end of the file or as a glitch. Trimming
+every segment to whole audio frames makes the joined file a single clean
+frame sequence.
+"""
+
+_BITRATES_V1 = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_BITRATES_V2 = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000),   # MPEG-2.5
+}
+
+
+def frame_length(data: bytes, pos: int) -> int:
+    """Length of the Layer III frame whose header starts at ``pos``, or 0."""
+    if pos + 4 > len(data):
+        return 0
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return 0
+    version = (b1 >> 3) & 0x3
+    layer = (b1 >> 1) & 0x3
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0x3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return 0
+
+    padding = (b2 >> 1) & 0x1
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    if version == 3:
+        return 144000 * _BITRATES_V1[bitrate_index] // sample_rate + padding
+    return 72000 * _BITRATES_V2[bitrate_index] // sample_rate + padding
+
+
+def _skip_id3v2(data: bytes) -> int:
+    if len(data) >= 10 and data[:3] == b"ID3":
+        # Syncsafe size: 7 bits per byte
+        size = 0
+        for b in data[6:10]:
+            size = (size << 7) | (b & 0x7F)
+        footer = 10 if data[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def _is_info_frame(data: bytes, pos: int) -> bool:
+    """Xing/Info/VBRI header frames carry metadata, not audio."""
+    b1, b3 = data[pos + 1], data[pos + 3]
+    mpeg1 = (b1 >> 3) & 0x3 == 3
+    mono = (b3 >> 6) == 3
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    tag = data[pos + 4 + side_info : pos + 8 + side_info]
+    return tag in (b"Xing", b"Info") or data[pos + 36 : pos + 40] == b"VBRI"
+
+
+def _find_frame(data: bytes, pos: int) -> int:
+    """Next offset holding a frame that is followed by another frame (or the end)."""
+    while True:
+        pos = data.find(b"\xff", pos)
+        if pos < 0:
+            return -1
+        n = frame_length(data, pos)
+        if n and (pos + n == len(data) or frame_length(data, pos + n)):
+            return pos
+        pos += 1
+
+
+def trim_to_frames(data: bytes) -> bytes:
+    """
+    Return only the complete audio frames of ``data``: leading ID3 tags,
+    Xing/Info frames, junk between frames and a truncated final frame are
+    dropped. Data without recognisable Layer III frames is returned as is.
+    """
+    pos = _find_frame(data, _skip_id3v2(data))
+    if pos < 0:
+        return data
+    if _is_info_frame(data, pos):
+        pos += frame_length(data, pos)
+
+    runs = []
+    while 0 <= pos < len(data):
+        start = pos
+        while (n := frame_length(data, pos)) and pos + n <= len(data):
+            pos += n
+        if pos > start:
+            runs.append((start, pos))
+        pos = _find_frame(data, pos + 1) if pos < len(data) else -1
+
+    if len(runs) == 1 and runs[0] == (0, len(data)):
+        return data
+    return b"".join(data[start:end] for start, end in runs)
@@ -0,0 +1,140 @@
+"""
+Single-process gateway hosting every service.
+
+Mounts the lecture, YouTube and dialogue apps under path prefixes in one
+interpreter, so they share one import of the Google clients, the Gemini
+gateway (and with it each key's rate limiter), the pooled HTTP client, the
+in-memory caches and the admission controller:
+
+    /lecture/...    video_lecture_agent
+    /yt/...         yt_recommend_agent
+    /dialogue/...   dialogue_agent
+
+    cd microservices
+    uvicorn gateway:app --host 0.0.0.0 --port 8080
+
+The per-service entry points (``uvicorn main:app`` in a service directory)
+are unchanged; clients of the gateway only add the prefix to their base URL.
+
+The services import their own modules by bare names (``main``, ``tools``,
+``utils``, ...), which would collide in one interpreter. Each service is
+therefore imported with its directory first on ``sys.path``, and its modules
+are then moved to ``<service>.<name>`` in ``sys.modules`` before the next
+one loads. Nothing in the services imports lazily, so the moved modules keep
+working; ``service_modules`` puts them back under their own names for code
+that wants to patch them (the benchmarks' fakes).
+
+Configuration (environment):
+    GATEWAY_SERVICES   comma-separated prefixes to mount (default: all)
+"""
+
+import importlib
+import os
+import sys
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from typing import Iterator, Optional
+
+MICROSERVICES_DIR = os.path.dirname(os.path.abspath(__file__))
+if MICROSERVICES_DIR not in sys.path:
+    sys.path.append(MICROSERVICES_DIR)
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import PlainTextResponse  # noqa: E402
+
+from common import stats, tracing  # noqa: E402
+from common.http import close_http_client  # noqa: E402
+
+SERVICES = {
+    "lecture": "video_lecture_agent",
+    "yt": "yt_recommend_agent",
+    "dialogue": "dialogue_agent",
+}
+
+GATEWAY_SERVICES = [p.strip() for p in os.getenv("GATEWAY_SERVICES", ",".join(SERVICES)).split(",") if p.strip()]
+
+
+def _local_names(directory: str) -> set[str]:
+    """Top-level module names a service directory provides."""
+    names = set()
+    for entry in os.listdir(directory):
+        if entry.endswith(".py"):
+            names.add(entry[:-3])
+        elif os.path.isfile(os.path.join(directory, entry, "__init__.py")):
+            names.add(entry)
+    return names
+
+
+def load_service(service: str) -> FastAPI:
+    """Import ``<service>/main.py`` in isolation and return its app."""
+    directory = os.path.join(MICROSERVICES_DIR, service)
+    names = _local_names(directory)
+
+    def owned(name: str) -> bool:
+        return name.split(".", 1)[0] in names
+
+    # Anything already imported under these names is not ours (another
+    # service, or an unrelated package): set it aside while we import
+    shadowed = {name: sys.modules.pop(name) for name in list(sys.modules) if owned(name)}
+    sys.path.insert(0, directory)
+    try:
+        module = importlib.import_module("main")
+    finally:
+        sys.path.remove(directory)
+        for name in [name for name in sys.modules if owned(name)]:
+            sys.modules[f"{service}.{name}"] = sys.modules.pop(name)
+        sys.modules.update(shadowed)
+    return module.app
+
+
+@contextmanager
+def service_modules(service: str) -> Iterator[None]:
+    """Make a loaded service's modules importable by their own names again."""
+    prefix = f"{service}."
+    aliased = {name[len(prefix):]: module for name, module in sys.modules.items() if name.startswith(prefix)}
+    shadowed = {name: sys.modules[name] for name in aliased if name in sys.modules}
+    sys.modules.update(aliased)
+    try:
+        yield
+    finally:
+        for name in aliased:
+            sys.modules.pop(name, None)
+        sys.modules.update(shadowed)
+
+
+def build_app(prefixes: Optional[list[str]] = None) -> FastAPI:
+    prefixes = GATEWAY_SERVICES if prefixes is None else prefixes
+    unknown = set(prefixes) - set(SERVICES)
+    if unknown:
+        raise ValueError(f"Unknown services: {', '.join(sorted(unknown))} (choose from {', '.join(SERVICES)})")
+    apps = {prefix: load_service(SERVICES[prefix]) for prefix in prefixes}
+
+    # Mounted apps' own startup and shutdown are not run by Starlette
+    @asynccontextmanager
+    async def lifespan(_app: FastAPI):
+        async with AsyncExitStack() as stack:
+            for sub_app in apps.values():
+                await stack.enter_async_context(sub_app.router.lifespan_context(sub_app))
+            yield
+        await close_http_client()
+
+    app = FastAPI(title="learning services gateway", lifespan=lifespan)
+
+    @app.get("/")
+    async def health():
+        return {"status": "running", "services": {prefix: SERVICES[prefix] for prefix in apps}}
+
+    @app.get("/stats")
+    async def service_stats():
+        return stats.collect()
+
+    @app.get("/metrics")
+    async def metrics():
+        """Per-stage latency histograms and process resource usage (Prometheus text format)."""
+        return PlainTextResponse(tracing.render_metrics(), media_type="text/plain; version=0.0.4")
+
+    for prefix, sub_app in apps.items():
+        app.mount(f"/{prefix}", sub_app)
+    return app
+
+
+app = build_app()
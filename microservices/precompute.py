@@ -0,0 +1,280 @@
+"""
+Bulk precompute for whole textbooks.
+
+Warms the services' result store before term starts, so live traffic hits
+the cache instead of Gemini and YouTube. Given a document's extracted page
+text it runs, for every window of pages the lecture view shows:
+
+    summary   video_lecture_agent  generate_summary
+    topics    yt_recommend_agent   extract_topics + search_youtube_videos
+    dialogue  dialogue_agent       generate_dialogue on the whole document
+              (opt-in: --stages summary topics dialogue)
+
+Inputs are built exactly as the frontend builds its requests, so the cache
+keys match. Results land in the shared LLM cache (LLM_CACHE_BACKEND=sqlite,
+same LLM_CACHE_PATH as the services) and finished dialogues in the dialogue
+store.
+
+Each stage runs in its own worker process (the services' ``tools`` and
+``utils`` packages would collide in one interpreter), with at most
+``--concurrency`` units in flight. Finished units are appended to a
+checkpoint file per stage, so an interrupted or partly failed run picks up
+where it stopped when run again.
+
+    cd microservices
+    python -m precompute book.json --concurrency 4
+    python -m precompute book.txt --stages summary topics dialogue
+
+``book.json`` holds ``{"pages": [{"page": 1, "text": "..."}, ...]}`` (the
+shape the upload page stores); a ``.txt`` file is split into pages on form
+feeds, as written by ``pdftotext``.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+MICROSERVICES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STAGES = {
+    "summary": "video_lecture_agent",
+    "topics": "yt_recommend_agent",
+    "dialogue": "dialogue_agent",
+}
+
+# What the lecture page shows per screen, and how much text the podcast page sends
+PAGES_PER_WINDOW = 3
+PODCAST_MAX_CHARS = 100000
+
+
+# ---------------------------------------------------------------------------
+# Input and checkpoints
+# ---------------------------------------------------------------------------
+
+def load_pages(path: str) -> list[tuple[int, str]]:
+    with open(path, encoding="utf-8") as f:
+        raw = f.read()
+    if path.endswith(".json"):
+        data = json.loads(raw)
+        pages = data["pages"] if isinstance(data, dict) else data
+        return [(int(p["page"]), p["text"]) for p in pages]
+    return [(n, text) for n, text in enumerate(raw.split("\f"), start=1) if text.strip()]
+
+
+def document_id(pages: list[tuple[int, str]]) -> str:
+    digest = hashlib.sha256()
+    for number, text in pages:
+        digest.update(f"{number}\0{text}\0".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def load_checkpoint(path: str) -> set[str]:
+    done = set()
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["unit"])
+                except (ValueError, KeyError):
+                    pass  # a line cut short by a crash
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def windows(pages: list[tuple[int, str]], per_window: int) -> list[list[tuple[int, str]]]:
+    return [pages[i : i + per_window] for i in range(0, len(pages), per_window)]
+
+
+# ---------------------------------------------------------------------------
+# Stages (run inside the worker process of their service)
+# ---------------------------------------------------------------------------
+
+def _summary_units(pages, args) -> dict[str, tuple[int, Callable[[], Awaitable[dict]]]]:
+    from tools.lecture_agent import generate_summary
+    from tools.window_prefetch import window_text
+
+    async def summarize(text: str) -> dict:
+        result = await generate_summary(text)
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        return {}
+
+    return {
+        f"window-{n}": (len(window), lambda text=window_text(window): summarize(text))
+        for n, window in enumerate(windows(pages, args.pages_per_window))
+    }
+
+
+def _topics_units(pages, args) -> dict[str, tuple[int, Callable[[], Awaitable[dict]]]]:
+    from tools.topics_agent import extract_topics
+    from tools.yt_search import search_youtube_videos
+
+    async def recommend(text: str) -> dict:
+        topics = await extract_topics(text)
+        if not topics:
+            raise RuntimeError("no topics extracted")
+        videos = await search_youtube_videos(topics)
+        # Failed searches are logged and skipped by search_youtube_videos
+        missing = set(topics) - {video["topic"] for video in videos}
+        if missing:
+            raise RuntimeError(f"{len(missing)} of {len(topics)} searches returned nothing")
+        return {"topics": len(topics), "videos": len(videos)}
+
+    # The lecture page's video panel sends the window's page texts
+    return {
+        f"window-{n}": (len(window), lambda text="\n\n".join(t for _, t in window): recommend(text))
+        for n, window in enumerate(windows(pages, args.pages_per_window))
+    }
+
+
+def _dialogue_units(pages, args) -> dict[str, tuple[int, Callable[[], Awaitable[dict]]]]:
+    from dialogue_generator import generate_dialogue, is_complete
+    from dialogue_store import get_dialogue_store
+
+    # Same text the podcast page posts to /generate-audio
+    text = "\n\n".join(t for _, t in pages)[:PODCAST_MAX_CHARS]
+
+    async def podcast() -> dict:
+        turns = await generate_dialogue(text, args.dialogue_mode)
+        if not turns or not is_complete(text, args.dialogue_mode):
+            raise RuntimeError("some chunks failed")
+        dialogue_id = await asyncio.to_thread(get_dialogue_store().save, turns)
+        return {"turns": len(turns), "dialogue_id": dialogue_id}
+
+    return {"document": (len(pages), podcast)}
+
+
+_UNIT_BUILDERS = {
+    "summary": _summary_units,
+    "topics": _topics_units,
+    "dialogue": _dialogue_units,
+}
+
+
+def _quota_used() -> dict:
+    from common.gemini_gateway import get_gateway
+
+    slots = get_gateway().slots
+    used = {
+        "gemini_calls": sum(slot.calls for slot in slots),
+        "gemini_rate_limited": sum(slot.rate_limited for slot in slots),
+    }
+    yt_search = sys.modules.get("tools.yt_search")
+    if yt_search is not None:
+        used["youtube_searches"] = yt_search._inflight.calls
+    return used
+
+
+async def _run_units(stage: str, pages, args, checkpoint: str) -> dict:
+    units = _UNIT_BUILDERS[stage](pages, args)
+    done = set() if args.restart else load_checkpoint(checkpoint)
+    todo = [(key, unit) for key, unit in units.items() if key not in done]
+    print(f"[{stage}] {len(units)} units, {len(units) - len(todo)} already done")
+
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+    report = {"units": len(units), "skipped": len(units) - len(todo), "done": 0, "failed": 0, "pages": 0}
+    start = time.perf_counter()
+
+    with open(checkpoint, "a", encoding="utf-8") as log:
+        async def run(key: str, page_count: int, fn) -> None:
+            async with semaphore:
+                try:
+                    detail = await fn()
+                except Exception as e:
+                    report["failed"] += 1
+                    print(f"[{stage}] {key} failed: {e}")
+                    return
+            log.write(json.dumps({"unit": key, "at": time.time(), **detail}) + "\n")
+            log.flush()
+            report["done"] += 1
+            report["pages"] += page_count
+            print(f"[{stage}] {report['done'] + report['skipped']}/{len(units)} {key}")
+
+        await asyncio.gather(*(run(key, count, fn) for key, (count, fn) in todo))
+
+    elapsed = time.perf_counter() - start
+    report["elapsed_s"] = round(elapsed, 1)
+    report["pages_per_min"] = round(report["pages"] / elapsed * 60, 1) if elapsed and report["pages"] else 0.0
+    report.update(_quota_used())
+    return report
+
+
+def run_stage(stage: str, pages, args, checkpoint: str, setup: Optional[Callable[[str], None]] = None) -> dict:
+    """Worker-process entry point: import the stage's service and run its units."""
+    service = STAGES[stage]
+    for path in (MICROSERVICES_DIR, os.path.join(MICROSERVICES_DIR, service)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    if setup is not None:
+        setup(service)
+    return asyncio.run(_run_units(stage, pages, args, checkpoint))
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def run(args: argparse.Namespace, setup: Optional[Callable[[str], None]] = None) -> dict:
+    """
+    Run every requested stage in parallel worker processes and return their
+    reports. ``setup`` is called in each worker with the service name once
+    its modules are importable (the benchmarks use it to install fakes).
+    """
+    pages = load_pages(args.input)
+    directory = os.path.join(args.checkpoint_dir, document_id(pages))
+    os.makedirs(directory, exist_ok=True)
+    print(f"{len(pages)} pages, stages {', '.join(args.stages)}; checkpoints in {directory}")
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(args.stages), mp_context=context) as pool:
+        futures = {
+            stage: pool.submit(
+                run_stage, stage, pages, args, os.path.join(directory, f"{stage}.jsonl"), setup
+            )
+            for stage in args.stages
+        }
+        return {stage: future.result() for stage, future in futures.items()}
+
+
+def print_report(reports: dict) -> None:
+    print(f"\n{'stage':<10} {'done':>6} {'skipped':>8} {'failed':>7} {'pages/min':>10} {'gemini':>7} {'429s':>5} {'youtube':>8}")
+    for stage, r in reports.items():
+        print(
+            f"{stage:<10} {r['done']:>6} {r['skipped']:>8} {r['failed']:>7} {r['pages_per_min']:>10.1f}"
+            f" {r['gemini_calls']:>7} {r['gemini_rate_limited']:>5} {r.get('youtube_searches', '-'):>8}"
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="pages as .json ({\"pages\": [...]}) or form-feed separated .txt")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=["summary", "topics"])
+    parser.add_argument("--concurrency", type=int, default=4, help="units in flight per stage")
+    parser.add_argument("--pages-per-window", type=int, default=PAGES_PER_WINDOW)
+    parser.add_argument("--dialogue-mode", choices=["parallel", "serial"], default=None)
+    parser.add_argument("--checkpoint-dir", default=os.path.join(tempfile.gettempdir(), "precompute"))
+    parser.add_argument("--restart", action="store_true", help="ignore existing checkpoints")
+    return parser
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    if os.getenv("LLM_CACHE_BACKEND", "sqlite").lower() != "sqlite":
+        print("LLM_CACHE_BACKEND must be sqlite: results have to outlive this process.")
+        return 2
+    reports = run(args)
+    print_report(reports)
+    return 1 if any(r["failed"] for r in reports.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,24 @@
+import os
+import sys
+
+# The shared ``common`` package lives next to the service directories.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from utils.router_logic import router
+from common import stats, tracing, warmup
+from common.admission import INTERACTIVE, AdmissionMiddleware, Policy
 
-app = FastAPI(title="lecture teaching api")
+app = FastAPI(title="lecture teaching api", lifespan=warmup.lifespan)
+
+# Students are waiting on every endpoint here.
+app.add_middleware(AdmissionMiddleware, policies={
+    "POST /doubt_clear": Policy(INTERACTIVE, limit=32, deadline=30, expected=3),
+    "POST /summarize_pages": Policy(INTERACTIVE, limit=32, deadline=45, expected=5),
+    "GET /documents/{document_id}/windows/{index}": Policy(INTERACTIVE, limit=32, deadline=45, expected=5),
+})
 
 # CORS configuration
 app.add_middleware(
@@ -13,9 +29,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(tracing.TracingMiddleware)
+
 app.include_router(router)
 
 
 @app.get("/")
 async def health():
     return {"status": "running"}
+
+
+@app.get("/stats")
+async def service_stats():
+    return stats.collect()
+
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage latency histograms and process resource usage (Prometheus text format)."""
+    return PlainTextResponse(tracing.render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,20 +1,30 @@
-import os
+import asyncio
 import json
-from google import genai
-from dotenv import load_dotenv
+from typing import AsyncIterator
 from tools.prompt import PROMPT_TEMPLATE_DOUBT_CLEAR
+from tools.passage_index import trim_context
+from utils.json_stream import StringFieldStreamer
+from common.gemini_gateway import get_gateway
+from common.llm_cache import get_llm_cache, make_key
 
-load_dotenv()
-
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+MODEL = "gemini-3-flash-preview"
 
 
 async def solve_doubt(query: str,context:str) -> dict:
-    prompt = PROMPT_TEMPLATE_DOUBT_CLEAR.format(context=context,query=query)
+    cache = get_llm_cache()
+    cache_key = make_key(MODEL, PROMPT_TEMPLATE_DOUBT_CLEAR, context, query)
+    cached = await cache.aget_json(cache_key)
+    if cached is not None:
+        return cached
+
+    # Long chapters: send only the passages relevant to this question.
+    # Indexing a chapter is CPU work, so it runs off the event loop.
+    trimmed = await asyncio.to_thread(trim_context, context, query)
+    prompt = PROMPT_TEMPLATE_DOUBT_CLEAR.format(context=trimmed,query=query)
 
     try:
-        response = client.models.generate_content(
-            model="gemini-3-flash-preview",
+        response = await get_gateway().generate_content(
+            model=MODEL,
             contents=prompt,
             config={"response_mime_type": "application/json"},
         )
@@ -23,13 +33,40 @@ async def solve_doubt(query: str,context:str) -> dict:
 
         parsed = json.loads(response.text.strip())
 
-        return {
+        result = {
             "resp": parsed.get("doubt_clear", ""),
             "status":200
         }
+        await cache.aset_json(cache_key, result)
+        return result
 
     except Exception as e:
         return {
             "doubt_clear": "",
             "status":500
         }
+
+
+async def stream_doubt(query: str, context: str) -> AsyncIterator[tuple[str, dict]]:
+    """Streaming variant of ``solve_doubt`` yielding ``delta`` events."""
+    cache = get_llm_cache()
+    cache_key = make_key(MODEL, PROMPT_TEMPLATE_DOUBT_CLEAR, context, query)
+    cached = await cache.aget_json(cache_key)
+    if cached is not None:
+        yield "delta", {"text": cached["resp"]}
+        return
+
+    trimmed = await asyncio.to_thread(trim_context, context, query)
+    streamer = StringFieldStreamer("doubt_clear")
+    stream = get_gateway().generate_content_stream(
+        model=MODEL,
+        contents=PROMPT_TEMPLATE_DOUBT_CLEAR.format(context=trimmed, query=query),
+        config={"response_mime_type": "application/json"},
+    )
+    async for chunk in stream:
+        delta = streamer.feed(chunk.text or "")
+        if delta:
+            yield "delta", {"text": delta}
+
+    parsed = json.loads(streamer.text.strip())
+    await cache.aset_json(cache_key, {"resp": parsed.get("doubt_clear", ""), "status": 200})
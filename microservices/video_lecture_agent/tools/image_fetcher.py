@@ -1,4 +1,10 @@
-import requests
+import os
+import asyncio
+
+from common import stats, tracing
+from common.http import get_http_client
+from common.singleflight import SingleFlight
+from common.ttl_cache import TTLCache
 
 
 WIKI_API = "https://commons.wikimedia.org/w/api.php"
@@ -7,52 +13,106 @@ HEADERS = {
     "User-Agent": "lecture-agent/1.0 (educational project; contact: example@email.com)"
 }
 
+# Overall time budget for all topics of one summary, the width of the
+# server-side thumbnail we ask for, and how long search results are reused.
+IMAGE_FETCH_DEADLINE = float(os.getenv("IMAGE_FETCH_DEADLINE", "8"))
+IMAGE_THUMB_WIDTH = int(os.getenv("IMAGE_THUMB_WIDTH", "800"))
+IMAGE_CACHE_TTL = float(os.getenv("IMAGE_CACHE_TTL", str(24 * 3600)))
+
+# Define allowed extensions
+VALID_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+_cache = TTLCache(maxsize=2048, ttl=IMAGE_CACHE_TTL)
+_inflight = SingleFlight()
+
+stats.register("image_fetcher", lambda: {"cache": _cache.stats(), "lookups": _inflight.stats()})
+
 
 def simplify_topic(topic: str) -> str:
     words = topic.lower().split()
     return " ".join([w for w in words if len(w) > 3][:5])
 
 
-def fetch_images(topics: list[str], per_topic: int = 2) -> list[str]:
+async def _search_images(topic: str, per_topic: int) -> list[str]:
+    params = {
+        "action": "query",
+        "generator": "search",
+        # Adding 'filetype:bitmap' helps narrow results to images in search
+        "gsrsearch": f"{topic} filetype:bitmap",
+        "gsrnamespace": 6,
+        "gsrlimit": per_topic * 2, # Fetch more to account for filtered items
+        "prop": "imageinfo",
+        "iiprop": "url",
+        # Ask Commons for a scaled thumbnail instead of the full original
+        "iiurlwidth": IMAGE_THUMB_WIDTH,
+        "format": "json",
+    }
+
+    with tracing.span("images.search", topic=topic) as span:
+        r = await get_http_client().get(WIKI_API, params=params, headers=HEADERS)
+        span.set(status=r.status_code, response_bytes=len(r.content))
+    if r.status_code != 200:
+        return []
+
+    pages = r.json().get("query", {}).get("pages", {})
+
+    images = []
+    for page in pages.values():
+        info = page.get("imageinfo")
+        if info:
+            url = info[0]["url"]
+            # Filter: Only append if the URL ends with a valid image extension
+            if url.lower().endswith(VALID_EXTENSIONS):
+                images.append(info[0].get("thumburl") or url)
+
+        # Stop if we've reached the desired count for this specific topic
+        if len(images) >= per_topic:
+            break
+
+    return images
+
+
+async def _images_for_topic(topic: str, per_topic: int) -> list[str]:
+    key = (topic, per_topic)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    async def lookup() -> list[str]:
+        images = await _search_images(topic, per_topic)
+        _cache.set(key, images)
+        return images
+
+    return await _inflight.do(key, lookup)
+
+
+async def fetch_images(
+    topics: list[str], per_topic: int = 2, deadline: float = IMAGE_FETCH_DEADLINE
+) -> list[str]:
+    """
+    Search Wikimedia Commons for every topic concurrently and return up to
+    ``per_topic`` thumbnail URLs each, in topic order. Topics that have not
+    answered within ``deadline`` seconds are left out; their lookups keep
+    running in the background and fill the cache for the next request.
+    """
+    queries = [q for q in (simplify_topic(t) for t in topics) if q]
+    if not queries:
+        return []
+
+    tasks = [asyncio.create_task(_images_for_topic(q, per_topic)) for q in queries]
+    with tracing.span("images.fetch", topics=len(queries)) as span:
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        span.set(missed_deadline=len(pending))
+    for task in pending:
+        task.cancel()
+
     images = []
-    # Define allowed extensions
-    valid_extensions = ('.jpg', '.jpeg', '.png')
-
-    for topic in topics:
-        try:
-            topic = simplify_topic(topic)
-
-            params = {
-                "action": "query",
-                "generator": "search",
-                # Adding 'filetype:bitmap' helps narrow results to images in search
-                "gsrsearch": f"{topic} filetype:bitmap", 
-                "gsrnamespace": 6,
-                "gsrlimit": per_topic * 2, # Fetch more to account for filtered items
-                "prop": "imageinfo",
-                "iiprop": "url",
-                "format": "json",
-            }
-
-            r = requests.get(WIKI_API, params=params, headers=HEADERS, timeout=10)
-            if r.status_code != 200: continue
-
-            data = r.json()
-            pages = data.get("query", {}).get("pages", {})
-
-            for page in pages.values():
-                info = page.get("imageinfo")
-                if info:
-                    url = info[0]["url"]
-                    # Filter: Only append if the URL ends with a valid image extension
-                    if url.lower().endswith(valid_extensions):
-                        images.append(url)
-                
-                # Stop if we've reached the desired count for this specific topic
-                if len(images) >= per_topic:
-                    break
-
-        except Exception as e:
-            print("Image fetch error:", str(e))
-
-    return images[:len(topics) * per_topic] # Final trim to match requested count
\ No newline at end of file
+    for query, task in zip(queries, tasks):
+        if task not in done:
+            print(f"Image fetch for {query!r} missed the {deadline:g}s deadline")
+        elif task.exception() is not None:
+            print("Image fetch error:", str(task.exception()))
+        else:
+            images.extend(task.result())
+
+    return images[:len(topics) * per_topic] # Final trim to match requested count
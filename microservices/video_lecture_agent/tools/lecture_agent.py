@@ -1,21 +1,32 @@
-import os
 import json
-from google import genai
-from dotenv import load_dotenv
+from typing import AsyncIterator
 from tools.prompt import PROMPT_TEMPLATE
 from tools.image_fetcher import fetch_images
+from utils.json_stream import StringFieldStreamer
+from common.gemini_gateway import get_gateway
+from common.llm_cache import get_llm_cache, make_key
 
-load_dotenv()
+MODEL = "gemini-3-flash-preview"
 
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+
+async def _images_for(parsed: dict) -> list[str]:
+    if parsed.get("image_needed", "").lower() == "yes":
+        return await fetch_images(parsed.get("image_of", []))
+    return []
 
 
 async def generate_summary(text: str) -> dict:
+    cache = get_llm_cache()
+    cache_key = make_key(MODEL, PROMPT_TEMPLATE, text)
+    cached = await cache.aget_json(cache_key)
+    if cached is not None:
+        return cached
+
     prompt = PROMPT_TEMPLATE.format(input_text=text)
 
     try:
-        response = client.models.generate_content(
-            model="gemini-3-flash-preview",
+        response = await get_gateway().generate_content(
+            model=MODEL,
             contents=prompt,
             config={"response_mime_type": "application/json"},
         )
@@ -24,14 +35,14 @@ async def generate_summary(text: str) -> dict:
 
         parsed = json.loads(response.text.strip())
 
-        images = []
-        if parsed.get("image_needed", "").lower() == "yes":
-            images = fetch_images(parsed.get("image_of", []))
+        images = await _images_for(parsed)
 
-        return {
+        result = {
             "resp": parsed.get("resp", ""),
             "images": images,
         }
+        await cache.aset_json(cache_key, result)
+        return result
 
     except Exception as e:
         return {
@@ -39,3 +50,35 @@ async def generate_summary(text: str) -> dict:
             "images": [],
             "error": str(e),
         }
+
+
+async def stream_summary(text: str) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Streaming variant of ``generate_summary`` yielding ``(event, data)``:
+    ``delta`` events with explanation text as Gemini writes it, then one
+    ``images`` event once the full response (and its image_of list) is in.
+    """
+    cache = get_llm_cache()
+    cache_key = make_key(MODEL, PROMPT_TEMPLATE, text)
+    cached = await cache.aget_json(cache_key)
+    if cached is not None:
+        yield "delta", {"text": cached["resp"]}
+        yield "images", {"images": cached["images"]}
+        return
+
+    streamer = StringFieldStreamer("resp")
+    stream = get_gateway().generate_content_stream(
+        model=MODEL,
+        contents=PROMPT_TEMPLATE.format(input_text=text),
+        config={"response_mime_type": "application/json"},
+    )
+    async for chunk in stream:
+        delta = streamer.feed(chunk.text or "")
+        if delta:
+            yield "delta", {"text": delta}
+
+    parsed = json.loads(streamer.text.strip())
+    images = await _images_for(parsed)
+    yield "images", {"images": images}
+
+    await cache.aset_json(cache_key, {"resp": parsed.get("resp", ""), "images": images})
@@ -0,0 +1,115 @@
+import os
+import re
+import math
+import hashlib
+from collections import Counter
+
+from common import stats, tracing
+from common.ttl_cache import TTLCache
+
+
+# Contexts shorter than this are sent whole; longer ones are cut down to the
+# DOUBT_TOP_K passages that best match the question.
+DOUBT_TRIM_MIN_CHARS = int(os.getenv("DOUBT_TRIM_MIN_CHARS", "4000"))
+DOUBT_TOP_K = int(os.getenv("DOUBT_TOP_K", "4"))
+PASSAGE_CHARS = 800
+
+_STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in into is it
+its me my not of on or so than that the their then there these this to was what
+when where which who why will with you your
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_indexes = TTLCache(maxsize=256, ttl=6 * 3600)
+_usage = {"queries": 0, "trimmed": 0, "context_chars": 0, "sent_chars": 0}
+
+
+def _tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def split_passages(text: str, size: int = PASSAGE_CHARS) -> list[str]:
+    """Split on paragraph breaks, packing short paragraphs and cutting long ones at sentence ends."""
+    passages = []
+    current = ""
+    for para in re.split(r"\n\s*\n|\n(?=\[Page \d+\])", text):
+        para = para.strip()
+        if not para:
+            continue
+        if current and len(current) + len(para) + 1 > size:
+            passages.append(current)
+            current = ""
+        while len(para) > size:
+            cut = para.rfind(". ", 0, size)
+            cut = cut + 1 if cut > size // 2 else size
+            passages.append(para[:cut].strip())
+            para = para[cut:].strip()
+        current = f"{current}\n{para}" if current else para
+    if current:
+        passages.append(current)
+    return passages
+
+
+class PassageIndex:
+    """Okapi BM25 over the passages of one document."""
+
+    def __init__(self, text: str, k1: float = 1.5, b: float = 0.75):
+        self.passages = split_passages(text)
+        self.k1 = k1
+        self.b = b
+        self._tf = [Counter(_tokenize(p)) for p in self.passages]
+        self._lengths = [sum(tf.values()) for tf in self._tf]
+        self._avg_len = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+        df = Counter()
+        for tf in self._tf:
+            df.update(tf.keys())
+        n = len(self.passages)
+        self._idf = {term: math.log(1 + (n - f + 0.5) / (f + 0.5)) for term, f in df.items()}
+
+    def _score(self, i: int, terms: list[str]) -> float:
+        tf = self._tf[i]
+        norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / (self._avg_len or 1))
+        score = 0.0
+        for term in terms:
+            f = tf.get(term)
+            if f:
+                score += self._idf[term] * f * (self.k1 + 1) / (f + norm)
+        return score
+
+    def search(self, query: str, k: int) -> list[str]:
+        """Top ``k`` passages for ``query``, returned in document order."""
+        terms = list(set(_tokenize(query)))
+        scores = [(self._score(i, terms), i) for i in range(len(self.passages))]
+        best = [i for score, i in sorted(scores, key=lambda s: (-s[0], s[1]))[:k] if score > 0]
+        if not best:
+            best = list(range(min(k, len(self.passages))))
+        return [self.passages[i] for i in sorted(best)]
+
+
+def get_index(context: str) -> PassageIndex:
+    """Build once per distinct context and reuse across questions."""
+    key = hashlib.sha256(context.encode("utf-8")).hexdigest()
+    index = _indexes.get(key)
+    if index is None:
+        index = PassageIndex(context)
+        _indexes.set(key, index)
+    return index
+
+
+def trim_context(context: str, query: str, k: int = DOUBT_TOP_K) -> str:
+    _usage["queries"] += 1
+    _usage["context_chars"] += len(context)
+
+    if len(context) > DOUBT_TRIM_MIN_CHARS:
+        with tracing.span("doubt.trim_context", context_chars=len(context)):
+            context = "\n...\n".join(get_index(context).search(query, k))
+        _usage["trimmed"] += 1
+
+    _usage["sent_chars"] += len(context)
+    return context
+
+
+stats.register("passage_index", lambda: {**_usage, "indexes": _indexes.stats()})
@@ -0,0 +1,171 @@
+"""
+Speculative summaries of upcoming page windows.
+
+The lecture page summarizes a document a few pages ("a window") at a time
+and students mostly read straight through. Once a document's pages are
+registered, every window request also queues summaries of the next
+PREFETCH_AHEAD windows on a small background pool, so turning the page is
+a cache hit. Prefetches for windows the student has jumped away from are
+cancelled.
+
+Prefetches are low priority: at most PREFETCH_WORKERS run at once, and they
+wait while the Gemini gateway already has PREFETCH_BUSY_IN_FLIGHT calls in
+flight. A window requested while its prefetch is running joins that call
+through request coalescing instead of starting another one.
+"""
+
+import asyncio
+import os
+from typing import Optional
+
+from tools.lecture_agent import generate_summary
+from common import stats
+from common.admission import BATCH, current_priority
+from common.coalesce import coalesce
+from common.gemini_gateway import get_gateway
+from common.llm_cache import make_key
+from common.ttl_cache import TTLCache
+
+
+PREFETCH_AHEAD = int(os.getenv("PREFETCH_AHEAD", "2"))
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+PREFETCH_BUSY_IN_FLIGHT = int(os.getenv("PREFETCH_BUSY_IN_FLIGHT", "8"))
+PREFETCH_DOCUMENT_TTL = float(os.getenv("PREFETCH_DOCUMENT_TTL", str(6 * 3600)))
+PREFETCH_MAX_DOCUMENTS = int(os.getenv("PREFETCH_MAX_DOCUMENTS", "256"))
+
+# How long a prefetch waits before re-checking a busy gateway
+BUSY_POLL_INTERVAL = 0.25
+
+
+def window_text(pages: list[tuple[int, str]]) -> str:
+    """Same layout the lecture page sends to /summarize_pages, so both share the LLM cache."""
+    return "\n\n---\n\n".join(f"[Page {number}]\n{text}" for number, text in pages)
+
+
+class Document:
+    def __init__(self, pages: list[tuple[int, str]], pages_per_window: int):
+        self.windows = [
+            window_text(pages[i : i + pages_per_window])
+            for i in range(0, len(pages), pages_per_window)
+        ]
+        self.results: dict[int, dict] = {}
+        self.prefetches: dict[int, asyncio.Task] = {}
+
+
+class Prefetcher:
+    def __init__(self, ahead: int = PREFETCH_AHEAD, workers: int = PREFETCH_WORKERS):
+        self.ahead = ahead
+        self.workers = max(1, workers)
+        self.hits = 0
+        self.joined = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.cancelled = 0
+        self._documents = TTLCache(maxsize=PREFETCH_MAX_DOCUMENTS, ttl=PREFETCH_DOCUMENT_TTL)
+        self._pool: Optional[asyncio.Semaphore] = None
+
+    def register(self, pages: list[tuple[int, str]], pages_per_window: int) -> tuple[str, int]:
+        """Store a document's pages and start on its first windows."""
+        # Page numbers are part of every window's text, so they are part of the key
+        document_id = make_key(
+            "document", str(pages_per_window), *(f"{number}\n{text}" for number, text in pages)
+        )[:32]
+        document = self._documents.get(document_id)
+        if document is None:
+            document = Document(pages, pages_per_window)
+            self._documents.set(document_id, document)
+            self._schedule(document, -1)
+        return document_id, len(document.windows)
+
+    def get(self, document_id: str) -> Optional[Document]:
+        return self._documents.get(document_id)
+
+    async def summary(self, document: Document, index: int) -> dict:
+        """Summary of window ``index``; also moves the prefetch horizon there."""
+        self._schedule(document, index)
+
+        result = document.results.get(index)
+        if result is not None:
+            self.hits += 1
+            return result
+        if index in document.prefetches:
+            self.joined += 1
+        else:
+            self.misses += 1
+        return await self._summarize(document, index)
+
+    async def _summarize(self, document: Document, index: int) -> dict:
+        text = document.windows[index]
+        result = await coalesce("/summarize_pages", (text,), lambda: generate_summary(text))
+        if "error" not in result:
+            document.results[index] = result
+        return result
+
+    # -- background work ----------------------------------------------------
+
+    def _schedule(self, document: Document, position: int) -> None:
+        wanted = range(position + 1, min(position + 1 + self.ahead, len(document.windows)))
+
+        # The student moved elsewhere: drop speculation that no longer applies
+        for index, task in list(document.prefetches.items()):
+            if index != position and index not in wanted:
+                task.cancel()
+                self.cancelled += 1
+
+        for index in wanted:
+            if index in document.results or index in document.prefetches:
+                continue
+            task = asyncio.create_task(self._prefetch(document, index))
+            document.prefetches[index] = task
+            task.add_done_callback(lambda t, i=index: self._forget(document, i, t))
+
+    def _forget(self, document: Document, index: int, task: asyncio.Task) -> None:
+        if document.prefetches.get(index) is task:
+            del document.prefetches[index]
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Prefetch of window {index} failed: {task.exception()!r}")
+
+    def _gateway_busy(self) -> bool:
+        try:
+            gateway = get_gateway()
+        except RuntimeError:
+            return False
+        return sum(slot.in_flight for slot in gateway.slots) >= PREFETCH_BUSY_IN_FLIGHT
+
+    async def _prefetch(self, document: Document, index: int) -> None:
+        # Speculative work leaves part of the Gemini quota to students
+        current_priority.set(BATCH)
+        if self._pool is None:
+            self._pool = asyncio.Semaphore(self.workers)
+        async with self._pool:
+            while self._gateway_busy():
+                await asyncio.sleep(BUSY_POLL_INTERVAL)
+            if index in document.results:
+                return
+            self.prefetched += 1
+            await self._summarize(document, index)
+
+    def stats(self) -> dict:
+        served = self.hits + self.joined + self.misses
+        return {
+            "documents": len(self._documents),
+            "hits": self.hits,
+            "joined": self.joined,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / served, 4) if served else 0.0,
+            "prefetched": self.prefetched,
+            "cancelled": self.cancelled,
+        }
+
+
+_prefetcher: Optional[Prefetcher] = None
+
+
+def get_prefetcher() -> Prefetcher:
+    global _prefetcher
+    if _prefetcher is None:
+        _prefetcher = Prefetcher()
+    return _prefetcher
+
+
+stats.register("prefetch", lambda: get_prefetcher().stats())
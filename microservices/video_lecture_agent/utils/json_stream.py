@@ -0,0 +1,69 @@
+import json
+import re
+from typing import Optional
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class StringFieldStreamer:
+    """
+    Decodes one top-level string field of a JSON object while the object is
+    still arriving, e.g. the ``"resp"`` explanation of a streamed Gemini
+    response. ``feed`` returns the newly decoded characters of that field;
+    the raw text is kept in ``text`` for a full ``json.loads`` at the end.
+    """
+
+    def __init__(self, field: str):
+        self.text = ""
+        self.finished = False
+        self._opening = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._pos: Optional[int] = None  # next undecoded char inside the value
+
+    def feed(self, piece: str) -> str:
+        self.text += piece
+        if self.finished:
+            return ""
+
+        if self._pos is None:
+            match = self._opening.search(self.text)
+            if match is None:
+                return ""
+            self._pos = match.end()
+
+        out = []
+        text = self.text
+        i = self._pos
+        while i < len(text):
+            ch = text[i]
+            if ch == '"':
+                self.finished = True
+                i += 1
+                break
+            if ch != "\\":
+                out.append(ch)
+                i += 1
+                continue
+
+            # Escape sequence: wait until it has fully arrived
+            if i + 1 >= len(text):
+                break
+            code = text[i + 1]
+            if code != "u":
+                out.append(_ESCAPES.get(code, code))
+                i += 2
+                continue
+            if i + 6 > len(text):
+                break
+            unit = int(text[i + 2 : i + 6], 16)
+            if 0xD800 <= unit < 0xDC00:
+                # High surrogate: decode together with the low half
+                if i + 12 > len(text):
+                    break
+                out.append(json.loads(f'"{text[i : i + 12]}"'))
+                i += 12
+            else:
+                out.append(chr(unit))
+                i += 6
+
+        self._pos = i
+        return "".join(out)
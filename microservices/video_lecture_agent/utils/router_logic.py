@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-from tools.lecture_agent import generate_summary
-from tools.doubt_agent import solve_doubt
+from tools.lecture_agent import generate_summary, stream_summary
+from tools.doubt_agent import solve_doubt, stream_doubt
+from tools.window_prefetch import get_prefetcher
+from utils.sse import sse_response
+from common.coalesce import coalesce
+from common.disconnect import run_or_cancel
 
 router = APIRouter()
 
@@ -13,21 +17,69 @@ class DoubtText(BaseModel):
     query:str
     context:str
 
+class PageText(BaseModel):
+    page: int
+    text: str
+
+class DocumentPages(BaseModel):
+    pages: list[PageText]
+    pages_per_window: int = 3
+
 @router.post("/summarize_pages")
-async def summarize(data: InputText):
+async def summarize(data: InputText, request: Request, stream: bool = False):
     if not data.text.strip():
         raise HTTPException(status_code=400, detail="Empty text")
 
-    result = await generate_summary(data.text)
+    # ?stream=true: Server-Sent Events (delta..., images, done)
+    if stream:
+        return sse_response("/summarize_pages", stream_summary(data.text))
+
+    # Identical concurrent requests share one Gemini call, which is
+    # cancelled once all of their clients have disconnected
+    result = await run_or_cancel(request, coalesce(
+        "/summarize_pages", (data.text,), lambda: generate_summary(data.text)
+    ))
     return result
 
 
 
 @router.post("/doubt_clear")
-async def doubt_clear(data: DoubtText):
+async def doubt_clear(data: DoubtText, request: Request, stream: bool = False):
     if not data.query.strip():
         raise HTTPException(status_code=400, detail="Empty text")
 
+    # ?stream=true: Server-Sent Events (delta..., done)
+    if stream:
+        return sse_response("/doubt_clear", stream_doubt(data.query, data.context))
+
     print(DoubtText)
-    result = await solve_doubt(data.query,data.context)
-    return result
\ No newline at end of file
+    result = await run_or_cancel(request, coalesce(
+        "/doubt_clear", (data.query, data.context), lambda: solve_doubt(data.query, data.context)
+    ))
+    return result
+
+
+@router.post("/documents")
+async def register_document(data: DocumentPages):
+    """
+    Register a document's pages once; windows are then summarized by index
+    and the next windows are prefetched in the background.
+    """
+    if not data.pages or data.pages_per_window < 1:
+        raise HTTPException(status_code=400, detail="Empty document")
+
+    pages = [(p.page, p.text) for p in data.pages]
+    document_id, windows = get_prefetcher().register(pages, data.pages_per_window)
+    return {"document_id": document_id, "windows": windows}
+
+
+@router.get("/documents/{document_id}/windows/{index}")
+async def window_summary(document_id: str, index: int, request: Request):
+    prefetcher = get_prefetcher()
+    document = prefetcher.get(document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Unknown document; register it with POST /documents")
+    if not 0 <= index < len(document.windows):
+        raise HTTPException(status_code=404, detail="Window out of range")
+
+    return await run_or_cancel(request, prefetcher.summary(document, index))
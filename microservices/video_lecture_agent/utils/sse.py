@@ -0,0 +1,70 @@
+import json
+import time
+from collections import deque
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+from common import stats
+
+# Recent time-to-first-token samples per endpoint, in milliseconds
+_ttft_ms: dict[str, deque] = {}
+
+
+def record_ttft(endpoint: str, ms: float) -> None:
+    _ttft_ms.setdefault(endpoint, deque(maxlen=500)).append(ms)
+    print(f"{endpoint} time-to-first-token: {ms:.0f} ms")
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def ttft_stats() -> dict:
+    return {
+        endpoint: {
+            "samples": len(samples),
+            "p50_ms": round(_percentile(list(samples), 0.50), 1),
+            "p95_ms": round(_percentile(list(samples), 0.95), 1),
+        }
+        for endpoint, samples in _ttft_ms.items()
+        if samples
+    }
+
+
+stats.register("ttft", ttft_stats)
+
+
+def format_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(endpoint: str, events: AsyncIterator[tuple[str, dict]]) -> StreamingResponse:
+    """
+    Serialize ``(event, data)`` pairs as Server-Sent Events. The first
+    ``delta`` event marks time-to-first-token, which is recorded and
+    reported in the closing ``done`` event.
+    """
+    start = time.perf_counter()
+
+    async def body():
+        ttft = None
+        try:
+            async for event, data in events:
+                if event == "delta" and ttft is None:
+                    ttft = (time.perf_counter() - start) * 1000
+                    record_ttft(endpoint, ttft)
+                yield format_event(event, data)
+        except Exception as e:
+            yield format_event("error", {"error": str(e)})
+        yield format_event("done", {
+            "ttft_ms": round(ttft, 1) if ttft is not None else None,
+            "total_ms": round((time.perf_counter() - start) * 1000, 1),
+        })
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
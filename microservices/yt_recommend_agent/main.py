@@ -1,13 +1,27 @@
+import os
+import sys
+
+# The shared ``common`` package lives next to the service directories.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
 from tools.topics_agent import extract_topics
 from tools.yt_search import search_youtube_videos, attach_thumbnails
+from common import stats, tracing, warmup
+from common.admission import STANDARD, AdmissionMiddleware, Policy
+from common.coalesce import coalesce
+
 
+app = FastAPI(title="PDF Topic Extractor API", lifespan=warmup.lifespan)
 
-app = FastAPI(title="PDF Topic Extractor API")
 
+app.add_middleware(AdmissionMiddleware, policies={
+    "POST /extract_topics": Policy(STANDARD, limit=16, deadline=60, expected=5),
+})
 
 # CORS configuration
 app.add_middleware(
@@ -18,6 +32,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(tracing.TracingMiddleware)
+
 
 class PDFText(BaseModel):
     text: str
@@ -28,8 +44,13 @@ async def topics(data: PDFText):
     if not data.text.strip():
         raise HTTPException(status_code=400, detail="Empty text")
 
-    topics = await extract_topics(data.text)
-    videos = search_youtube_videos(topics)
+    # Identical concurrent requests share one extraction and search pass
+    return await coalesce("/extract_topics", (data.text,), lambda: _topics_and_videos(data.text))
+
+
+async def _topics_and_videos(text: str) -> dict:
+    topics = await extract_topics(text)
+    videos = await search_youtube_videos(topics)
     videos = attach_thumbnails(videos)
 
     return {
@@ -41,3 +62,14 @@ async def topics(data: PDFText):
 @app.get("/")
 async def health():
     return {"status": "running"}
+
+
+@app.get("/stats")
+async def service_stats():
+    return stats.collect()
+
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage latency histograms and process resource usage (Prometheus text format)."""
+    return PlainTextResponse(tracing.render_metrics(), media_type="text/plain; version=0.0.4")
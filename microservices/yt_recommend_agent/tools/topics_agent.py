@@ -1,12 +1,18 @@
 import os
 import json
-from google import genai
-from dotenv import load_dotenv
+import asyncio
+from collections import Counter
 from utils.chunker import chunk_text
+from utils.topic_dedup import dedupe_topics
+from common.gemini_gateway import get_gateway
+from common.llm_cache import get_llm_cache, make_key
 
-load_dotenv()
+MODEL = "gemini-2.5-flash"
 
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+# Max number of chunk requests in flight at once, and how long a single
+# chunk may take before it is dropped from the result.
+MAX_CONCURRENCY = int(os.getenv("TOPICS_MAX_CONCURRENCY", "8"))
+CHUNK_TIMEOUT = float(os.getenv("TOPICS_CHUNK_TIMEOUT", "30"))
 
 
 PROMPT = """
@@ -27,23 +33,47 @@ Text:
 """
 
 
-async def extract_topics(text: str):
-    chunks = chunk_text(text)
-    all_topics = set()
-
-    for chunk in chunks:
-        prompt = PROMPT.format(chunk=chunk)
-
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
-            config={"response_mime_type": "application/json"},
-        )
+async def _extract_chunk_topics(chunk: str, semaphore: asyncio.Semaphore, timeout: float) -> list[str]:
+    cache = get_llm_cache()
+    cache_key = make_key(MODEL, PROMPT, chunk)
+    cached = await cache.aget_json(cache_key)
+    if cached is not None:
+        return cached
 
+    async with semaphore:
         try:
+            response = await asyncio.wait_for(
+                get_gateway().generate_content(
+                    model=MODEL,
+                    contents=PROMPT.format(chunk=chunk),
+                    config={"response_mime_type": "application/json"},
+                ),
+                timeout=timeout,
+            )
             parsed = json.loads(response.text)
-            all_topics.update(parsed.get("topics", []))
+            topics = [t for t in parsed.get("topics", []) if isinstance(t, str)]
+            await cache.aset_json(cache_key, topics)
+            return topics
+        except asyncio.TimeoutError:
+            print(f"Topic extraction timed out after {timeout:.0f}s, skipping chunk")
+            return []
         except Exception:
-            continue
+            return []
+
+
+async def extract_topics(text: str, max_concurrency: int = MAX_CONCURRENCY, timeout: float = CHUNK_TIMEOUT):
+    chunks = chunk_text(text)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    results = await asyncio.gather(
+        *(_extract_chunk_topics(chunk, semaphore, timeout) for chunk in chunks)
+    )
+
+    # gather() keeps chunk order and dedupe_topics() sorts its result, so
+    # the merge is independent of completion order. Counting how many chunks
+    # named each variant lets the most common wording become canonical.
+    counts = Counter()
+    for chunk_topics in results:
+        counts.update(set(t.strip() for t in chunk_topics if t.strip()))
 
-    return sorted(list(all_topics))
+    return dedupe_topics(counts)
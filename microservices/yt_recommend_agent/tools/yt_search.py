@@ -1,10 +1,95 @@
-from youtubesearchpython import VideosSearch
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
+from common import stats, tracing, warmup
+from common.llm_cache import get_llm_cache, make_key
+from common.singleflight import SingleFlight
+from common.ttl_cache import TTLCache
 
-def search_youtube_videos(topics: list[str], limit_per_topic: int = 1):
+
+# VideosSearch is blocking, so lookups run in a bounded thread pool
+YT_SEARCH_WORKERS = int(os.getenv("YT_SEARCH_WORKERS", "8"))
+YT_CACHE_TTL = float(os.getenv("YT_CACHE_TTL", str(24 * 3600)))
+YT_CACHE_SIZE = int(os.getenv("YT_CACHE_SIZE", "4096"))
+
+_executor = ThreadPoolExecutor(max_workers=YT_SEARCH_WORKERS, thread_name_prefix="yt-search")
+_cache = TTLCache(maxsize=YT_CACHE_SIZE, ttl=YT_CACHE_TTL)
+_inflight = SingleFlight()
+
+# youtube-search-python is slow to import; loaded on the first search
+VideosSearch = None
+
+stats.register("yt_search", lambda: {"cache": _cache.stats(), "lookups": _inflight.stats()})
+
+
+def _videos_search():
+    global VideosSearch
+    if VideosSearch is None:
+        from youtubesearchpython import VideosSearch as videos_search
+
+        VideosSearch = videos_search
+    return VideosSearch
+
+
+warmup.register("youtube_search", _videos_search)
+
+
+def normalize_topic(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+
+def _search_blocking(topic: str, limit: int) -> list[dict]:
+    search = _videos_search()(topic, limit=limit)
+    data = search.result().get("result", [])
+
+    return [
+        {
+            "title": video.get("title"),
+            "url": video.get("link"),
+            "channel": video.get("channel", {}).get("name")
+        }
+        for video in data
+    ]
+
+
+def _store_key(key: tuple[str, int]) -> str:
+    return make_key("youtube-search", "videos", key[0], str(key[1]))
+
+
+async def _search_topic(topic: str, limit: int) -> list[dict]:
+    key = (normalize_topic(topic), limit)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    # Searches also go to the shared result cache, so they survive restarts
+    # and can be precomputed in bulk (see precompute.py)
+    stored = await get_llm_cache().aget_json(_store_key(key))
+    if stored is not None:
+        _cache.set(key, stored)
+        return stored
+
+    async def lookup() -> list[dict]:
+        loop = asyncio.get_running_loop()
+        with tracing.span("youtube.search", topic=key[0]) as span:
+            videos = await loop.run_in_executor(_executor, _search_blocking, topic, limit)
+            span.set(results=len(videos))
+        _cache.set(key, videos)
+        await get_llm_cache().aset_json(_store_key(key), videos)
+        return videos
+
+    # Concurrent requests for the same topic share one lookup
+    return await _inflight.do(key, lookup)
+
+
+async def search_youtube_videos(topics: list[str], limit_per_topic: int = 1):
     """
     Search YouTube videos for given topics.
 
+    Topics are searched concurrently; results are cached per
+    (normalized topic, limit) for YT_CACHE_TTL seconds.
+
     Returns:
     [
         {
@@ -16,23 +101,20 @@ def search_youtube_videos(topics: list[str], limit_per_topic: int = 1):
     ]
     """
 
+    per_topic = await asyncio.gather(
+        *(_search_topic(topic, limit_per_topic) for topic in topics),
+        return_exceptions=True,
+    )
+
     results = []
 
-    for topic in topics:
-        try:
-            search = VideosSearch(topic, limit=limit_per_topic)
-            data = search.result().get("result", [])
-
-            for video in data:
-                results.append({
-                    "topic": topic,
-                    "title": video.get("title"),
-                    "url": video.get("link"),
-                    "channel": video.get("channel", {}).get("name")
-                })
-
-        except Exception as e:
-            print("YT search error:", e)
+    for topic, videos in zip(topics, per_topic):
+        if isinstance(videos, Exception):
+            print("YT search error:", videos)
+            continue
+
+        for video in videos:
+            results.append({"topic": topic, **video})
 
     return results
 
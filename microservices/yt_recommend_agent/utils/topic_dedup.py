@@ -0,0 +1,119 @@
+import os
+import re
+from collections import Counter
+
+from common import stats
+
+
+# Two topics are merged when the Jaccard similarity of their lemmatized
+# token sets reaches this value ("Neural Network" / "Artificial Neural
+# Networks" share 2 of 3 tokens).
+TOPIC_SIMILARITY_THRESHOLD = float(os.getenv("TOPIC_SIMILARITY_THRESHOLD", "0.6"))
+
+# "+" and "#" are kept so "C", "C++" and "C#" stay different topics
+_WORD_RE = re.compile(r"[a-z0-9]+[+#]*")
+
+_STOPWORDS = frozenset("""
+a an and as at by for from in into of on or the to with vs versus
+""".split())
+
+
+def _lemma(word: str, known: frozenset[str] = frozenset()) -> str:
+    """
+    Cheap English singularization; good enough to match topic variants.
+    An "-es" plural is resolved against the ``known`` words of the same
+    request: "gases" -> "gas" when "gas" occurs, "bases" -> "base".
+    """
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("es"):
+        if word[:-1] in known:
+            return word[:-1]
+        if word[:-2] in known or word.endswith(("sses", "xes", "ches", "shes")):
+            return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+# Words that tell otherwise identical topics apart ("Newton's First Law" /
+# "Newton's Second Law"); topics differing in one are never merged
+_ORDINALS = frozenset("""
+first second third fourth fifth sixth seventh eighth ninth tenth zeroth last
+one two three four five six seven eight nine ten
+i ii iii iv v vi vii viii ix x
+""".split())
+
+_usage = {"requests": 0, "topics_in": 0, "topics_out": 0, "searches_saved": 0}
+
+
+def _words(topic: str) -> list[str]:
+    return _WORD_RE.findall(topic.casefold().replace("'s", ""))
+
+
+def topic_tokens(topic: str, known: frozenset[str] = frozenset()) -> frozenset[str]:
+    words = _words(topic)
+    tokens = frozenset(_lemma(w, known) for w in words if w not in _STOPWORDS)
+    # A topic made only of stopwords still needs an identity
+    return tokens or frozenset(words)
+
+
+def _distinguishing(token: str) -> bool:
+    return token in _ORDINALS or any(c.isdigit() for c in token)
+
+
+def similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def same_topic(a: frozenset[str], b: frozenset[str], threshold: float = TOPIC_SIMILARITY_THRESHOLD) -> bool:
+    """
+    True when the token sets are similar enough to be one search. A
+    multi-word topic never joins a one-word one ("Kinetic Energy" is not
+    "Energy"), and topics that differ in an ordinal or number stay apart.
+    """
+    if (len(a) == 1) != (len(b) == 1):
+        return False
+    if any(_distinguishing(token) for token in a ^ b):
+        return False
+    return similarity(a, b) >= threshold
+
+
+def dedupe_topics(counts: Counter, threshold: float = TOPIC_SIMILARITY_THRESHOLD) -> list[str]:
+    """
+    Cluster near-duplicate topics and return one canonical name per cluster.
+
+    ``counts`` maps each raw topic string to how many chunks produced it.
+    Topics are clustered greedily, most frequent first, each joining the
+    first cluster whose seed is the same topic (see ``same_topic``). A
+    cluster is named after its most frequent member, ties going to the
+    shorter name.
+    """
+    ordered = sorted(counts, key=lambda t: (-counts[t], len(t), t))
+    known = frozenset(word for topic in counts for word in _words(topic))
+    clusters: list[tuple[frozenset[str], list[str]]] = []
+    for topic in ordered:
+        tokens = topic_tokens(topic, known)
+        for seed, members in clusters:
+            if same_topic(tokens, seed, threshold):
+                members.append(topic)
+                break
+        else:
+            clusters.append((tokens, [topic]))
+
+    canonical = sorted(members[0].strip() for _, members in clusters)
+
+    _usage["requests"] += 1
+    _usage["topics_in"] += len(counts)
+    _usage["topics_out"] += len(canonical)
+    _usage["searches_saved"] += len(counts) - len(canonical)
+    if len(canonical) < len(counts):
+        print(f"Topic dedup: {len(counts)} topics -> {len(canonical)}, {len(counts) - len(canonical)} searches saved")
+    return canonical
+
+
+stats.register("topic_dedup", lambda: dict(_usage))